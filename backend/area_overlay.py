@@ -0,0 +1,187 @@
+import heapq
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+INF = float('inf')
+
+# Zones per area when areas.json does not assign them
+DEFAULT_AREA_SIZE = 8
+
+class AreaOverlay:
+    """
+    Two-level view of the compiled (zone, label) state graph.
+    Zones are grouped into areas; a state is a boundary state if it has an edge to
+    or from another area. For each area the boundary-to-boundary distances inside
+    the area are precomputed, so a query only expands the states of the two end
+    areas plus the boundary states of the areas in between.
+    """
+    def __init__(self, compiled, area_names: List[str], zone_area: List[int]):
+        self.compiled = compiled
+        self.area_names = area_names
+        self.area_index = {name: i for i, name in enumerate(area_names)}
+        self.zone_area = zone_area # zone id -> area id
+        num_states = compiled.num_states
+        self.state_area = [zone_area[compiled.state_zone[s]] for s in range(num_states)]
+
+        self.area_states = [[] for _ in area_names]
+        for s in range(num_states):
+            self.area_states[self.state_area[s]].append(s)
+
+        # Reverse edges, to spot entry states of an area
+        incoming = [[] for _ in range(num_states)]
+        for s in range(num_states):
+            for e in range(compiled.offsets[s], compiled.offsets[s + 1]):
+                incoming[compiled.targets[e]].append(s)
+
+        # Boundary states and cross-area edges (source -> [(target, weight)])
+        self.is_boundary = [False] * num_states
+        self.cross_edges = {}
+        for s in range(num_states):
+            for e in range(compiled.offsets[s], compiled.offsets[s + 1]):
+                t = compiled.targets[e]
+                if self.state_area[t] != self.state_area[s]:
+                    self.is_boundary[s] = self.is_boundary[t] = True
+                    self.cross_edges.setdefault(s, []).append((t, compiled.weights[e]))
+        self.area_boundaries = [[s for s in states if self.is_boundary[s]] for states in self.area_states]
+
+        # Boundary -> [(boundary of the same area, distance inside the area)]
+        self.clique_edges = {}
+        for area, boundaries in enumerate(self.area_boundaries):
+            for b in boundaries:
+                dist = self._local_distances(area, b)
+                self.clique_edges[b] = [(o, dist[o]) for o in boundaries if o != b and o in dist]
+
+    def _local_distances(self, area: int, source: int) -> Dict[int, float]:
+        """
+        Dijkstra from source that never leaves its area.
+        """
+        compiled = self.compiled
+        dist = {source: 0}
+        pq = [(0, source)]
+        while pq:
+            d, s = heapq.heappop(pq)
+            if d > dist[s]:
+                continue
+            for e in range(compiled.offsets[s], compiled.offsets[s + 1]):
+                t = compiled.targets[e]
+                if self.state_area[t] != area:
+                    continue
+                nd = d + compiled.weights[e]
+                if nd < dist.get(t, INF):
+                    dist[t] = nd
+                    heapq.heappush(pq, (nd, t))
+        return dist
+
+    @property
+    def num_boundary_states(self) -> int:
+        return sum(len(b) for b in self.area_boundaries)
+
+    def distance(self, from_zone: int, to_zone: int) -> Tuple[float, int]:
+        """
+        Shortest distance from any label of from_zone to any label of to_zone.
+        Full edges are used only inside the two end areas; every other area is
+        crossed through its boundary clique. Returns (distance, states expanded).
+        """
+        compiled = self.compiled
+        local_areas = {self.zone_area[from_zone], self.zone_area[to_zone]}
+        dist = {}
+        pq = []
+        for s in compiled.zone_states(from_zone):
+            dist[s] = 0
+            pq.append((0, s))
+        heapq.heapify(pq)
+
+        expanded = 0
+        while pq:
+            d, s = heapq.heappop(pq)
+            if d > dist[s]:
+                continue
+            expanded += 1
+            if compiled.state_zone[s] == to_zone:
+                return d, expanded
+            if self.state_area[s] in local_areas:
+                edges = ((compiled.targets[e], compiled.weights[e])
+                         for e in range(compiled.offsets[s], compiled.offsets[s + 1]))
+            else:
+                edges = self.clique_edges.get(s, []) + self.cross_edges.get(s, [])
+            for t, w in edges:
+                nd = d + w
+                if nd < dist.get(t, INF):
+                    dist[t] = nd
+                    heapq.heappush(pq, (nd, t))
+        return INF, expanded
+
+    def describe(self) -> List[Dict[str, Any]]:
+        compiled = self.compiled
+        areas = []
+        for area, name in enumerate(self.area_names):
+            areas.append({
+                "name": name,
+                "zones": [compiled.zones[z] for z, a in enumerate(self.zone_area) if a == area],
+                "states": len(self.area_states[area]),
+                "boundary_states": len(self.area_boundaries[area])
+            })
+        return areas
+
+    @classmethod
+    def build(cls, compiled, areas_spec: Optional[Dict[str, List[str]]] = None, area_size: int = DEFAULT_AREA_SIZE) -> 'AreaOverlay':
+        """
+        Areas come from areas_spec ({area_name: [zones]}) when given; zones it does not
+        list are grouped automatically by growing connected clusters of up to
+        area_size zones, in graph order.
+        """
+        num_zones = compiled.num_zones
+        zone_area = [-1] * num_zones
+        area_names = []
+        for name, zones in (areas_spec or {}).items():
+            area_id = len(area_names)
+            area_names.append(name)
+            for zone in zones:
+                zone_id = compiled.zone_index.get(zone)
+                if zone_id is None:
+                    print(f"Warning: Area '{name}' lists unknown zone '{zone}'")
+                elif zone_area[zone_id] == -1:
+                    zone_area[zone_id] = area_id
+
+        # Zone adjacency from crossing edges, in graph order
+        neighbors = [[] for _ in range(num_zones)]
+        for s in range(compiled.num_states):
+            z = compiled.state_zone[s]
+            for e in range(compiled.offsets[s], compiled.offsets[s + 1]):
+                t = compiled.state_zone[compiled.targets[e]]
+                if t != z and t not in neighbors[z]:
+                    neighbors[z].append(t)
+                    neighbors[t].append(z)
+
+        for seed in range(num_zones):
+            if zone_area[seed] != -1:
+                continue
+            area_id = len(area_names)
+            area_names.append(f"area-{area_id}")
+            zone_area[seed] = area_id
+            queue, size = [seed], 1
+            while queue and size < area_size:
+                z = queue.pop(0)
+                for n in neighbors[z]:
+                    if zone_area[n] == -1 and size < area_size:
+                        zone_area[n] = area_id
+                        queue.append(n)
+                        size += 1
+        return cls(compiled, area_names, zone_area)
+
+def areas_path_for(adjacency_file: str) -> str:
+    """
+    adjacency.json -> areas.json (same directory).
+    """
+    return os.path.join(os.path.dirname(adjacency_file), "areas.json")
+
+def load_areas_spec(path: str) -> Optional[Dict[str, List[str]]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable areas file {path}: {e}")
+        return None
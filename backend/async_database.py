@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List
+import asyncpg
+from database import DB_CONFIG, ALL_POKEMON_SQL, ALL_ZONES_SQL, ZONE_ENCOUNTERS_SQL, ALL_ENCOUNTERS_SQL
+
+# Pool de la API; asyncpg prepara y cachea las sentencias por conexión
+POOL_MIN = int(os.getenv('DB_POOL_MIN', 2))
+POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+# Conexiones inactivas más tiempo que esto se cierran (y se reabren al necesitarlas)
+MAX_INACTIVE_SECONDS = float(os.getenv('DB_POOL_MAX_INACTIVE', 300))
+
+_pool = None
+_pool_lock = asyncio.Lock()
+_stats = {"acquisitions": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+async def get_pool() -> asyncpg.Pool:
+    """Crea el pool asyncpg en el primer uso"""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(
+                    host=DB_CONFIG['host'],
+                    database=DB_CONFIG['database'],
+                    user=DB_CONFIG['user'],
+                    password=DB_CONFIG['password'],
+                    port=DB_CONFIG['port'],
+                    min_size=POOL_MIN,
+                    max_size=POOL_MAX,
+                    max_inactive_connection_lifetime=MAX_INACTIVE_SECONDS
+                )
+    return _pool
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+@asynccontextmanager
+async def connection():
+    """Conexión del pool; espera como máximo ACQUIRE_TIMEOUT segundos"""
+    pool = await get_pool()
+    start = time.monotonic()
+    try:
+        conn = await pool.acquire(timeout=ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        raise
+    waited = time.monotonic() - start
+    _stats["acquisitions"] += 1
+    _stats["wait_seconds_total"] += waited
+    _stats["wait_seconds_max"] = max(_stats["wait_seconds_max"], waited)
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+async def _fetch(query: str, *args) -> List[Dict]:
+    async with connection() as conn:
+        return [dict(row) for row in await conn.fetch(query, *args)]
+
+def pool_stats() -> Dict:
+    """Tamaño del pool async y tiempos de espera (para /api/metrics)"""
+    acquisitions = _stats["acquisitions"]
+    return {
+        "min_size": POOL_MIN,
+        "max_size": POOL_MAX,
+        "open": _pool.get_size() if _pool is not None else 0,
+        "idle": _pool.get_idle_size() if _pool is not None else 0,
+        **_stats,
+        "wait_seconds_avg": _stats["wait_seconds_total"] / acquisitions if acquisitions else 0.0
+    }
+
+def _level_band(pokemon_level: int):
+    return max(1, pokemon_level - 10), pokemon_level + 10
+
+async def get_all_pokemon() -> List[Dict]:
+    """Obtiene todos los Pokémon ordenados por nombre"""
+    return await _fetch(ALL_POKEMON_SQL)
+
+async def get_all_zones() -> List[Dict]:
+    """Obtiene todas las zonas ordenadas por nombre"""
+    return await _fetch(ALL_ZONES_SQL)
+
+async def get_zone_encounters(zone_code: str, pokemon_level: int = 50) -> List[Dict]:
+    """
+    Obtiene todos los encuentros de una zona.
+    """
+    return await _fetch(ZONE_ENCOUNTERS_SQL, zone_code, *_level_band(pokemon_level))
+
+async def get_encounters_for_zones(zone_codes: Iterable[str], pokemon_level: int = 50) -> Dict[str, List[Dict]]:
+    """
+    Encuentros de varias zonas a la vez: cada consulta usa su propia conexión del pool
+    y todas se ejecutan concurrentemente.
+    """
+    codes = list(dict.fromkeys(zone_codes))
+    results = await asyncio.gather(*(get_zone_encounters(code, pokemon_level) for code in codes))
+    return dict(zip(codes, results))
+
+async def get_all_encounters() -> List[Dict]:
+    """
+    Obtiene todos los encuentros (una fila por encuentro) para cargar el EncounterStore en memoria.
+    """
+    return await _fetch(ALL_ENCOUNTERS_SQL)
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, List
+import numpy as np
+from encounter_store import EncounterStore, EV_COLUMNS
+from graph import PokemonGraph
+from zone_aliases import ZoneAliasIndex
+
+# File layout: fixed header | arrays (each aligned to ARRAY_ALIGNMENT) | JSON table of contents
+MAGIC = b"EVSNAP\0\0"
+# Bump when the layout or the meaning of any section changes
+FORMAT_VERSION = 1
+# magic, format version, reserved, toc offset, toc length
+HEADER = struct.Struct("<8sIIQQ")
+ARRAY_ALIGNMENT = 64
+
+GRAPH_ARRAYS = ("state_zone", "state_label", "zone_state_offsets", "offsets", "targets", "weights")
+ENCOUNTER_ARRAYS = ("zone_offsets", "pokemon_idx", "method_idx", "min_level", "max_level",
+                    "avg_level", "probability", "evs")
+
+class SnapshotFormatError(Exception):
+    """
+    The file is not a snapshot, or was written by an incompatible version.
+    """
+
+def write_snapshot(path: str, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    """
+    Writes meta (JSON-able) and the named arrays to path atomically.
+    """
+    toc = {"format_version": FORMAT_VERSION, "meta": meta, "arrays": {}}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b"\0" * HEADER.size)
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            f.write(b"\0" * (-f.tell() % ARRAY_ALIGNMENT))
+            toc["arrays"][name] = {"offset": f.tell(), "dtype": values.dtype.str, "shape": list(values.shape)}
+            f.write(values.tobytes())
+        toc_offset = f.tell()
+        toc_bytes = json.dumps(toc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        f.write(toc_bytes)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, toc_offset, len(toc_bytes)))
+    os.replace(tmp_path, path)
+
+class BinarySnapshot:
+    """
+    Read-only view of a snapshot file. The file is memory-mapped, so arrays are
+    zero-copy views whose pages are shared by every worker process mapping it;
+    only the JSON table of contents is parsed at open.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            raise SnapshotFormatError(f"{path} is too short to be a snapshot")
+        magic, version, _, toc_offset, toc_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError(f"{path} is not a data snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotFormatError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        toc = json.loads(self._mmap[toc_offset:toc_offset + toc_length].decode("utf-8"))
+        self.meta = toc["meta"]
+        self._arrays = toc["arrays"]
+        self.size_bytes = len(self._mmap)
+
+    def array(self, name: str) -> np.ndarray:
+        entry = self._arrays[name]
+        shape = tuple(entry["shape"])
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(shape)) if shape else 1
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=entry["offset"]).reshape(shape)
+
+    def zone_aliases(self) -> ZoneAliasIndex:
+        return ZoneAliasIndex.from_dict(self.meta["zone_aliases"])
+
+    def encounter_store(self) -> EncounterStore:
+        meta = self.meta["encounters"]
+        return EncounterStore(
+            meta["zone_codes"], meta["pokemon_names"], meta["methods"],
+            *(self.array(f"encounters_{name}") for name in ENCOUNTER_ARRAYS),
+            yield_arrays={name: self.array(f"yields_{name}") for name in meta["yield_arrays"]}
+        )
+
+    def pokemon_rows(self) -> List[Dict[str, Any]]:
+        """
+        Rows shaped like async_database.get_all_pokemon(), ordered by name.
+        """
+        meta = self.meta["pokemon"]
+        ids = self.array("pokemon_id").tolist()
+        numbers = self.array("pokemon_pokedex_number").tolist()
+        evs = self.array("pokemon_evs").tolist()
+        return [
+            {"id": ids[i], "pokedex_number": numbers[i], "name": meta["names"][i],
+             "type1": meta["type1"][i], "type2": meta["type2"][i], **dict(zip(EV_COLUMNS, evs[i]))}
+            for i in range(len(ids))
+        ]
+
+    def zone_rows(self) -> List[Dict[str, Any]]:
+        return self.meta["zones"]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "size_bytes": self.size_bytes,
+            "built_at": self.meta["built_at"],
+            "graph_hash": self.meta["graph"]["content_hash"],
+            "source": self.meta["source"],
+            "arrays": len(self._arrays)
+        }
+
+    def close(self):
+        self._mmap.close()
+
+def build_snapshot(graph: PokemonGraph, aliases: ZoneAliasIndex, pokemon: List[Dict], zones: List[Dict],
+                   store: EncounterStore, source: str):
+    """
+    (meta, arrays) for write_snapshot from already loaded graph, aliases and data.
+    """
+    compiled = graph.compiled
+    arrays = {f"graph_{name}": np.asarray(getattr(compiled, name), dtype=np.int32) for name in GRAPH_ARRAYS}
+    for name, profile in graph.progression.profiles.items():
+        arrays[f"distances_{name}"] = profile.distance_table.matrix
+    arrays["distances"] = graph.distance_table.matrix
+
+    for name in ENCOUNTER_ARRAYS:
+        arrays[f"encounters_{name}"] = getattr(store, name)
+    yield_arrays = store.yield_table.arrays()
+    for name, values in yield_arrays.items():
+        arrays[f"yields_{name}"] = values
+
+    pokemon = sorted(pokemon, key=lambda p: p["name"])
+    arrays["pokemon_id"] = np.array([p["id"] for p in pokemon], dtype=np.int32)
+    arrays["pokemon_pokedex_number"] = np.array([p["pokedex_number"] for p in pokemon], dtype=np.int32)
+    arrays["pokemon_evs"] = np.array([[p[col] for col in EV_COLUMNS] for p in pokemon], dtype=np.int16).reshape(-1, len(EV_COLUMNS))
+
+    meta = {
+        "built_at": time.time(),
+        "source": source,
+        "graph": {
+            "content_hash": graph.content_hash,
+            "adjacency": graph.adjacency_data,
+            "zones": compiled.zones,
+            "labels": compiled.labels,
+            "distance_zones": graph.distance_table.zones,
+            "areas_spec": graph.areas_spec,
+            "progression_spec": graph.progression_spec,
+            "progression_profiles": list(graph.progression.profiles)
+        },
+        "zone_aliases": aliases.to_dict(),
+        "pokemon": {
+            "names": [p["name"] for p in pokemon],
+            "type1": [p["type1"] for p in pokemon],
+            "type2": [p["type2"] for p in pokemon]
+        },
+        "zones": [dict(z) for z in zones],
+        "encounters": {
+            "zone_codes": store.zone_codes,
+            "pokemon_names": store.pokemon_names,
+            "methods": store.methods,
+            "yield_arrays": list(yield_arrays)
+        }
+    }
+    return meta, arrays
+
+async def _load_sources(backend):
+    try:
+        return await asyncio.gather(backend.get_all_pokemon(), backend.get_all_zones(), backend.load_encounter_store())
+    finally:
+        await backend.close()
+
+def main():
+    from data_backend import create_backend
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Compile graph, zone aliases, Pokémon and encounters into one binary snapshot")
+    parser.add_argument("--out", default=os.path.join(backend_dir, "data.snapshot"), help="snapshot file to write")
+    parser.add_argument("--adjacency", default=os.path.join(backend_dir, "adjacency.json"))
+    parser.add_argument("--name-mapping", default=os.path.join(backend_dir, "..", "db", "data_sources", "name_mapping.json"))
+    parser.add_argument("--source", choices=("postgres", "snapshot"), default="postgres",
+                        help="where Pokémon and encounters come from (snapshot = CSVs in --data-sources)")
+    parser.add_argument("--data-sources", default=os.path.join(backend_dir, "..", "db", "data_sources"))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = PokemonGraph(args.adjacency)
+    backend = create_backend(args.source, args.data_sources)
+    pokemon, zones, store = asyncio.run(_load_sources(backend))
+    aliases = ZoneAliasIndex.build(graph.distance_table.zones, args.name_mapping, zones)
+    meta, arrays = build_snapshot(graph, aliases, pokemon, zones, store, args.source)
+    write_snapshot(args.out, meta, arrays)
+    print(f"Wrote {args.out}: {os.path.getsize(args.out)} bytes, {len(arrays)} arrays, "
+          f"{len(pokemon)} pokemon, {len(store)} encounters ({time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
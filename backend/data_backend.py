@@ -0,0 +1,135 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+import async_database
+from binary_snapshot import BinarySnapshot
+from encounter_store import EncounterStore
+from snapshot_database import SnapshotDatabase
+
+class PostgresBackend:
+    """
+    Catalog and encounter data from Postgres through the async pool.
+    """
+    name = "postgres"
+
+    async def get_all_pokemon(self) -> List[Dict]:
+        return await async_database.get_all_pokemon()
+
+    async def get_all_zones(self) -> List[Dict]:
+        return await async_database.get_all_zones()
+
+    async def get_encounters_for_zones(self, zone_codes: Iterable[str], pokemon_level: int = 50) -> Dict[str, List[Dict]]:
+        return await async_database.get_encounters_for_zones(zone_codes, pokemon_level)
+
+    async def load_encounter_store(self) -> EncounterStore:
+        return await EncounterStore.load_async()
+
+    async def reload(self):
+        """
+        Nothing to do: every query reads the live tables.
+        """
+
+    async def close(self):
+        await async_database.close_pool()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "database_pool": async_database.pool_stats()
+        }
+
+class SnapshotBackend:
+    """
+    Same data from an in-process SnapshotDatabase built from db/data_sources:
+    no Postgres, no network hop, every lookup served from memory.
+    """
+    name = "snapshot"
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.snapshot = SnapshotDatabase.from_sources(data_dir)
+
+    async def get_all_pokemon(self) -> List[Dict]:
+        return self.snapshot.get_all_pokemon()
+
+    async def get_all_zones(self) -> List[Dict]:
+        return self.snapshot.get_all_zones()
+
+    async def get_encounters_for_zones(self, zone_codes: Iterable[str], pokemon_level: int = 50) -> Dict[str, List[Dict]]:
+        return {code: self.snapshot.get_zone_encounters(code, pokemon_level) for code in dict.fromkeys(zone_codes)}
+
+    async def load_encounter_store(self) -> EncounterStore:
+        return self.snapshot.encounter_store
+
+    async def reload(self):
+        """
+        Rebuilds the snapshot from the source files (off the event loop).
+        """
+        loop = asyncio.get_running_loop()
+        self.snapshot = await loop.run_in_executor(None, SnapshotDatabase.from_sources, self.data_dir)
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "data_dir": self.data_dir, **self.snapshot.stats()}
+
+class BinarySnapshotBackend:
+    """
+    Data (and the compiled graph, see PokemonGraph.from_snapshot) from a binary
+    snapshot file written by `python binary_snapshot.py`. Opening it maps the file;
+    the encounter arrays and yield tables are used in place.
+    """
+    name = "binary"
+
+    def __init__(self, snapshot_file: str):
+        self.snapshot_file = snapshot_file
+        self.snapshot = BinarySnapshot(snapshot_file)
+        self._pokemon = None
+        self._store = None
+
+    async def get_all_pokemon(self) -> List[Dict]:
+        if self._pokemon is None:
+            self._pokemon = self.snapshot.pokemon_rows()
+        return self._pokemon
+
+    async def get_all_zones(self) -> List[Dict]:
+        return self.snapshot.zone_rows()
+
+    async def get_encounters_for_zones(self, zone_codes: Iterable[str], pokemon_level: int = 50) -> Dict[str, List[Dict]]:
+        store = await self.load_encounter_store()
+        return {code: store.encounters(code, pokemon_level) for code in dict.fromkeys(zone_codes)}
+
+    async def load_encounter_store(self) -> EncounterStore:
+        if self._store is None:
+            self._store = self.snapshot.encounter_store()
+        return self._store
+
+    async def reload(self):
+        """
+        Maps the snapshot file again (e.g. after it was rebuilt). The old mapping is left
+        to the garbage collector: plans still running may hold views into it.
+        """
+        self.snapshot = BinarySnapshot(self.snapshot_file)
+        self._pokemon = None
+        self._store = None
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.snapshot.describe()}
+
+DATA_BACKENDS = ("postgres", "snapshot", "binary")
+
+def create_backend(name: str, data_dir: str, snapshot_file: Optional[str] = None):
+    """
+    DATA_BACKEND setting -> backend instance. data_dir is only used by the snapshot
+    backend, snapshot_file by the binary one.
+    """
+    if name == "postgres":
+        return PostgresBackend()
+    if name == "snapshot":
+        return SnapshotBackend(data_dir)
+    if name == "binary":
+        return BinarySnapshotBackend(snapshot_file)
+    raise ValueError(f"Unknown data backend '{name}' (expected one of {', '.join(DATA_BACKENDS)})")
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+from array import array
+from typing import Dict, List, Optional
+import numpy as np
+
+INF = float('inf')
+
+class ZoneDistanceTable:
+    """
+    All-pairs zone-to-zone shortest distances (in tiles).
+    Distances are stored row-major in a flat array so a lookup is a single index read.
+    """
+    # Bump when the on-disk format or the distance semantics change
+    CACHE_VERSION = 1
+
+    def __init__(self, zones: List[str], distances: array, content_hash: Optional[str] = None):
+        self.zones = list(zones)
+        self.index = {zone: i for i, zone in enumerate(self.zones)}
+        self.size = len(self.zones)
+        self.distances = distances
+        # Zero-copy (zones x zones) view for vectorized scoring
+        self.matrix = np.frombuffer(distances, dtype=np.float64).reshape(self.size, self.size)
+        self.content_hash = content_hash
+
+    def distance(self, from_zone: str, to_zone: str) -> float:
+        """
+        Returns the shortest distance between two zones, or inf if unreachable/unknown.
+        """
+        i = self.index.get(from_zone)
+        j = self.index.get(to_zone)
+        if i is None or j is None:
+            return 0 if from_zone == to_zone else INF
+        return self.distances[i * self.size + j]
+
+    def distances_from(self, start_zone: str) -> Dict[str, float]:
+        """
+        Returns {zone_name: distance_in_tiles} for every zone reachable from start_zone.
+        """
+        i = self.index.get(start_zone)
+        if i is None:
+            return {start_zone: 0}
+        row = self.distances[i * self.size:(i + 1) * self.size]
+        return {zone: d for zone, d in zip(self.zones, row) if d != INF}
+
+    def row(self, start_zone: str) -> np.ndarray:
+        """
+        Distances from start_zone to every zone, aligned with self.zones (inf if unreachable).
+        """
+        i = self.index.get(start_zone)
+        if i is None:
+            return np.full(self.size, INF)
+        return self.matrix[i]
+
+    @classmethod
+    def build(cls, graph, content_hash: Optional[str] = None) -> 'ZoneDistanceTable':
+        """
+        Runs one Dijkstra per zone over the compiled (zone, label) state graph.
+        """
+        return cls.from_compiled(graph.compiled, content_hash)
+
+    @classmethod
+    def from_compiled(cls, compiled, content_hash: Optional[str] = None) -> 'ZoneDistanceTable':
+        distances = array('d')
+        for zone_id in range(compiled.num_zones):
+            distances.extend(compiled.zone_distances_from(zone_id))
+        return cls(compiled.zones, distances, content_hash)
+
+    @classmethod
+    def load_or_build(cls, graph, adjacency_file: str) -> 'ZoneDistanceTable':
+        """
+        Loads the persisted table next to adjacency_file if its content hash matches,
+        otherwise rebuilds it and writes the cache back.
+        """
+        content_hash = getattr(graph, 'content_hash', None)
+        if not content_hash:
+            return cls.build(graph)
+
+        cache_path = cache_path_for(adjacency_file)
+        table = cls._load_cache(cache_path, content_hash)
+        if table is not None:
+            return table
+
+        table = cls.build(graph, content_hash)
+        table._save_cache(cache_path)
+        return table
+
+    @classmethod
+    def _load_cache(cls, path: str, content_hash: str) -> Optional['ZoneDistanceTable']:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable distance cache {path}: {e}")
+            return None
+
+        if data.get('version') != cls.CACHE_VERSION or data.get('hash') != content_hash:
+            return None
+
+        zones = data['zones']
+        distances = array('d', (INF if d is None else d for row in data['distances'] for d in row))
+        if len(distances) != len(zones) * len(zones):
+            return None
+        return cls(zones, distances, content_hash)
+
+    def _save_cache(self, path: str):
+        rows = []
+        for i in range(self.size):
+            row = self.distances[i * self.size:(i + 1) * self.size]
+            rows.append([None if d == INF else int(d) for d in row])
+        data = {
+            "version": self.CACHE_VERSION,
+            "hash": self.content_hash,
+            "zones": self.zones,
+            "distances": rows
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not persist distance cache to {path}: {e}")
+
+def cache_path_for(adjacency_file: str) -> str:
+    """
+    adjacency.json -> adjacency.distances.json (same directory).
+    """
+    base, _ = os.path.splitext(adjacency_file)
+    return f"{base}.distances.json"
+
+def content_hash_of(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
@@ -0,0 +1,233 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from database import get_all_encounters
+import async_database
+
+# Column order of the per-encounter EV matrix (same as optimizer.STAT_KEYS)
+EV_COLUMNS = ("ev_hp", "ev_attack", "ev_defense", "ev_sp_attack", "ev_sp_defense", "ev_speed")
+STAT_NAMES = ("HP", "Attack", "Defense", "Special Attack", "Special Defense", "Speed")
+
+MAX_LEVEL = 100
+# avg_level is DECIMAL(4,1): one prefix-sum bin per tenth of a level
+LEVEL_BINS_PER_LEVEL = 10
+
+def level_band(pokemon_level: int):
+    """
+    Encounter levels considered for a Pokemon level (same band as the SQL queries).
+    """
+    return max(1, pokemon_level - 10), pokemon_level + 10
+
+class EncounterStore:
+    """
+    Read-only, array-backed copy of the encounters table joined with zones and pokemon.
+    Rows are grouped by zone (CSR-style offsets) so a zone lookup is a slice, and the
+    level filter is a vectorized mask over that slice. Instances are never mutated:
+    a reload builds a new store and swaps the reference.
+    """
+    def __init__(self, zone_codes: List[str], pokemon_names: List[str], methods: List[str],
+                 zone_offsets: np.ndarray, pokemon_idx: np.ndarray, method_idx: np.ndarray,
+                 min_level: np.ndarray, max_level: np.ndarray, avg_level: np.ndarray,
+                 probability: np.ndarray, evs: np.ndarray, yield_arrays: Optional[Dict[str, np.ndarray]] = None):
+        self.zone_codes = zone_codes
+        self.zone_index = {code: i for i, code in enumerate(zone_codes)}
+        self.pokemon_names = pokemon_names
+        self.methods = methods
+        self.zone_offsets = zone_offsets # zone i owns rows [offsets[i], offsets[i + 1])
+        self.pokemon_idx = pokemon_idx
+        self.method_idx = method_idx
+        self.min_level = min_level # -1 when unknown
+        self.max_level = max_level # -1 when unknown
+        self.avg_level = avg_level # NaN when unknown (never inside a level band, like SQL NULL)
+        self.probability = probability # percent
+        self.evs = evs # (rows, 6)
+        self.loaded_at = time.time()
+        self.yield_table = YieldTable(self, yield_arrays)
+
+    def __len__(self) -> int:
+        return len(self.pokemon_idx)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> 'EncounterStore':
+        """
+        Builds the store from rows shaped like database.get_all_encounters().
+        Row order inside each zone is preserved.
+        """
+        zone_codes, zone_index = [], {}
+        pokemon_names, pokemon_index = [], {}
+        methods, method_index = [], {}
+        by_zone = []
+        for row in rows:
+            z = zone_index.get(row['code'])
+            if z is None:
+                z = zone_index[row['code']] = len(zone_codes)
+                zone_codes.append(row['code'])
+                by_zone.append([])
+            by_zone[z].append(row)
+
+        count = sum(len(zone_rows) for zone_rows in by_zone)
+        zone_offsets = np.zeros(len(zone_codes) + 1, dtype=np.int32)
+        pokemon_idx = np.empty(count, dtype=np.int32)
+        method_idx = np.empty(count, dtype=np.int16)
+        min_level = np.empty(count, dtype=np.int16)
+        max_level = np.empty(count, dtype=np.int16)
+        avg_level = np.empty(count, dtype=np.float64)
+        probability = np.empty(count, dtype=np.float64)
+        evs = np.empty((count, len(EV_COLUMNS)), dtype=np.int16)
+
+        i = 0
+        for z, zone_rows in enumerate(by_zone):
+            for row in zone_rows:
+                name = row['name']
+                p = pokemon_index.get(name)
+                if p is None:
+                    p = pokemon_index[name] = len(pokemon_names)
+                    pokemon_names.append(name)
+                method = row.get('encounter_method') or ''
+                m = method_index.get(method)
+                if m is None:
+                    m = method_index[method] = len(methods)
+                    methods.append(method)
+
+                pokemon_idx[i] = p
+                method_idx[i] = m
+                min_level[i] = row['min_level'] if row.get('min_level') is not None else -1
+                max_level[i] = row['max_level'] if row.get('max_level') is not None else -1
+                avg_level[i] = float(row['avg_level']) if row.get('avg_level') is not None else np.nan
+                probability[i] = float(row['probability_percent']) if row.get('probability_percent') is not None else 0.0
+                evs[i] = [row[col] for col in EV_COLUMNS]
+                i += 1
+            zone_offsets[z + 1] = i
+
+        return cls(zone_codes, pokemon_names, methods, zone_offsets, pokemon_idx, method_idx,
+                   min_level, max_level, avg_level, probability, evs)
+
+    @classmethod
+    def load(cls) -> 'EncounterStore':
+        """
+        Loads every encounter from Postgres in a single query.
+        """
+        return cls.from_rows(get_all_encounters())
+
+    @classmethod
+    async def load_async(cls) -> 'EncounterStore':
+        """
+        Same as load() through the async data layer, without blocking the event loop
+        on the query (building the arrays is quick and stays inline).
+        """
+        return cls.from_rows(await async_database.get_all_encounters())
+
+    def zone_rows(self, zone_code: str, pokemon_level: int) -> np.ndarray:
+        """
+        Row indices of the zone's encounters inside the level band (empty if unknown zone).
+        """
+        z = self.zone_index.get(zone_code)
+        if z is None:
+            return np.empty(0, dtype=np.int64)
+        start, end = self.zone_offsets[z], self.zone_offsets[z + 1]
+        low, high = level_band(pokemon_level)
+        levels = self.avg_level[start:end]
+        return start + np.flatnonzero((levels >= low) & (levels <= high))
+
+    def encounters(self, zone_code: str, pokemon_level: int = 50) -> List[Dict[str, Any]]:
+        """
+        Same rows as async_database.get_zone_encounters (name, ev_*, probability_percent), from memory.
+        """
+        result = []
+        for i in self.zone_rows(zone_code, pokemon_level):
+            row = {"name": self.pokemon_names[self.pokemon_idx[i]]}
+            row.update(zip(EV_COLUMNS, self.evs[i].tolist()))
+            row["probability_percent"] = float(self.probability[i])
+            result.append(row)
+        return result
+
+    def zone_yields(self, pokemon_level: int = 50) -> Dict[str, Dict[str, float]]:
+        """
+        {zone_code: {stat: average yield}} for a level band, served from the precomputed tables.
+        """
+        return self.yield_table.zone_yields(pokemon_level)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "encounters": len(self),
+            "zones": len(self.zone_codes),
+            "pokemon": len(self.pokemon_names),
+            "loaded_at": self.loaded_at
+        }
+
+class YieldTable:
+    """
+    Probability-weighted average EV yield per zone and stat for every level band.
+    Encounters are binned by avg_level (tenths of a level) and accumulated into
+    per-zone prefix sums, so any band is one subtraction; levels 1..MAX_LEVEL are
+    materialized up front. Sums are exact integers (percent * 100 * EV) until the
+    final division, so the result does not depend on row order.
+    Passing the arrays() of an earlier table (e.g. from a binary snapshot) skips the build.
+    """
+    ARRAY_NAMES = ("prefix_sums", "prefix_counts", "by_level", "present_by_level")
+
+    def __init__(self, store: EncounterStore, arrays: Optional[Dict[str, np.ndarray]] = None):
+        self.zone_codes = store.zone_codes
+        num_zones = len(store.zone_codes)
+        # Highest band edge reachable from MAX_LEVEL; higher levels land in the last bin
+        self.num_bins = (MAX_LEVEL + 10) * LEVEL_BINS_PER_LEVEL + 1
+        self._dicts = {}
+        if arrays is not None:
+            for name in self.ARRAY_NAMES:
+                setattr(self, name, arrays[name])
+            return
+
+        known = ~np.isnan(store.avg_level)
+        rows_zone = np.repeat(np.arange(num_zones), np.diff(store.zone_offsets))[known]
+        bins = np.rint(store.avg_level[known] * LEVEL_BINS_PER_LEVEL).astype(np.int64)
+        bins = np.clip(bins, 0, self.num_bins - 1)
+        weight = np.rint(store.probability[known] * 100).astype(np.int64)
+        weighted_evs = store.evs[known].astype(np.int64) * weight[:, None]
+
+        # prefix[z, b] = sum over rows of zone z with bin < b
+        sums = np.zeros((num_zones, self.num_bins + 1, len(EV_COLUMNS)), dtype=np.int64)
+        counts = np.zeros((num_zones, self.num_bins + 1), dtype=np.int64)
+        np.add.at(sums, (rows_zone, bins + 1), weighted_evs)
+        np.add.at(counts, (rows_zone, bins + 1), 1)
+        self.prefix_sums = np.cumsum(sums, axis=1)
+        self.prefix_counts = np.cumsum(counts, axis=1)
+
+        # (level, zones, 6) yields and (level, zones) presence for every supported level
+        levels = range(MAX_LEVEL + 1)
+        self.by_level = np.stack([self._band(level)[0] for level in levels])
+        self.present_by_level = np.stack([self._band(level)[1] for level in levels])
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAY_NAMES}
+
+    def _band(self, pokemon_level: int):
+        low, high = level_band(pokemon_level)
+        lo = min(low * LEVEL_BINS_PER_LEVEL, self.num_bins)
+        hi = min(high * LEVEL_BINS_PER_LEVEL + 1, self.num_bins)
+        totals = self.prefix_sums[:, hi] - self.prefix_sums[:, lo]
+        present = (self.prefix_counts[:, hi] - self.prefix_counts[:, lo]) > 0
+        return totals / 10000.0, present
+
+    def matrix(self, pokemon_level: int):
+        """
+        Returns (zones x 6 yields, present) aligned with zone_codes.
+        """
+        if 0 <= pokemon_level <= MAX_LEVEL:
+            return self.by_level[pokemon_level], self.present_by_level[pokemon_level]
+        return self._band(pokemon_level)
+
+    def zone_yields(self, pokemon_level: int) -> Dict[str, Dict[str, float]]:
+        """
+        {zone_code: {stat: yield}} for zones with encounters in the band. Cached per level;
+        callers must not mutate the result.
+        """
+        result = self._dicts.get(pokemon_level)
+        if result is None:
+            yields, present = self.matrix(pokemon_level)
+            result = {
+                code: dict(zip(STAT_NAMES, yields[z].tolist()))
+                for z, code in enumerate(self.zone_codes) if present[z]
+            }
+            if 0 <= pokemon_level <= MAX_LEVEL:
+                self._dicts[pokemon_level] = result
+        return result
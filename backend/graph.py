@@ -1,20 +1,274 @@
+import heapq
 import json
 import os
-from typing import Dict, List, Tuple, Optional
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from distance_table import ZoneDistanceTable, content_hash_of
+from area_overlay import AreaOverlay, areas_path_for, load_areas_spec
+from progression import ProgressionIndex, load_progression_spec, progression_path_for
+
+INF = float('inf')
+
+class CompiledGraph:
+    """
+    Integer-indexed (CSR) form of the (zone, label) state graph.
+    Zones and labels are interned to ids; the out-edges of state s are
+    targets[offsets[s]:offsets[s+1]] with matching weights. Zone crossings
+    are stored as 0-weight edges alongside intra-zone edges.
+    """
+    def __init__(self, zones: List[str], labels: List[str], state_zone: array, state_label: array,
+                 zone_state_offsets: array, offsets: array, targets: array, weights: array):
+        self.zones = zones
+        self.zone_index = {z: i for i, z in enumerate(zones)}
+        self.labels = labels
+        self.label_index = {l: i for i, l in enumerate(labels)}
+        # State -> zone id / label id
+        self.state_zone = state_zone
+        self.state_label = state_label
+        # States of zone z (its labels in adjacency.json) are [zone_state_offsets[z], zone_state_offsets[z+1])
+        self.zone_state_offsets = zone_state_offsets
+        # (zone id, label id) -> state id
+        self.state_index = {(z, l): s for s, (z, l) in enumerate(zip(state_zone, state_label))}
+        # CSR edges
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @property
+    def num_zones(self) -> int:
+        return len(self.zones)
+
+    @property
+    def num_states(self) -> int:
+        return len(self.state_zone)
+
+    @classmethod
+    def from_adjacency(cls, adjacency_data: Dict) -> 'CompiledGraph':
+        zones = list(adjacency_data.keys())
+        zone_index = {z: i for i, z in enumerate(zones)}
+        labels = []
+        label_index = {}
+        state_ids = {} # (zone_id, label_id) -> state id
+        state_zone = array('i')
+        state_label = array('i')
+
+        def intern_label(label: str) -> int:
+            if label not in label_index:
+                label_index[label] = len(labels)
+                labels.append(label)
+            return label_index[label]
+
+        def intern_state(zone_id: int, label: str) -> int:
+            key = (zone_id, intern_label(label))
+            if key not in state_ids:
+                state_ids[key] = len(state_zone)
+                state_zone.append(zone_id)
+                state_label.append(key[1])
+            return state_ids[key]
+
+        # Labels listed in adjacency.json come first, grouped by zone
+        zone_state_offsets = array('i', [0])
+        for zone in zones:
+            for label in adjacency_data[zone]:
+                intern_state(zone_index[zone], label)
+            zone_state_offsets.append(len(state_zone))
+
+        # Build edges; crossing targets that are not labels of the target zone
+        # become extra states (they still count as reaching that zone)
+        edges = [] # per state list of (target, weight)
+        s = 0
+        while s < len(state_zone):
+            zone_id = state_zone[s]
+            zone = zones[zone_id]
+            label = labels[state_label[s]]
+            out = []
+            for p in adjacency_data[zone].get(label, []):
+                if p['dist'] is not None:
+                    out.append((intern_state(zone_id, p['to']), p['dist']))
+            if label in zone_index:
+                out.append((intern_state(zone_index[label], zone), 0))
+            edges.append(out)
+            s += 1
+
+        offsets = array('i', [0])
+        targets = array('i')
+        weights = array('i')
+        for out in edges:
+            for t, w in out:
+                targets.append(t)
+                weights.append(w)
+            offsets.append(len(targets))
+
+        return cls(zones, labels, state_zone, state_label, zone_state_offsets, offsets, targets, weights)
+
+    def restricted(self, allowed_zones: Sequence[bool], blocked_crossings=()) -> 'CompiledGraph':
+        """
+        Same states (and ids) with every edge into or out of a disallowed zone removed,
+        plus the given (zone id, zone id) crossings in both directions.
+        """
+        blocked = set(blocked_crossings)
+        blocked |= {(b, a) for a, b in blocked}
+        offsets = array('i', [0])
+        targets = array('i')
+        weights = array('i')
+        for s in range(self.num_states):
+            z = self.state_zone[s]
+            if allowed_zones[z]:
+                for e in range(self.offsets[s], self.offsets[s + 1]):
+                    t = self.targets[e]
+                    tz = self.state_zone[t]
+                    if allowed_zones[tz] and (tz == z or (z, tz) not in blocked):
+                        targets.append(t)
+                        weights.append(self.weights[e])
+            offsets.append(len(targets))
+        return CompiledGraph(self.zones, self.labels, self.state_zone, self.state_label,
+                             self.zone_state_offsets, offsets, targets, weights)
+
+    def zone_states(self, zone_id: int) -> range:
+        return range(self.zone_state_offsets[zone_id], self.zone_state_offsets[zone_id + 1])
+
+    def state(self, zone: str, label: str) -> Optional[int]:
+        zone_id = self.zone_index.get(zone)
+        label_id = self.label_index.get(label)
+        if zone_id is None or label_id is None:
+            return None
+        return self.state_index.get((zone_id, label_id))
+
+    def zone_distances_from(self, zone_id: int) -> array:
+        """
+        Dijkstra from every label of zone_id. Returns min distance per zone id (inf if unreachable).
+        """
+        distances = self.zone_distances_from_states(self.zone_states(zone_id))
+        distances[zone_id] = 0
+        return distances
+
+    def zone_distances_from_states(self, sources) -> array:
+        """
+        Multi-source Dijkstra from the given states. Returns min distance per zone id (inf if unreachable).
+        """
+        state_dist = array('d', [INF]) * self.num_states
+        zone_dist = array('d', [INF]) * self.num_zones
+
+        pq = []
+        for s in sources:
+            state_dist[s] = 0
+            pq.append((0, s))
+        heapq.heapify(pq)
+
+        offsets, targets, weights, state_zone = self.offsets, self.targets, self.weights, self.state_zone
+        while pq:
+            d, s = heapq.heappop(pq)
+            if d > state_dist[s]:
+                continue
+            z = state_zone[s]
+            if d < zone_dist[z]:
+                zone_dist[z] = d
+            for e in range(offsets[s], offsets[s + 1]):
+                t = targets[e]
+                nd = d + weights[e]
+                if nd < state_dist[t]:
+                    state_dist[t] = nd
+                    heapq.heappush(pq, (nd, t))
+        return zone_dist
+
+    def shortest_path(self, from_zone: int, to_zone: int, heuristic: Optional[Sequence[float]] = None, sources: Optional[Sequence[int]] = None) -> Tuple[float, List[int], int]:
+        """
+        A* from every label of from_zone (or only the given source states) to the first
+        settled state of to_zone.
+        heuristic[z] must be a lower bound of the distance from any state of zone z to
+        to_zone (e.g. the zone distance table column); it need not be consistent, so
+        states may be re-opened. Returns (distance, state path, states expanded);
+        distance is inf and the path empty when to_zone is unreachable.
+        """
+        if heuristic is None:
+            heuristic = [0.0] * self.num_zones
+        state_dist = {}
+        parent = {}
+        pq = []
+        for s in (sources if sources is not None else self.zone_states(from_zone)):
+            state_dist[s] = 0
+            parent[s] = -1
+            pq.append((heuristic[self.state_zone[s]], 0, s))
+        heapq.heapify(pq)
+
+        offsets, targets, weights, state_zone = self.offsets, self.targets, self.weights, self.state_zone
+        expanded = 0
+        while pq:
+            f, d, s = heapq.heappop(pq)
+            if d > state_dist.get(s, INF):
+                continue
+            expanded += 1
+            if state_zone[s] == to_zone:
+                path = []
+                while s != -1:
+                    path.append(s)
+                    s = parent[s]
+                path.reverse()
+                return d, path, expanded
+            for e in range(offsets[s], offsets[s + 1]):
+                t = targets[e]
+                nd = d + weights[e]
+                if nd < state_dist.get(t, INF):
+                    h = heuristic[state_zone[t]]
+                    if h == INF:
+                        continue
+                    state_dist[t] = nd
+                    parent[t] = s
+                    heapq.heappush(pq, (nd + h, nd, t))
+        return INF, [], expanded
 
 class PokemonGraph:
     def __init__(self, adjacency_file: str):
+        # SHA-256 of adjacency.json, used to key derived caches
+        self.content_hash = None
         self.adjacency_data = self._load_adjacency(adjacency_file)
         # Cache for inter-zone connections: (Zone, Label) -> TargetZone
         self.inter_zone_connections = self._build_inter_zone_connections()
+        # Integer-indexed form used by every path query
+        self.compiled = CompiledGraph.from_adjacency(self.adjacency_data)
+        # All-pairs zone distances, computed once (or loaded from disk) per graph version
+        self.distance_table = ZoneDistanceTable.load_or_build(self, adjacency_file)
+        # Area-level overlay (areas.json next to adjacency.json, or automatic grouping)
+        self.areas_spec = load_areas_spec(areas_path_for(adjacency_file))
+        self.areas = AreaOverlay.build(self.compiled, self.areas_spec)
+        # Progression profiles (progression.json next to adjacency.json), each with its own distance table
+        self.progression_spec = load_progression_spec(progression_path_for(adjacency_file))
+        self.progression = ProgressionIndex(self.compiled, self.progression_spec)
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'PokemonGraph':
+        """
+        Graph stored in a binary snapshot (binary_snapshot.py): the CSR arrays are
+        copied (they are tiny), distance tables are zero-copy views of the mapped file
+        and no shortest path is recomputed.
+        """
+        meta = snapshot.meta["graph"]
+        graph = cls.__new__(cls)
+        graph.content_hash = meta["content_hash"]
+        graph.adjacency_data = meta["adjacency"]
+        graph.inter_zone_connections = graph._build_inter_zone_connections()
+        graph.compiled = CompiledGraph(meta["zones"], meta["labels"], *(
+            array('i', snapshot.array(f"graph_{name}").tobytes())
+            for name in ("state_zone", "state_label", "zone_state_offsets", "offsets", "targets", "weights")
+        ))
+        graph.distance_table = ZoneDistanceTable(meta["distance_zones"], snapshot.array("distances").ravel(), graph.content_hash)
+        graph.areas_spec = meta["areas_spec"]
+        graph.areas = AreaOverlay.build(graph.compiled, graph.areas_spec)
+        graph.progression_spec = meta["progression_spec"]
+        tables = {name: ZoneDistanceTable(meta["zones"], snapshot.array(f"distances_{name}").ravel())
+                  for name in meta["progression_profiles"]}
+        graph.progression = ProgressionIndex(graph.compiled, graph.progression_spec, tables)
+        return graph
 
     def _load_adjacency(self, path: str) -> Dict:
         if not os.path.exists(path):
             # Fallback or error
             print(f"Warning: Adjacency file not found at {path}")
             return {}
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(path, 'rb') as f:
+            raw = f.read()
+        self.content_hash = content_hash_of(raw)
+        return json.loads(raw.decode('utf-8'))
 
     def _build_inter_zone_connections(self) -> Dict[Tuple[str, str], str]:
         """
@@ -74,3 +328,75 @@ class PokemonGraph:
             # For now, assume symmetry: Label A in Z1 -> Z2 implies Label Z1 in Z2 exists.
             return target_zone
         return None
+
+    def route(self, from_zone: str, to_zone: str, start_label: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Shortest route between two zones as the ordered (zone, label) states crossed,
+        using A* guided by the zone distance table. With start_label the route starts
+        at that label of from_zone instead of any of them. None if a zone/label is
+        unknown or no route exists.
+        """
+        compiled = self.compiled
+        from_id = compiled.zone_index.get(from_zone)
+        to_id = compiled.zone_index.get(to_zone)
+        if from_id is None or to_id is None:
+            return None
+        sources = None
+        if start_label is not None:
+            start_state = compiled.state(from_zone, start_label)
+            if start_state is None:
+                return None
+            sources = [start_state]
+
+        table = self.distance_table
+        heuristic = table.matrix[:, table.index[to_zone]].tolist()
+        distance, states, expanded = compiled.shortest_path(from_id, to_id, heuristic, sources)
+        if not states:
+            return None
+
+        steps = []
+        previous = None
+        for s in states:
+            zone = compiled.zones[compiled.state_zone[s]]
+            label = compiled.labels[compiled.state_label[s]]
+            segment = 0
+            if previous is not None:
+                for e in range(compiled.offsets[previous], compiled.offsets[previous + 1]):
+                    if compiled.targets[e] == s:
+                        segment = compiled.weights[e]
+                        break
+            cumulative = (steps[-1]["cumulative"] if steps else 0) + segment
+            steps.append({"zone": zone, "label": label, "distance": segment, "cumulative": cumulative})
+            previous = s
+
+        zones = []
+        for step in steps:
+            if not zones or zones[-1] != step["zone"]:
+                zones.append(step["zone"])
+        return {
+            "from": from_zone,
+            "to": to_zone,
+            "distance": int(distance),
+            "zones": zones,
+            "steps": steps,
+            "expanded_states": expanded
+        }
+
+    def area_distance(self, from_zone: str, to_zone: str) -> Optional[Dict[str, Any]]:
+        """
+        Zone-to-zone distance answered through the area overlay. None if a zone is unknown.
+        """
+        compiled = self.compiled
+        from_id = compiled.zone_index.get(from_zone)
+        to_id = compiled.zone_index.get(to_zone)
+        if from_id is None or to_id is None:
+            return None
+        distance, expanded = self.areas.distance(from_id, to_id)
+        return {
+            "from": from_zone,
+            "to": to_zone,
+            "distance": int(distance) if distance != INF else None,
+            "from_area": self.areas.area_names[self.areas.zone_area[from_id]],
+            "to_area": self.areas.area_names[self.areas.zone_area[to_id]],
+            "expanded_states": expanded
+        }
@@ -1,13 +1,26 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from database import get_all_pokemon, get_all_zones
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, List, Union
+from data_backend import create_backend
 from graph import PokemonGraph
-from optimizer import EVOptimizer
+from optimizer import EVOptimizer, STATS
+from plan_cache import PlanCache
+from zone_aliases import ZoneAliasIndex
+from simulator import DEFAULT_TRIALS, MAX_TRIALS
+from sessions import SessionStore, TrainingSession
+from tile_fields import TileDistanceFields
+from sweep import expand_range
+from prerendered import PrerenderedCache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
 import logging
 import os
+import time
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -24,8 +37,101 @@ if not os.path.exists(ADJ_PATH):
     else:
         logger.warning("adjacency.json no encontrado. La optimización no funcionará correctamente hasta que se copie el archivo.")
 
-graph = PokemonGraph(ADJ_PATH)
-optimizer = EVOptimizer(graph)
+# Nombres en español (name_mapping.json) para el índice de alias de zonas
+NAME_MAPPING_PATH = "name_mapping.json"
+if not os.path.exists(NAME_MAPPING_PATH):
+    NAME_MAPPING_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "data_sources", "name_mapping.json")
+
+# Origen de los datos: 'postgres' (por defecto), 'snapshot' (en memoria desde db/data_sources, sin BD)
+# o 'binary' (grafo, alias y encuentros desde el snapshot binario de binary_snapshot.py, mapeado en memoria)
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'postgres')
+DATA_SOURCES_DIR = os.getenv('DATA_SOURCES_DIR', "data_sources")
+if not os.path.exists(DATA_SOURCES_DIR):
+    DATA_SOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "data_sources")
+SNAPSHOT_FILE = os.getenv('SNAPSHOT_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.snapshot"))
+
+# Campos de distancia por tile (generados por map/build_distance_fields.py)
+DISTANCE_FIELDS_DIR = os.getenv('DISTANCE_FIELDS_DIR', "distance_fields")
+if not os.path.exists(DISTANCE_FIELDS_DIR):
+    DISTANCE_FIELDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "distance_fields")
+
+def load_tile_fields() -> Optional[TileDistanceFields]:
+    """
+    Carga el índice de campos de distancia; cada zona se mapea en memoria al usarla.
+    """
+    fields = TileDistanceFields.load(DISTANCE_FIELDS_DIR)
+    if fields is None:
+        logger.warning(f"Campos de distancia no encontrados en {DISTANCE_FIELDS_DIR}. /api/tiles/route no estará disponible.")
+    return fields
+
+def load_graph() -> PokemonGraph:
+    """
+    Grafo desde el snapshot binario (backend 'binary') o desde adjacency.json.
+    """
+    if data.name == "binary":
+        return PokemonGraph.from_snapshot(data.snapshot)
+    return PokemonGraph(ADJ_PATH)
+
+def build_zone_aliases(graph: PokemonGraph, db_zones: Optional[List[Dict]] = None) -> ZoneAliasIndex:
+    """
+    Construye el índice de alias (grafo, zones.code/name de la BD, nombres en español).
+    Sin db_zones (BD no disponible) se construye sólo con el grafo y name_mapping.json.
+    Con el backend 'binary' el índice ya viene compilado en el snapshot.
+    """
+    if data.name == "binary":
+        return data.snapshot.zone_aliases()
+    return ZoneAliasIndex.build(graph.distance_table.zones, NAME_MAPPING_PATH, db_zones)
+
+async def load_reference_data():
+    """
+    Carga en paralelo (backend de datos) las zonas de la BD para el índice de alias y todos
+    los encuentros para el EncounterStore. Devuelve (db_zones, store); cada uno es None
+    si falló, y el optimizador reintentará los encuentros en la primera optimización.
+    """
+    db_zones, store = await asyncio.gather(
+        data.get_all_zones(), data.load_encounter_store(), return_exceptions=True
+    )
+    if isinstance(db_zones, Exception):
+        logger.warning(f"No se pudieron cargar las zonas de la BD para el índice de alias: {db_zones}")
+        db_zones = None
+    if isinstance(store, Exception):
+        logger.warning(f"No se pudieron cargar los encuentros en memoria: {store}")
+        store = None
+    else:
+        logger.info(f"EncounterStore cargado: {len(store)} encuentros en {len(store.zone_codes)} zonas")
+    return db_zones, store
+
+# Los datos de la BD se cargan en el evento de arranque (sin bloquear el event loop)
+data = create_backend(DATA_BACKEND, DATA_SOURCES_DIR, SNAPSHOT_FILE)
+logger.info(f"Backend de datos: {data.name}")
+graph = load_graph()
+zone_aliases = build_zone_aliases(graph)
+plan_cache = PlanCache(
+    max_entries=int(os.getenv('PLAN_CACHE_SIZE', 512)),
+    ttl_seconds=float(os.getenv('PLAN_CACHE_TTL', 600))
+)
+optimizer = EVOptimizer(graph, plan_cache=plan_cache, aliases=zone_aliases)
+tile_fields = load_tile_fields()
+
+# Respuestas del catálogo (/api/pokemon, /api/zones, /api/graph) serializadas y comprimidas una vez.
+# data_version se incrementa al cargar/recargar los datos y las invalida.
+prerendered = PrerenderedCache()
+data_version = 0
+
+# Pool de workers para optimizaciones en lote
+OPTIMIZER_WORKERS = int(os.getenv('OPTIMIZER_WORKERS', 4))
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 50))
+# Máximo de escenarios (combinaciones) por barrido
+MAX_SWEEP_SCENARIOS = int(os.getenv('MAX_SWEEP_SCENARIOS', 5000))
+# Tope de time_budget_ms (estrategia "exact"): cada ms retiene un worker del pool
+MAX_TIME_BUDGET_MS = int(os.getenv('MAX_TIME_BUDGET_MS', 2000))
+optimizer_pool = ThreadPoolExecutor(max_workers=OPTIMIZER_WORKERS, thread_name_prefix="optimizer")
+
+# Sesiones de entrenamiento en vivo (memoria acotada, expiran por inactividad)
+sessions = SessionStore(
+    max_sessions=int(os.getenv('SESSION_MAX', 1000)),
+    idle_ttl_seconds=float(os.getenv('SESSION_IDLE_TTL', 1800))
+)
 
 app = FastAPI(
     title="Pokemon EV Training API",
@@ -42,6 +148,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def load_data_on_startup():
+    global zone_aliases, data_version
+    db_zones, store = await load_reference_data()
+    if db_zones is not None:
+        zone_aliases = build_zone_aliases(graph, db_zones)
+    optimizer.reload(aliases=zone_aliases, encounter_store=store)
+    data_version += 1
+
+@app.on_event("shutdown")
+async def close_database_pools():
+    await data.close()
+
+async def ensure_encounter_store():
+    """
+    Carga los encuentros desde el backend de datos si aún no están en memoria
+    (p.ej. la BD no estaba lista al arrancar), para no hacerlo en un worker.
+    """
+    if optimizer.encounter_store is None:
+        optimizer.reload(encounter_store=await data.load_encounter_store())
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     logger.error(f"Validation error: {exc}")
@@ -59,99 +186,250 @@ def read_root():
         "endpoints": {
             "pokemon": "/api/pokemon",
             "zones": "/api/zones",
+            "optimize": "/api/optimize",
+            "optimize_batch": "/api/optimize/batch",
+            "optimize_sweep": "/api/optimize/sweep",
+            "optimize_stream": "/api/optimize/stream",
+            "sessions": "/api/sessions",
+            "route": "/api/route?from=&to=",
+            "areas": "/api/areas",
+            "tile_route": "/api/tiles/route?zone=&row=&col=&to=",
+            "progression": "/api/progression",
             "docs": "/docs"
         }
     }
 
+async def build_pokemon_payload():
+    logger.info("Consultando lista de Pokémon...")
+    pokemon_list = await data.get_all_pokemon()
+    
+    # Formatear respuesta
+    formatted_pokemon = [
+        {
+            "id": p["id"],
+            "pokedex_number": p["pokedex_number"],
+            "name": p["name"],
+            "type1": p["type1"],
+            "type2": p["type2"],
+            "evs": {
+                "hp": p["ev_hp"],
+                "attack": p["ev_attack"],
+                "defense": p["ev_defense"],
+                "sp_attack": p["ev_sp_attack"],
+                "sp_defense": p["ev_sp_defense"],
+                "speed": p["ev_speed"]
+            }
+        }
+        for p in pokemon_list
+    ]
+    
+    logger.info(f"Se encontraron {len(formatted_pokemon)} Pokémon")
+    return {
+        "count": len(formatted_pokemon),
+        "pokemon": formatted_pokemon
+    }
+
+async def build_zones_payload():
+    logger.info("Consultando lista de zonas...")
+    zones_list = await data.get_all_zones()
+
+    # Formatear respuesta
+    formatted_zones = [
+        {
+            "id": z["id"],
+            "code": z["code"],
+            "name": z["name"],
+            "region": z["region"],
+            "zone_type": z["zone_type"],
+            "graph_zone": zone_aliases.resolve(z["code"]) or zone_aliases.resolve(z["name"])
+        }
+        for z in zones_list
+    ]
+
+    logger.info(f"Se encontraron {len(formatted_zones)} zonas")
+    return {
+        "count": len(formatted_zones),
+        "zones": formatted_zones
+    }
+
+async def build_graph_payload():
+    logger.info("Obteniendo datos del grafo para visualización...")
+    # graph.adjacency_data es el dict cargado desde adjacency.json
+    return graph.adjacency_data
+
 @app.get("/api/pokemon")
-def get_pokemon():
+async def get_pokemon(request: Request):
     """
     Obtiene la lista de todos los Pokémon disponibles en la base de datos.
     Retorna nombre, tipos y EVs que otorgan.
+    Respuesta pre-renderizada con ETag: If-None-Match -> 304.
     """
     try:
-        logger.info("Consultando lista de Pokémon...")
-        pokemon_list = get_all_pokemon()
-        
-        # Formatear respuesta
-        formatted_pokemon = [
-            {
-                "id": p["id"],
-                "pokedex_number": p["pokedex_number"],
-                "name": p["name"],
-                "type1": p["type1"],
-                "type2": p["type2"],
-                "evs": {
-                    "hp": p["ev_hp"],
-                    "attack": p["ev_attack"],
-                    "defense": p["ev_defense"],
-                    "sp_attack": p["ev_sp_attack"],
-                    "sp_defense": p["ev_sp_defense"],
-                    "speed": p["ev_speed"]
-                }
-            }
-            for p in pokemon_list
-        ]
-        
-        logger.info(f"Se encontraron {len(formatted_pokemon)} Pokémon")
-        return {
-            "count": len(formatted_pokemon),
-            "pokemon": formatted_pokemon
-        }
+        return await prerendered.respond(request, "pokemon", data_version, build_pokemon_payload)
     except Exception as e:
         logger.error(f"Error obteniendo Pokémon: {e}")
         raise HTTPException(status_code=500, detail=f"Error al consultar Pokémon: {str(e)}")
 
 @app.get("/api/zones")
-def get_zones():
+async def get_zones(request: Request):
     """
     Obtiene la lista de todas las zonas disponibles en el mapa de Kanto.
+    Respuesta pre-renderizada con ETag: If-None-Match -> 304.
     """
     try:
-        logger.info("Consultando lista de zonas...")
-        zones_list = get_all_zones()
-        
-        # Formatear respuesta
-        formatted_zones = [
-            {
-                "id": z["id"],
-                "code": z["code"],
-                "name": z["name"],
-                "region": z["region"],
-                "zone_type": z["zone_type"]
-            }
-            for z in zones_list
-        ]
-        
-        logger.info(f"Se encontraron {len(formatted_zones)} zonas")
-        return {
-            "count": len(formatted_zones),
-            "zones": formatted_zones
-        }
+        return await prerendered.respond(request, "zones", data_version, build_zones_payload)
     except Exception as e:
         logger.error(f"Error obteniendo zonas: {e}")
         raise HTTPException(status_code=500, detail=f"Error al consultar zonas: {str(e)}")
 
+@app.get("/api/zones/encounters")
+async def get_zones_encounters(zones: str, pokemon_level: int = 50):
+    """
+    Encuentros (en la banda de nivel) de varias zonas separadas por comas.
+    Las consultas de cada zona se ejecutan concurrentemente.
+    """
+    requested = [z.strip() for z in zones.split(",") if z.strip()]
+    codes = {}
+    for zone in requested:
+        graph_zone = zone_aliases.resolve(zone)
+        codes[zone] = zone_aliases.db_code(graph_zone) if graph_zone is not None else zone
+    try:
+        encounters = await data.get_encounters_for_zones(codes.values(), pokemon_level)
+    except Exception as e:
+        logger.error(f"Error obteniendo encuentros: {e}")
+        raise HTTPException(status_code=500, detail=f"Error al consultar encuentros: {str(e)}")
+    return {
+        "pokemon_level": pokemon_level,
+        "zones": {zone: {"code": code, "encounters": encounters[code]} for zone, code in codes.items()}
+    }
+
 @app.get("/api/graph")
-def get_graph_data():
+async def get_graph_data(request: Request):
     """
     Retorna la estructura completa del grafo (nodos y aristas) para visualización.
+    Respuesta pre-renderizada con ETag: If-None-Match -> 304.
     """
     try:
-        logger.info("Obteniendo datos del grafo para visualización...")
-        # graph.adjacency_data es el dict cargado desde adjacency.json
-        return graph.adjacency_data
+        return await prerendered.respond(request, "graph", data_version, build_graph_payload)
     except Exception as e:
         logger.error(f"Error obteniendo grafo: {e}")
         raise HTTPException(status_code=500, detail=f"Error al obtener grafo: {str(e)}")
 
+@app.get("/api/route")
+def get_route(from_zone: str = Query(..., alias="from"), to_zone: str = Query(..., alias="to")):
+    """
+    Ruta más corta entre dos zonas (A* sobre el grafo de estados (zona, etiqueta)).
+    Devuelve las zonas y etiquetas de salida cruzadas con sus distancias en tiles.
+    """
+    start = zone_aliases.resolve(from_zone)
+    end = zone_aliases.resolve(to_zone)
+    if start is None or end is None:
+        unknown = from_zone if start is None else to_zone
+        raise HTTPException(status_code=400, detail=f"Unknown zone '{unknown}'")
+    route = graph.route(start, end)
+    if route is None:
+        raise HTTPException(status_code=404, detail=f"No route from {start} to {end}")
+    return route
+
+@app.get("/api/tiles/route")
+def get_tile_route(zone: str, row: int, col: int, to_zone: str = Query(..., alias="to"), path: bool = True):
+    """
+    Ruta exacta desde un tile (fila, columna) de una zona hasta otra zona.
+    Usa los campos de distancia precalculados: no se busca en la cuadrícula al responder.
+    """
+    if tile_fields is None:
+        raise HTTPException(status_code=503, detail="Tile distance fields are not available")
+    start = zone_aliases.resolve(zone)
+    end = zone_aliases.resolve(to_zone)
+    if start is None or end is None:
+        unknown = zone if start is None else to_zone
+        raise HTTPException(status_code=400, detail=f"Unknown zone '{unknown}'")
+    try:
+        route = tile_fields.route(graph, start, row, col, end, include_path=path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if route is None:
+        raise HTTPException(status_code=404, detail=f"No route from {start} ({row}, {col}) to {end}")
+    return route
+
+@app.get("/api/progression")
+def get_progression(from_zone: Optional[str] = Query(None, alias="from")):
+    """
+    Perfiles de progresión (zonas y cruces bloqueados, máscara de zonas) y el orden
+    de zonas de la máscara. Con from, incluye las zonas alcanzables en cada perfil.
+    """
+    description = graph.progression.describe()
+    if from_zone is not None:
+        start = zone_aliases.resolve(from_zone)
+        if start is None:
+            raise HTTPException(status_code=400, detail=f"Unknown zone '{from_zone}'")
+        for entry in description["profiles"]:
+            entry["reachable_zones"] = graph.progression.get(entry["name"]).reachable_from(start)
+    return description
+
+@app.get("/api/areas")
+def get_areas():
+    """Áreas de la capa jerárquica (zonas y estados frontera de cada una)"""
+    areas = graph.areas.describe()
+    return {"count": len(areas), "areas": areas}
+
+@app.get("/api/areas/distance")
+def get_area_distance(from_zone: str = Query(..., alias="from"), to_zone: str = Query(..., alias="to")):
+    """
+    Distancia entre dos zonas calculada sobre la capa de áreas: sólo se expanden
+    las áreas de origen y destino y las fronteras de las áreas intermedias.
+    """
+    start = zone_aliases.resolve(from_zone)
+    end = zone_aliases.resolve(to_zone)
+    if start is None or end is None:
+        unknown = from_zone if start is None else to_zone
+        raise HTTPException(status_code=400, detail=f"Unknown zone '{unknown}'")
+    return graph.area_distance(start, end)
+
+@app.post("/api/reload")
+async def reload_data():
+    """
+    Recarga el grafo desde adjacency.json e invalida las cachés derivadas.
+    Llamar después de ejecutar los loaders de db/init.
+    """
+    global graph, zone_aliases, tile_fields, data_version
+    try:
+        logger.info("Recargando grafo y datos de encuentros...")
+        loop = asyncio.get_running_loop()
+        await data.reload()
+        # El grafo (CPU) se construye en el pool de workers mientras se consultan zonas y encuentros
+        graph, db_zones, encounter_store = await asyncio.gather(
+            loop.run_in_executor(optimizer_pool, load_graph),
+            data.get_all_zones(),
+            data.load_encounter_store()
+        )
+        zone_aliases = build_zone_aliases(graph, db_zones)
+        # Las distancias cacheadas por estado dependen del grafo
+        tile_fields = load_tile_fields()
+        optimizer.reload(graph, zone_aliases, encounter_store)
+        data_version += 1
+        return {"status": "reloaded", "graph_hash": graph.content_hash, "encounters": len(encounter_store)}
+    except Exception as e:
+        logger.error(f"Error recargando datos: {e}")
+        raise HTTPException(status_code=500, detail=f"Error al recargar datos: {str(e)}")
+
+@app.get("/api/metrics")
+def get_metrics():
+    """Métricas internas (caché de planes, encuentros en memoria, sesiones, backend de datos)"""
+    return {
+        "plan_cache": optimizer.plan_cache.stats(),
+        "data_backend": data.stats(),
+        "sessions": sessions.stats(),
+        "encounter_store": optimizer.encounter_store.stats() if optimizer.encounter_store is not None else None,
+        "tile_fields": tile_fields.stats() if tile_fields is not None else None,
+        "prerendered": dict(prerendered.stats(), data_version=data_version)
+    }
+
 @app.get("/health")
 def health_check():
     """Endpoint para verificar que el servicio está activo"""
     return {"status": "healthy"}
 
-from typing import Dict, Optional, List
-
 class OptimizationRequest(BaseModel):
     pokemon_name: str
     pokemon_level: int = 50
@@ -162,6 +440,121 @@ class OptimizationRequest(BaseModel):
     held_item: Optional[str] = None
     has_pokerus: bool = False
     lambda_penalty: float = 0.1
+    # "greedy" (default) or "exact" (branch-and-bound within time_budget_ms)
+    strategy: str = "greedy"
+    time_budget_ms: Optional[int] = Field(None, ge=1, le=MAX_TIME_BUDGET_MS)
+    # Simulación Monte Carlo opcional del plan (campo "simulation" en la respuesta)
+    simulate: bool = False
+    simulation_trials: int = DEFAULT_TRIALS
+    simulation_seed: Optional[int] = None
+    battle_budget: Optional[int] = None
+    # Perfil de progresión (ver /api/progression) o máscara de zonas ("0x..." sobre el orden de zonas del grafo).
+    # Ambos limitan viaje y farmeo al subgrafo alcanzable; accessible_zones sólo filtra el farmeo.
+    progression_profile: Optional[str] = None
+    zone_mask: Optional[str] = None
+
+def _validate_target_evs(request: OptimizationRequest):
+    """Valida los límites de EVs (510 total, 252 por estadística)"""
+    total_target = sum(request.target_evs.values())
+    if total_target > 510:
+        raise HTTPException(status_code=400, detail=f"Total target EVs cannot exceed 510 (got {total_target})")
+        
+    for stat, val in request.target_evs.items():
+        if val > 252:
+            raise HTTPException(status_code=400, detail=f"{stat} EVs cannot exceed 252 (got {val})")
+
+    if request.simulate and not 1 <= request.simulation_trials <= MAX_TRIALS:
+        raise HTTPException(status_code=400, detail=f"simulation_trials must be between 1 and {MAX_TRIALS} (got {request.simulation_trials})")
+
+def _default_current_evs(request: OptimizationRequest) -> Dict[str, int]:
+    # Use request.current_evs directly, defaulting to 0 if empty
+    return request.current_evs or {
+        "HP": 0, "Attack": 0, "Defense": 0, 
+        "Special Attack": 0, "Special Defense": 0, "Speed": 0
+    }
+
+def _resolve_profile(progression_profile: Optional[str], zone_mask: Optional[str]):
+    """Perfil de progresión de una solicitud (None si no pidió ninguno)"""
+    if progression_profile is not None and zone_mask is not None:
+        raise ValueError("Use either progression_profile or zone_mask, not both")
+    if progression_profile is not None:
+        profile = graph.progression.get(progression_profile)
+        if profile is None:
+            raise ValueError(f"Unknown progression profile '{progression_profile}'")
+        return profile
+    if zone_mask is not None:
+        try:
+            mask = int(zone_mask, 0)
+        except ValueError:
+            raise ValueError(f"Invalid zone_mask '{zone_mask}' (expected an integer such as 0x1f)")
+        return graph.progression.for_mask(mask)
+    return None
+
+def _plan_arguments(request: OptimizationRequest, all_yields: Optional[Dict] = None) -> Dict:
+    """Argumentos de optimizer.plan / optimizer.iter_plan para una solicitud"""
+    return dict(
+        start_zone=request.start_zone,
+        current_evs=_default_current_evs(request),
+        target_evs=request.target_evs,
+        accessible_zones=request.accessible_zones,
+        held_item=request.held_item,
+        has_pokerus=request.has_pokerus,
+        lambda_penalty=request.lambda_penalty,
+        pokemon_level=request.pokemon_level,
+        strategy=request.strategy,
+        time_budget_ms=request.time_budget_ms,
+        all_yields=all_yields,
+        profile=_resolve_profile(request.progression_profile, request.zone_mask)
+    )
+
+def _finish_optimization(request: OptimizationRequest, result: Dict) -> Dict:
+    """Agrega la simulación (si se pidió) y los metadatos para el frontend"""
+    if request.simulate:
+        result['simulation'] = optimizer.simulate(
+            result,
+            current_evs=_default_current_evs(request),
+            target_evs=request.target_evs,
+            held_item=request.held_item,
+            has_pokerus=request.has_pokerus,
+            pokemon_level=request.pokemon_level,
+            trials=request.simulation_trials,
+            seed=request.simulation_seed,
+            battle_budget=request.battle_budget
+        )
+    return _format_optimization_result(request, result)
+
+def _run_optimization(request: OptimizationRequest, all_yields: Optional[Dict] = None) -> Dict:
+    """Ejecuta el optimizador (síncrono) y agrega los metadatos para el frontend"""
+    _validate_target_evs(request)
+    result = optimizer.plan(**_plan_arguments(request, all_yields))
+    return _finish_optimization(request, result)
+
+def _format_optimization_result(request: OptimizationRequest, result: Dict) -> Dict:
+    # Add metadata to result for frontend display
+    if result:
+        result['pokemon_name'] = request.pokemon_name
+        result['target_evs'] = request.target_evs
+        result['total_battles'] = result['total_encounters']
+        # Generate a description
+        result['optimal_route_description'] = f"Start at {request.start_zone}. Travel {result['total_distance']} tiles. Defeat {result['total_encounters']} Pokemon."
+        result['reasoning'] = result.get('decision_log', [])
+        
+        # Transform path for frontend if needed
+        # Frontend expects: ev_path: [{pokemon, ev_yield, count}]
+        # Backend returns: path: [{type, zone, target_pokemon, count, ...}]
+        
+        frontend_path = []
+        for step in result['path']:
+            if step['type'] == 'farm':
+                frontend_path.append({
+                    "pokemon": step['target_pokemon'],
+                    "ev_yield": f"{step['stat_focus']}", 
+                    "count": step['count'],
+                    "zone": step['zone']
+                })
+        result['ev_path'] = frontend_path
+
+    return result
 
 @app.post("/api/optimize")
 async def optimize_ev_training(request: OptimizationRequest):
@@ -170,58 +563,10 @@ async def optimize_ev_training(request: OptimizationRequest):
     """
     try:
         logger.info(f"Optimizando desde {request.start_zone} para {request.target_evs}")
-        
-        # Validate EV limits
-        total_target = sum(request.target_evs.values())
-        if total_target > 510:
-            raise HTTPException(status_code=400, detail=f"Total target EVs cannot exceed 510 (got {total_target})")
-            
-        for stat, val in request.target_evs.items():
-            if val > 252:
-                raise HTTPException(status_code=400, detail=f"{stat} EVs cannot exceed 252 (got {val})")
-
-        # Use request.current_evs directly, defaulting to 0 if empty
-        current_evs_dict = request.current_evs or {
-            "HP": 0, "Attack": 0, "Defense": 0, 
-            "Special Attack": 0, "Special Defense": 0, "Speed": 0
-        }
-        
-        result = await optimizer.find_optimal_path(
-            start_zone=request.start_zone,
-            current_evs=current_evs_dict,
-            target_evs=request.target_evs,
-            accessible_zones=request.accessible_zones,
-            held_item=request.held_item,
-            has_pokerus=request.has_pokerus,
-            lambda_penalty=request.lambda_penalty,
-            pokemon_level=request.pokemon_level
-        )
-        
-        # Add metadata to result for frontend display
-        if result:
-            result['pokemon_name'] = request.pokemon_name
-            result['target_evs'] = request.target_evs
-            result['total_battles'] = result['total_encounters']
-            # Generate a description
-            result['optimal_route_description'] = f"Start at {request.start_zone}. Travel {result['total_distance']} tiles. Defeat {result['total_encounters']} Pokemon."
-            result['reasoning'] = result.get('decision_log', [])
-            
-            # Transform path for frontend if needed
-            # Frontend expects: ev_path: [{pokemon, ev_yield, count}]
-            # Backend returns: path: [{type, zone, target_pokemon, count, ...}]
-            
-            frontend_path = []
-            for step in result['path']:
-                if step['type'] == 'farm':
-                    frontend_path.append({
-                        "pokemon": step['target_pokemon'],
-                        "ev_yield": f"{step['stat_focus']}", 
-                        "count": step['count'],
-                        "zone": step['zone']
-                    })
-            result['ev_path'] = frontend_path
-
-        return result
+        await ensure_encounter_store()
+        # La búsqueda es CPU: se ejecuta en el pool de workers y el event loop sigue atendiendo otras solicitudes
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(optimizer_pool, _run_optimization, request)
     except ValueError as ve:
         logger.warning(f"Validation error: {ve}")
         raise HTTPException(status_code=400, detail=str(ve))
@@ -230,3 +575,266 @@ async def optimize_ev_training(request: OptimizationRequest):
     except Exception as e:
         logger.error(f"Error en optimización: {e}")
         raise HTTPException(status_code=500, detail=f"Error calculando optimización: {str(e)}")
+
+class BatchOptimizationRequest(BaseModel):
+    requests: List[OptimizationRequest]
+
+def _sse_event(event: str, data) -> str:
+    """Formatea un evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/api/optimize/stream")
+def optimize_ev_training_stream(request: OptimizationRequest):
+    """
+    Igual que /api/optimize pero emite el progreso como Server-Sent Events:
+    'log' por cada entrada del decision_log, 'step' por cada paso travel/farm,
+    y al final 'result' con el mismo cuerpo que /api/optimize (o 'error').
+    Con strategy="exact" primero llega el plan greedy; la búsqueda emite 'progress'
+    (nodos, ms, mejor costo) y, si su plan es mejor, 'replace' seguido de sus pasos.
+    """
+    _validate_target_evs(request)
+    logger.info(f"Optimizando (stream) para {request.pokemon_name}")
+
+    def events():
+        try:
+            for event, payload in optimizer.iter_plan(**_plan_arguments(request)):
+                if event == "result":
+                    yield _sse_event("result", _finish_optimization(request, payload))
+                elif event == "log":
+                    yield _sse_event("log", {"message": payload})
+                else:
+                    yield _sse_event(event, payload)
+        except ValueError as ve:
+            yield _sse_event("error", {"status_code": 400, "error": str(ve)})
+        except Exception as e:
+            logger.error(f"Error en optimización (stream): {e}")
+            yield _sse_event("error", {"status_code": 500, "error": f"Error calculando optimización: {str(e)}"})
+
+    # El generador es síncrono: Starlette lo itera en el threadpool sin bloquear el event loop
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/optimize/batch")
+async def optimize_ev_training_batch(batch: BatchOptimizationRequest):
+    """
+    Calcula varias rutas en una sola llamada.
+    Los yields se obtienen una vez por nivel (tablas precalculadas) y las optimizaciones se reparten en el pool de workers.
+    Cada resultado mantiene el orden de entrada; un error en un ítem no falla el lote.
+    """
+    if len(batch.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch cannot exceed {MAX_BATCH_SIZE} requests (got {len(batch.requests)})")
+
+    logger.info(f"Optimizando lote de {len(batch.requests)} solicitudes")
+    loop = asyncio.get_running_loop()
+    try:
+        await ensure_encounter_store()
+    except Exception as e:
+        # Cada nivel reportará el error al cargar sus yields
+        logger.warning(f"No se pudieron cargar los encuentros en memoria: {e}")
+
+    # Cargar yields compartidos, una vez por nivel
+    levels = sorted({r.pokemon_level for r in batch.requests})
+    yields_by_level = {}
+    level_errors = {}
+    loaded = await asyncio.gather(
+        *(loop.run_in_executor(optimizer_pool, optimizer.zone_yields, level) for level in levels),
+        return_exceptions=True
+    )
+    for level, yields in zip(levels, loaded):
+        if isinstance(yields, Exception):
+            logger.error(f"Error cargando yields para nivel {level}: {yields}")
+            level_errors[level] = yields
+        else:
+            yields_by_level[level] = yields
+
+    async def run_item(index: int, request: OptimizationRequest) -> Dict:
+        try:
+            if request.pokemon_level in level_errors:
+                raise level_errors[request.pokemon_level]
+            result = await loop.run_in_executor(
+                optimizer_pool,
+                functools.partial(_run_optimization, request, yields_by_level[request.pokemon_level])
+            )
+            return {"index": index, "status": "ok", "result": result}
+        except HTTPException as he:
+            return {"index": index, "status": "error", "status_code": he.status_code, "error": he.detail}
+        except ValueError as ve:
+            return {"index": index, "status": "error", "status_code": 400, "error": str(ve)}
+        except Exception as e:
+            logger.error(f"Error en optimización del ítem {index}: {e}")
+            return {"index": index, "status": "error", "status_code": 500, "error": f"Error calculando optimización: {str(e)}"}
+
+    results = await asyncio.gather(*(run_item(i, r) for i, r in enumerate(batch.requests)))
+    return {
+        "count": len(results),
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "results": results
+    }
+
+class SweepRange(BaseModel):
+    start: float
+    stop: float
+    step: float
+
+class SweepRequest(BaseModel):
+    pokemon_name: str
+    start_zone: str
+    accessible_zones: List[str] = []
+    target_evs: Dict[str, int]
+    current_evs: Dict[str, int] = {}
+    # Cada parámetro acepta una lista de valores o un rango {start, stop, step} (inclusivo)
+    lambda_penalty: Union[List[float], SweepRange] = [0.1]
+    held_item: List[Optional[str]] = [None]
+    has_pokerus: List[bool] = [False]
+    pokemon_level: Union[List[int], SweepRange] = [50]
+    progression_profile: Optional[str] = None
+    zone_mask: Optional[str] = None
+
+def _sweep_values(values: Union[List, SweepRange], name: str) -> List:
+    """Expande un rango o deduplica una lista de valores de barrido"""
+    if isinstance(values, SweepRange):
+        try:
+            values = expand_range(values.start, values.stop, values.step)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{name}: {e}")
+    values = list(dict.fromkeys(values))
+    if not values:
+        raise HTTPException(status_code=400, detail=f"{name} needs at least one value")
+    return values
+
+@app.post("/api/optimize/sweep")
+def optimize_ev_training_sweep(request: SweepRequest):
+    """
+    Evalúa la rejilla completa de lambda_penalty x held_item x has_pokerus x pokemon_level
+    en una sola llamada (estrategia greedy). Las distancias y los yields por nivel se
+    comparten entre escenarios. Devuelve una tabla compacta (columns/rows), los planes
+    distintos y los ids de los planes Pareto-óptimos por distancia vs. combates.
+    """
+    _validate_target_evs(OptimizationRequest(pokemon_name=request.pokemon_name, start_zone=request.start_zone,
+                                             target_evs=request.target_evs))
+    lambdas = _sweep_values(request.lambda_penalty, "lambda_penalty")
+    if any(not 0 <= lam <= 1 for lam in lambdas):
+        raise HTTPException(status_code=400, detail="lambda_penalty values must be between 0 and 1")
+    levels = [int(level) for level in _sweep_values(request.pokemon_level, "pokemon_level")]
+    items = _sweep_values(request.held_item, "held_item")
+    pokerus = _sweep_values(request.has_pokerus, "has_pokerus")
+
+    scenarios = len(lambdas) * len(levels) * len(items) * len(pokerus)
+    if scenarios > MAX_SWEEP_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"Sweep cannot exceed {MAX_SWEEP_SCENARIOS} scenarios (got {scenarios})")
+
+    logger.info(f"Barrido de {scenarios} escenarios para {request.pokemon_name}")
+    try:
+        result = optimizer.sweep(
+            start_zone=request.start_zone,
+            current_evs=request.current_evs or {stat: 0 for stat in STATS},
+            target_evs=request.target_evs,
+            accessible_zones=request.accessible_zones,
+            lambda_penalties=lambdas,
+            held_items=items,
+            pokerus_options=pokerus,
+            pokemon_levels=levels,
+            profile=_resolve_profile(request.progression_profile, request.zone_mask)
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error en barrido: {e}")
+        raise HTTPException(status_code=500, detail=f"Error calculando barrido: {str(e)}")
+    result['pokemon_name'] = request.pokemon_name
+    return result
+
+class SessionProgress(BaseModel):
+    # Zona donde está el jugador ahora (opcional)
+    current_zone: Optional[str] = None
+    # EVs absolutos actuales, o bien los EVs ganados desde el último reporte
+    current_evs: Optional[Dict[str, int]] = None
+    gained_evs: Optional[Dict[str, int]] = None
+    battles: int = 0
+
+def _plan_session(session: TrainingSession, current_zone: str, current_evs: Dict[str, int]) -> Dict:
+    """
+    Planifica sólo lo que falta desde esa zona y esos EVs, sin modificar la sesión.
+    Usa la tabla de distancias, las tablas de yields y la caché de planes, así que el
+    costo no depende de cuánto lleve la sesión.
+    """
+    request = session.request.model_copy(update={"start_zone": current_zone, "current_evs": current_evs})
+    result = optimizer.plan(**_plan_arguments(request))
+    return _finish_optimization(request, result)
+
+def _replan_session(session: TrainingSession):
+    """Recalcula el plan desde la zona y los EVs actuales de la sesión"""
+    session.plan = _plan_session(session, session.current_zone, session.current_evs)
+    session.replans += 1
+
+@app.post("/api/sessions")
+def create_session(request: OptimizationRequest):
+    """
+    Crea una sesión de entrenamiento con su plan inicial.
+    """
+    _validate_target_evs(request)
+    start_zone = zone_aliases.resolve(request.start_zone) or request.start_zone
+    session = TrainingSession(request, start_zone, _default_current_evs(request))
+    try:
+        _replan_session(session)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    sessions.add(session)
+    logger.info(f"Sesión {session.id} creada para {request.pokemon_name}")
+    return session.to_dict()
+
+def _get_session_or_404(session_id: str) -> TrainingSession:
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    return session
+
+@app.get("/api/sessions/{session_id}")
+def get_session(session_id: str):
+    """Estado actual de una sesión"""
+    return _get_session_or_404(session_id).to_dict()
+
+@app.post("/api/sessions/{session_id}/progress")
+def report_session_progress(session_id: str, progress: SessionProgress):
+    """
+    Aplica un reporte de progreso (zona, EVs, batallas) y re-planifica lo que falta.
+    """
+    session = _get_session_or_404(session_id)
+    with session.lock:
+        current_zone = session.current_zone
+        if progress.current_zone:
+            current_zone = zone_aliases.resolve(progress.current_zone)
+            if current_zone is None:
+                raise HTTPException(status_code=400, detail=f"Unknown zone '{progress.current_zone}'")
+        current_evs = dict(session.current_evs)
+        if progress.current_evs is not None:
+            current_evs.update(progress.current_evs)
+        elif progress.gained_evs:
+            for stat, gained in progress.gained_evs.items():
+                current_evs[stat] = current_evs.get(stat, 0) + gained
+        current_evs = {stat: min(max(value, 0), 252) for stat, value in current_evs.items()}
+        # Se re-planifica antes de tocar la sesión: si falla, queda con su estado y su plan
+        try:
+            plan = _plan_session(session, current_zone, current_evs)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        session.current_zone = current_zone
+        session.current_evs = current_evs
+        session.total_battles += max(progress.battles, 0)
+        session.history.append({
+            "at": time.time(),
+            "zone": session.current_zone,
+            "evs": dict(session.current_evs),
+            "battles": progress.battles
+        })
+        session.updated_at = time.time()
+        session.plan = plan
+        session.replans += 1
+        return session.to_dict()
+
+@app.delete("/api/sessions/{session_id}")
+def delete_session(session_id: str):
+    """Cierra una sesión"""
+    if not sessions.remove(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    return {"status": "deleted", "session_id": session_id}
@@ -1,114 +1,502 @@
-import heapq
 import math
-import re
-from typing import Dict, List, Tuple, Optional, Any
+import time
+from typing import Dict, List, Tuple, Optional, Any, Iterator
+import numpy as np
 from graph import PokemonGraph
-from database import get_all_zone_yields, get_zone_encounters
+from plan_cache import PlanCache
+from zone_aliases import ZoneAliasIndex
+from encounter_store import EncounterStore
+from simulator import DEFAULT_TRIALS, SimulationStep, simulate_battles
+from sweep import MAX_STEPS, STAT_CAP, pareto_front, run_greedy_sweep
+from progression import ProgressionProfile
+from distance_table import ZoneDistanceTable
+
+# Power Items Map
+POWER_ITEMS = {
+    "Power Weight": "HP",
+    "Power Bracer": "Attack",
+    "Power Belt": "Defense",
+    "Power Lens": "Special Attack",
+    "Power Band": "Special Defense",
+    "Power Anklet": "Speed"
+}
+
+# Map stat name to DB key
+STAT_KEYS = {
+    "HP": "ev_hp",
+    "Attack": "ev_attack",
+    "Defense": "ev_defense",
+    "Special Attack": "ev_sp_attack",
+    "Special Defense": "ev_sp_defense",
+    "Speed": "ev_speed"
+}
+
+# Column order of every zones x stats yield matrix
+STATS = tuple(STAT_KEYS.keys())
+
+STRATEGIES = ("greedy", "exact")
+
+# Wall-clock budget of an exact plan (greedy seed + search) when the caller does not give one
+DEFAULT_TIME_BUDGET_MS = 250
+# Minimum time between two "progress" events of the exact search
+PROGRESS_INTERVAL_MS = 100
 
 class EVOptimizer:
-    def __init__(self, graph: PokemonGraph):
+    def __init__(self, graph: PokemonGraph, plan_cache: Optional[PlanCache] = None, aliases: Optional[ZoneAliasIndex] = None, encounter_store: Optional[EncounterStore] = None):
         self.graph = graph
-        # Cache yields to avoid DB hits on every step
-        self.zone_yields_cache = {} 
+        # In-memory encounters; loaded from the DB on first use if not given
+        self.encounter_store = encounter_store
+        # Every zone name the optimizer sees is resolved through this index
+        self.aliases = aliases if aliases is not None else ZoneAliasIndex(graph.distance_table.zones)
+        # Cache finished plans keyed by the canonical form of the request
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+
+    def reload(self, graph: Optional[PokemonGraph] = None, aliases: Optional[ZoneAliasIndex] = None, encounter_store: Optional[EncounterStore] = None):
+        """
+        Swaps in a reloaded graph / alias index / encounter store (if given) and drops
+        every cached plan. Call whenever the graph or the encounter data changes.
+        Plans already running keep the store they started with.
+        """
+        if encounter_store is not None:
+            self.encounter_store = encounter_store
+        if graph is not None:
+            self.graph = graph
+            if aliases is None:
+                aliases = ZoneAliasIndex(graph.distance_table.zones)
+        if aliases is not None:
+            self.aliases = aliases
+        self.plan_cache.invalidate()
+
+    def _plan_cache_key(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], accessible_zones: List[str], held_item: str, has_pokerus: bool, lambda_penalty: float, pokemon_level: int, strategy: str, time_budget_ms: int, profile: Optional[ProgressionProfile] = None) -> Tuple:
+        """
+        Canonical request key: zone names already normalized, accessible zones as a
+        sorted set and zero-valued EVs stripped, so equivalent requests share an entry.
+        """
+        return (
+            start_zone,
+            tuple(sorted(set(accessible_zones or []))),
+            tuple(sorted((stat, value) for stat, value in target_evs.items() if value)),
+            tuple(sorted((stat, value) for stat, value in current_evs.items() if value)),
+            held_item,
+            bool(has_pokerus),
+            float(lambda_penalty),
+            pokemon_level,
+            strategy,
+            time_budget_ms if strategy == "exact" else None,
+            profile.key if profile is not None else None
+        )
 
     def _get_db_code(self, graph_zone: str) -> str:
         """
         Maps Graph Zone Name (e.g. 'Route16_East') to DB Code (e.g. 'kanto-route-16').
         """
-        # 1. Convert CamelCase to kebab-case
-        s1 = re.sub('(.)([A-Z][a-z]+)', r'\1-\2', graph_zone)
-        s2 = re.sub('([a-z0-9])([A-Z])', r'\1-\2', s1).lower()
-        s2 = s2.replace("_", "-")
-        
-        # 2. Construct candidate
-        candidate = f"kanto-{s2}"
-        return candidate
+        return self.aliases.db_code(graph_zone)
 
-    def _match_yield(self, graph_zone: str, yields_map: Dict[str, Dict[str, float]]) -> Optional[Dict[str, float]]:
+    def _calculate_distances(self, start_zone: str) -> Dict[str, int]:
         """
-        Tries to find the yield dict for a graph zone in the yields map.
+        Returns {zone_name: distance_in_tiles} from start_zone to every reachable zone.
+        Reads the graph's precomputed all-pairs table instead of running Dijkstra.
         """
-        db_code = self._get_db_code(graph_zone)
-        
-        if db_code in yields_map:
-            return yields_map[db_code]
-        
-        if "-" in db_code:
-            prefix = db_code.rsplit("-", 1)[0]
-            if prefix in yields_map:
-                return yields_map[prefix]
-            
-        return None
+        return self.graph.distance_table.distances_from(start_zone)
 
-    def _calculate_distances(self, start_zone: str) -> Dict[str, int]:
+    def _normalize_zone_name(self, zone_name: str) -> str:
         """
-        Calculates min distances from start_zone to all other zones using Dijkstra.
-        Returns {zone_name: distance_in_tiles}
+        Normalizes any known zone alias to its Graph zone name.
+        e.g. "Route 1" -> "Route1", "kanto-route-1" -> "Route1", "Ruta 1" -> "Route1"
         """
-        pq = []
-        min_dists = {} # (Zone, Label) -> distance
-        
-        # Initial states: All labels in start_zone
-        start_labels = self.graph.adjacency_data.get(start_zone, {}).keys()
-        for lbl in start_labels:
-            state = (start_zone, lbl)
-            min_dists[state] = 0
-            heapq.heappush(pq, (0, start_zone, lbl))
-            
-        # Also track min distance to a Zone (ignoring label)
-        zone_min_dists = {start_zone: 0}
+        # If not found, return original (might be already correct)
+        return self.aliases.resolve(zone_name) or zone_name
 
-        while pq:
-            d, zone, label = heapq.heappop(pq)
-            
-            if d > min_dists.get((zone, label), float('inf')):
+    def _effective_yield(self, base_yield: float, stat: str, held_item: str, has_pokerus: bool) -> float:
+        """
+        Applies Macho Brace / Power Item and Pokerus modifiers to a base EV yield.
+        """
+        value = base_yield
+        if held_item == "Macho Brace":
+            value *= 2
+        elif POWER_ITEMS.get(held_item) == stat:
+            value += 8
+
+        if has_pokerus:
+            value *= 2
+        return value
+
+    def _plan_cost(self, result: Dict[str, Any], lambda_penalty: float) -> float:
+        """
+        Cost of a finished plan under the greedy score: Lambda*Dist + (1-Lambda)*Battles*10.
+        """
+        return lambda_penalty * result["total_distance"] + (1 - lambda_penalty) * result["total_encounters"] * 10
+
+    def _plan_rank(self, result: Dict[str, Any], target_evs: Dict[str, int], lambda_penalty: float) -> Tuple[bool, float]:
+        """
+        Sort key between plans: ones that reach every target first, then by _plan_cost.
+        """
+        missed = any(result["final_stats"].get(stat, 0) < target for stat, target in target_evs.items())
+        return missed, self._plan_cost(result, lambda_penalty)
+
+    def _search_exact(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], farm_evs: np.ndarray, valid: np.ndarray, lambda_penalty: float, started: float, deadline: float, table: ZoneDistanceTable, incumbent: float) -> Iterator[Tuple[str, Any]]:
+        """
+        Branch-and-bound over ordered (zone, stat) assignments, scored with the same model
+        the plan is executed with: every step battles the Pokemon _farm_step picks (its full
+        EV row, so off-focus gains count) and costs Lambda*Dist + (1-Lambda)*Kills*10.
+        farm_evs is the (zones, focus, stats) matrix of modified per-kill EVs of those
+        Pokemon (NaN where nothing gives the focus stat), valid masks usable zones and table
+        holds the travel distances (the progression profile's when one is used).
+        incumbent is the cost of the greedy plan (inf if it misses a target): only strictly
+        cheaper sequences are kept. The search stops at deadline (perf_counter seconds;
+        started is when the plan's budget began).
+        Generator: yields ("progress", {...}) whenever a cheaper sequence is found and at
+        most every PROGRESS_INTERVAL_MS otherwise, then returns the best sequence found
+        (empty if none beats the incumbent) and a log of the search.
+        """
+        size, distances = table.size, table.distances
+        start = table.index[start_zone]
+        n_stats = len(STATS)
+
+        log = []
+        targets = np.array([target_evs.get(stat, 0) for stat in STATS], dtype=np.float64)
+        targeted = [STATS.index(stat) for stat in target_evs if stat in STATS]
+
+        # Zones that can be farmed for each stat, and the best per-kill yield of each stat over
+        # every farmable row (any focus): bounds how fast a stat can grow at all
+        farmable = valid[:, None] & ~np.isnan(farm_evs[:, :, 0])
+        candidates = [np.flatnonzero(farmable[:, s]).tolist() for s in range(n_stats)]
+        rows = farm_evs[farmable]
+        max_yield = rows.max(axis=0) if len(rows) else np.zeros(n_stats)
+
+        best = {"cost": incumbent, "sequence": []}
+        stats = {"nodes": 0, "timed_out": False, "next_progress": 0.0}
+
+        def progress(now: float, improved: bool) -> Tuple[str, Dict[str, Any]]:
+            stats["next_progress"] = now + PROGRESS_INTERVAL_MS / 1000.0
+            return "progress", {
+                "nodes": stats["nodes"],
+                "elapsed_ms": round((now - started) * 1000),
+                "best_cost": best["cost"] if math.isfinite(best["cost"]) else None,
+                "improved": improved
+            }
+
+        def needed(current: List[float]) -> List[int]:
+            return [s for s in targeted if current[s] < targets[s]]
+
+        def lower_bound(location: int, current: List[float], missing: List[int]) -> float:
+            # Every battle gives at most max_yield[s] of stat s
+            battles = 0
+            for s in missing:
+                if max_yield[s] <= 0:
+                    return float('inf')
+                battles = max(battles, math.ceil((targets[s] - current[s]) / max_yield[s]))
+            # Must at least reach the nearest zone that is farmable for a missing stat
+            base = location * size
+            travel = min((distances[base + zone] for s in missing for zone in candidates[s]), default=float('inf'))
+            return lambda_penalty * travel + (1 - lambda_penalty) * battles * 10
+
+        def search(location: int, current: List[float], cost: float, sequence: List[Tuple[int, int]]):
+            if stats["timed_out"]:
+                return
+            stats["nodes"] += 1
+            now = time.perf_counter()
+            if now > deadline:
+                stats["timed_out"] = True
+                return
+            if now >= stats["next_progress"]:
+                yield progress(now, False)
+
+            missing = needed(current)
+            if not missing:
+                if cost < best["cost"]:
+                    best["cost"] = cost
+                    best["sequence"] = list(sequence)
+                    yield progress(now, True)
+                return
+            # The plan is executed with at most MAX_STEPS farm steps
+            if len(sequence) >= MAX_STEPS:
+                return
+            if cost + lower_bound(location, current, missing) >= best["cost"]:
+                return
+
+            base = location * size
+            children = []
+            for s in missing:
+                need = targets[s] - current[s]
+                for zone in candidates[s]:
+                    dist = distances[base + zone]
+                    if dist == float('inf'):
+                        continue
+                    kills = math.ceil(need / farm_evs[zone, s, s])
+                    step_cost = lambda_penalty * dist + (1 - lambda_penalty) * kills * 10
+                    children.append((step_cost, zone, s, kills))
+            # Cheapest step first so good incumbents are found early
+            children.sort(key=lambda c: c[0])
+
+            for step_cost, zone, s, kills in children:
+                if cost + step_cost >= best["cost"]:
+                    continue
+                gained = farm_evs[zone, s]
+                after = [min(current[k] + kills * gained[k], STAT_CAP) for k in range(n_stats)]
+                sequence.append((zone, s))
+                yield from search(zone if distances[base + zone] > 0 else location, after, cost + step_cost, sequence)
+                sequence.pop()
+                if stats["timed_out"]:
+                    return
+
+        stats["next_progress"] = started + PROGRESS_INTERVAL_MS / 1000.0
+        yield from search(start, [float(current_evs.get(stat, 0)) for stat in STATS], 0.0, [])
+
+        status = "budget exhausted" if stats["timed_out"] else "optimal under the model"
+        budget_ms = round((deadline - started) * 1000)
+        if not best["sequence"]:
+            log.append(f"Exact search: {status} after {stats['nodes']} nodes (budget {budget_ms} ms); "
+                       f"no plan cheaper than the greedy one (cost {incumbent:.2f}), keeping it.")
+            return [], log
+        log.append(f"Exact search: {status} after {stats['nodes']} nodes (budget {budget_ms} ms). "
+                   f"Estimated cost: {best['cost']:.2f} (greedy: {incumbent:.2f})")
+        return [(table.zones[zone], STATS[s]) for zone, s in best["sequence"]], log
+
+    def _yield_matrix(self, yields_map: Dict[str, Dict[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Builds the zones x 6-stats average yield matrix aligned with the graph zone index.
+        Returns (matrix, has_yield) where has_yield marks zones found in the yields map.
+        """
+        zones = self.graph.distance_table.zones
+        matrix = np.zeros((len(zones), len(STATS)))
+        has_yield = np.zeros(len(zones), dtype=bool)
+        for i, zone_yield_data in enumerate(self.aliases.match_sources(yields_map)):
+            if zone_yield_data:
+                has_yield[i] = True
+                matrix[i] = [zone_yield_data.get(stat, 0) for stat in STATS]
+        return matrix, has_yield
+
+    def _apply_modifiers(self, yields: np.ndarray, held_item: str, has_pokerus: bool) -> np.ndarray:
+        """
+        Vectorized _effective_yield: applies item and Pokerus modifiers to a (..., 6) yield array.
+        """
+        multiplier, bonus = self._modifiers(held_item, has_pokerus)
+        return yields * multiplier + bonus
+
+    def _modifiers(self, held_item: str, has_pokerus: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-stat (multiplier, bonus) such that effective = base * multiplier + bonus.
+        """
+        multiplier = np.ones(len(STATS))
+        bonus = np.zeros(len(STATS))
+        if held_item == "Macho Brace":
+            multiplier *= 2
+        elif held_item in POWER_ITEMS:
+            bonus[STATS.index(POWER_ITEMS[held_item])] = 8
+        if has_pokerus:
+            multiplier *= 2
+            bonus *= 2
+        return multiplier, bonus
+
+    def _accessible_mask(self, accessible_zones: List[str]) -> np.ndarray:
+        """
+        Boolean vector over graph zones; all True when no restriction is given.
+        """
+        zones = self.graph.distance_table.zones
+        if not accessible_zones:
+            return np.ones(len(zones), dtype=bool)
+        allowed = set(accessible_zones)
+        return np.array([zone in allowed for zone in zones], dtype=bool)
+
+    def _get_encounter_store(self) -> EncounterStore:
+        """
+        Returns the current encounter store, loading it once if none was provided.
+        """
+        store = self.encounter_store
+        if store is None:
+            store = self.encounter_store = EncounterStore.load()
+        return store
+
+    def zone_yields(self, pokemon_level: int = 50) -> Dict[str, Dict[str, float]]:
+        """
+        {zone_code: {stat: average yield}} for a level band, by table lookup.
+        """
+        return self._get_encounter_store().zone_yields(pokemon_level)
+
+    def _farm_step(self, zone: str, stat: str, needed: int, current_stats: Dict[str, int], held_item: str, has_pokerus: bool, pokemon_level: int, encounter_store: EncounterStore) -> Optional[Dict[str, Any]]:
+        """
+        Picks the Pokemon to battle in zone for stat, updates current_stats with the
+        gained EVs and returns the farm step (or None if nothing there gives the stat).
+        """
+        db_code = self._get_db_code(zone)
+        encounters = encounter_store.encounters(db_code, pokemon_level)
+
+        stat_key = STAT_KEYS.get(stat)
+
+        # Filter for pokemon that give the target stat
+        useful_encounters = [e for e in encounters if e[stat_key] > 0]
+
+        if not useful_encounters:
+            return None
+
+        # Let's pick the most common one that gives the stat
+        target_pokemon = sorted(useful_encounters, key=lambda x: x['probability_percent'], reverse=True)[0]
+
+        # Calculate effective yield for the target stat
+        yield_per_kill = self._effective_yield(target_pokemon[stat_key], stat, held_item, has_pokerus)
+
+        kills = math.ceil(needed / yield_per_kill)
+
+        # Update stats
+        gained_evs = {}
+        for stat_name, k in STAT_KEYS.items():
+            val = self._effective_yield(target_pokemon[k], stat_name, held_item, has_pokerus)
+
+            gain = kills * val
+            current_stats[stat_name] = current_stats.get(stat_name, 0) + gain
+            gained_evs[stat_name] = gain
+
+        return {
+            "type": "farm",
+            "zone": zone,
+            "target_pokemon": target_pokemon['name'],
+            "count": kills,
+            "stat_focus": stat,
+            "gained_evs": gained_evs
+        }
+
+    def simulate(self, result: Dict[str, Any], current_evs: Dict[str, int], target_evs: Dict[str, int], held_item: str, has_pokerus: bool, pokemon_level: int = 50, trials: int = DEFAULT_TRIALS, seed: Optional[int] = None, battle_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Monte Carlo estimate of how many battles a plan really takes when encounters
+        follow each zone's distribution instead of always being target_pokemon.
+        battle_budget defaults to the plan's own total_encounters.
+        """
+        store = self._get_encounter_store()
+        steps = []
+        for step in result["path"]:
+            if step["type"] != "farm":
                 continue
-            
-            # Update zone min dist
-            if d < zone_min_dists.get(zone, float('inf')):
-                zone_min_dists[zone] = d
-            
-            # Neighbors (Intra-zone)
-            intra_neighbors = self.graph.get_intra_zone_neighbors(zone, label)
-            for target_lbl, dist in intra_neighbors:
-                new_dist = d + dist
-                if new_dist < min_dists.get((zone, target_lbl), float('inf')):
-                    min_dists[(zone, target_lbl)] = new_dist
-                    heapq.heappush(pq, (new_dist, zone, target_lbl))
-            
-            # Neighbors (Inter-zone)
-            target_zone = self.graph.get_inter_zone_neighbor(zone, label)
-            if target_zone:
-                target_lbl = zone # Assuming symmetry
-                if target_zone in self.graph.adjacency_data:
-                    new_dist = d # 0 cost to cross
-                    if new_dist < min_dists.get((target_zone, target_lbl), float('inf')):
-                        min_dists[(target_zone, target_lbl)] = new_dist
-                        heapq.heappush(pq, (new_dist, target_zone, target_lbl))
-        
-        return zone_min_dists
+            rows = store.zone_rows(self._get_db_code(step["zone"]), pokemon_level)
+            yields = self._apply_modifiers(store.evs[rows].astype(np.float64), held_item, has_pokerus)
+            steps.append(SimulationStep(step["zone"], STATS.index(step["stat_focus"]), yields, store.probability[rows]))
 
-    def _normalize_zone_name(self, zone_name: str) -> str:
+        start_stats = np.array([current_evs.get(stat, 0) for stat in STATS], dtype=np.float64)
+        targets = np.array([target_evs.get(stat, 0) for stat in STATS], dtype=np.float64)
+        if battle_budget is None:
+            battle_budget = result["total_encounters"]
+        return simulate_battles(steps, start_stats, targets, trials, seed, battle_budget)
+
+    def _farm_targets(self, pokemon_level: int, encounter_store: EncounterStore) -> Tuple[np.ndarray, List[List[Optional[str]]]]:
         """
-        Normalizes DB zone name to Graph zone name.
-        e.g. "Route 1" -> "Route1", "Mt. Moon" -> "MtMoon"
+        The Pokemon _farm_step would pick in every graph zone for every focus stat.
+        Returns ((zones, 6 focus, 6) base EV rows, NaN where nothing gives the stat;
+        names[zone][focus]).
         """
-        # Remove spaces, dots, underscores
-        normalized = re.sub(r'[\s\._]', '', zone_name)
-        
-        # Check if this normalized name exists in the graph
-        if normalized in self.graph.adjacency_data:
-            return normalized
-            
-        # Try case-insensitive match
-        for key in self.graph.adjacency_data.keys():
-            if key.lower() == normalized.lower():
-                return key
-                
-        # If not found, return original (might be already correct)
-        return zone_name
+        zones = self.graph.distance_table.zones
+        rows_evs = np.full((len(zones), len(STATS), len(STATS)), np.nan)
+        names = [[None] * len(STATS) for _ in zones]
+        for z, zone in enumerate(zones):
+            rows = encounter_store.zone_rows(self._get_db_code(zone), pokemon_level)
+            if not len(rows):
+                continue
+            evs = encounter_store.evs[rows]
+            probability = encounter_store.probability[rows]
+            for s in range(len(STATS)):
+                useful = np.flatnonzero(evs[:, s] > 0)
+                if not len(useful):
+                    continue
+                # Most common useful encounter, first one on ties (same as the stable sort in _farm_step)
+                pick = useful[np.argmax(probability[useful])]
+                rows_evs[z, s] = evs[pick]
+                names[z][s] = encounter_store.pokemon_names[encounter_store.pokemon_idx[rows[pick]]]
+        return rows_evs, names
+
+    def sweep(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], accessible_zones: List[str], lambda_penalties: List[float], held_items: List[Optional[str]], pokerus_options: List[bool], pokemon_levels: List[int], profile: Optional[ProgressionProfile] = None) -> Dict[str, Any]:
+        """
+        Greedy plans for every combination of lambda, held item, Pokerus and level.
+        Distances and per-level yields are computed once and all scenarios are scored
+        together (see sweep.run_greedy_sweep). Identical plans are reported once;
+        the Pareto front is over (total_distance, total_encounters) of plans that
+        reach every target.
+        """
+        original_start_zone = start_zone
+        start_zone = self._normalize_zone_name(start_zone)
+        table = profile.distance_table if profile is not None else self.graph.distance_table
+        if start_zone not in table.index:
+            raise ValueError(f"Start zone '{original_start_zone}' (normalized: '{start_zone}') not found in graph.")
+        if profile is not None and not profile.allowed[table.index[start_zone]]:
+            raise ValueError(f"Start zone '{start_zone}' is not accessible in progression profile '{profile.key}'.")
+        if accessible_zones:
+            accessible_zones = [self._normalize_zone_name(z) for z in accessible_zones]
+
+        encounter_store = self._get_encounter_store()
+        accessible = self._accessible_mask(accessible_zones)
+        if profile is not None:
+            accessible &= profile.allowed
+        levels = list(dict.fromkeys(pokemon_levels))
+        group_yields, group_valid, group_targets, group_names = [], [], [], []
+        for level in levels:
+            base_yields, has_yield = self._yield_matrix(encounter_store.zone_yields(level))
+            rows_evs, names = self._farm_targets(level, encounter_store)
+            group_yields.append(base_yields)
+            group_valid.append(has_yield & accessible)
+            group_targets.append(rows_evs)
+            group_names.append(names)
+
+        scenarios = [(lam, item, pokerus, level) for level in levels for item in held_items
+                     for pokerus in pokerus_options for lam in lambda_penalties]
+        modifiers = [self._modifiers(item, pokerus) for _, item, pokerus, _ in scenarios]
+        level_index = {level: g for g, level in enumerate(levels)}
+        level_group = np.array([level_index[level] for *_, level in scenarios], dtype=np.int64)
+
+        stat_order = [STATS.index(stat) for stat in target_evs if stat in STATS]
+        outcome = run_greedy_sweep(
+            table.matrix, table.index[start_zone],
+            np.array([lam for lam, *_ in scenarios], dtype=np.float64),
+            np.array([m for m, _ in modifiers]), np.array([b for _, b in modifiers]), level_group,
+            np.stack(group_yields), np.stack(group_valid), np.stack(group_targets),
+            np.array([current_evs.get(stat, 0) for stat in STATS], dtype=np.float64),
+            np.array([target_evs.get(stat, 0) for stat in STATS], dtype=np.float64),
+            stat_order
+        )
+
+        # Deduplicate plans: many scenarios end up with the same sequence of steps
+        plans, plan_ids, rows = [], {}, []
+        for i, (lam, item, pokerus, level) in enumerate(scenarios):
+            names = group_names[level_group[i]]
+            path = tuple(
+                (table.zones[zone], STATS[stat], travel, names[zone][stat], kills)
+                for zone, stat, travel, kills in outcome["steps"][i]
+            )
+            # A stopped scenario may have travelled past its last farm step
+            key = (path, int(outcome["total_distance"][i]), bool(outcome["reached"][i]))
+            plan_id = plan_ids.get(key)
+            if plan_id is None:
+                plan_id = plan_ids[key] = len(plans)
+                plans.append({
+                    "id": plan_id,
+                    "path": [{"zone": zone, "stat_focus": stat, "distance": travel, "target_pokemon": pokemon, "count": kills}
+                             for zone, stat, travel, pokemon, kills in path],
+                    "total_distance": int(outcome["total_distance"][i]),
+                    "total_encounters": int(outcome["total_battles"][i]),
+                    "targets_reached": bool(outcome["reached"][i]),
+                    "scenarios": []
+                })
+            plans[plan_id]["scenarios"].append(i)
+            rows.append([lam, item, pokerus, level, int(outcome["total_distance"][i]),
+                         int(outcome["total_battles"][i]), bool(outcome["reached"][i]), plan_id])
+
+        complete = [p for p in plans if p["targets_reached"]]
+        front = pareto_front([p["total_distance"] for p in complete], [p["total_encounters"] for p in complete])
+        return {
+            "start_zone": start_zone,
+            "scenario_count": len(scenarios),
+            "columns": ["lambda_penalty", "held_item", "has_pokerus", "pokemon_level",
+                        "total_distance", "total_encounters", "targets_reached", "plan_id"],
+            "rows": rows,
+            "plans": plans,
+            "pareto": [complete[i]["id"] for i in front]
+        }
 
-    async def find_optimal_path(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], accessible_zones: List[str], held_item: str, has_pokerus: bool, lambda_penalty: float, pokemon_level: int = 50) -> Dict[str, Any]:
+    async def find_optimal_path(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], accessible_zones: List[str], held_item: str, has_pokerus: bool, lambda_penalty: float, pokemon_level: int = 50, strategy: str = "greedy", time_budget_ms: Optional[int] = None, all_yields: Optional[Dict[str, Dict[str, float]]] = None, profile: Optional[ProgressionProfile] = None) -> Dict[str, Any]:
+        """
+        Async entry point kept for the API; see plan().
+        """
+        return self.plan(start_zone, current_evs, target_evs, accessible_zones, held_item, has_pokerus,
+                         lambda_penalty, pokemon_level, strategy, time_budget_ms, all_yields, profile)
+
+    def plan(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], accessible_zones: List[str], held_item: str, has_pokerus: bool, lambda_penalty: float, pokemon_level: int = 50, strategy: str = "greedy", time_budget_ms: Optional[int] = None, all_yields: Optional[Dict[str, Dict[str, float]]] = None, profile: Optional[ProgressionProfile] = None) -> Dict[str, Any]:
         """
         Finds a sequence of zones to visit to reach target EVs.
         Uses a greedy heuristic:
@@ -116,43 +504,136 @@ class EVOptimizer:
         2. Find best zone to farm needed EVs (Cost = Lambda*Dist + (1-Lambda)*Encounters).
         3. 'Travel' there, 'Farm' until capped or exhausted.
         4. Repeat.
+        With strategy="exact", step 2 follows the (zone, stat) order found by a
+        branch-and-bound search bounded by time_budget_ms (optimal under the plan's cost
+        model when it finishes in time); that plan is returned only if it costs less than
+        the greedy one.
+        all_yields may be passed in (e.g. shared across a batch); otherwise it comes from
+        the encounter store's precomputed per-level tables.
+        profile (a progression profile) limits both travel and farming to its subgraph,
+        using the distance table precomputed for it.
+        """
+        for event, payload in self.iter_plan(start_zone, current_evs, target_evs, accessible_zones, held_item, has_pokerus,
+                                             lambda_penalty, pokemon_level, strategy, time_budget_ms, all_yields, profile):
+            if event == "result":
+                return payload
+
+    def iter_plan(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], accessible_zones: List[str], held_item: str, has_pokerus: bool, lambda_penalty: float, pokemon_level: int = 50, strategy: str = "greedy", time_budget_ms: Optional[int] = None, all_yields: Optional[Dict[str, Dict[str, float]]] = None, profile: Optional[ProgressionProfile] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Generator version of plan(): yields ("log", message) and ("step", path_step) as soon
+        as each is decided, then ("result", result). A cache hit yields only the result.
+        With strategy="exact" the greedy plan is streamed first, then the search's
+        ("progress", {...}) events; if the exact plan wins, ("replace", {...}) says the
+        steps so far are superseded and that plan's steps follow.
         """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}'. Expected one of: {', '.join(STRATEGIES)}")
+        if time_budget_ms is None:
+            time_budget_ms = DEFAULT_TIME_BUDGET_MS
+
         # Normalize start_zone
         original_start_zone = start_zone
         start_zone = self._normalize_zone_name(start_zone)
         
         if start_zone not in self.graph.adjacency_data:
             raise ValueError(f"Start zone '{original_start_zone}' (normalized: '{start_zone}') not found in graph.")
+
+        # Travel distances of the progression profile (its own precomputed table)
+        table = profile.distance_table if profile is not None else self.graph.distance_table
+        if profile is not None and not profile.allowed[table.index[start_zone]]:
+            raise ValueError(f"Start zone '{start_zone}' is not accessible in progression profile '{profile.key}'.")
         
         # Normalize accessible_zones
         if accessible_zones:
             accessible_zones = [self._normalize_zone_name(z) for z in accessible_zones]
 
+        cache_key = self._plan_cache_key(start_zone, current_evs, target_evs, accessible_zones, held_item,
+                                         has_pokerus, lambda_penalty, pokemon_level, strategy, time_budget_ms, profile)
+        cached = self.plan_cache.get(cache_key)
+        if cached is not None:
+            # Equivalent requests may differ in which zero-valued stats they list
+            cached["final_stats"] = {**{stat: 0 for stat in current_evs}, **cached["final_stats"]}
+            yield "result", cached
+            return
+
+        # Snapshot of the encounter data for the whole plan (a reload swaps the reference)
+        encounter_store = self._get_encounter_store()
+
+        # Load yields once
+        if all_yields is None:
+            all_yields = encounter_store.zone_yields(pokemon_level)
+        print(f"DEBUG: Loaded yields for {len(all_yields)} zones.")
+
+        # Zones x stats matrices aligned with the graph zone index
+        base_yields, has_yield = self._yield_matrix(all_yields)
+        effective = self._apply_modifiers(base_yields, held_item, has_pokerus)
+        # Filter accessible zones if provided
+        valid = has_yield & self._accessible_mask(accessible_zones)
+        if profile is not None:
+            valid &= profile.allowed
+
+        walk = (start_zone, current_evs, target_evs, effective, valid, table, lambda_penalty,
+                held_item, has_pokerus, pokemon_level, encounter_store)
+        if strategy == "greedy":
+            for event, payload in self._walk_plan(*walk, planned=[]):
+                if event == "result":
+                    result = payload
+                else:
+                    yield event, payload
+        else:
+            # The exact plan is only used when it beats the greedy one, so it is never worse.
+            # The greedy walk and the search tables count against the same budget as the search
+            started = time.perf_counter()
+            deadline = started + time_budget_ms / 1000.0
+            for event, payload in self._walk_plan(*walk, planned=[]):
+                if event == "result":
+                    result = payload
+                else:
+                    yield event, payload
+            # A greedy plan that misses a target does not bound the search: any complete plan beats it
+            greedy_rank = self._plan_rank(result, target_evs, lambda_penalty)
+            greedy_cost = greedy_rank[1] if not greedy_rank[0] else float('inf')
+            rows_evs, _ = self._farm_targets(pokemon_level, encounter_store)
+            farm_evs = self._apply_modifiers(rows_evs, held_item, has_pokerus)
+            planned, search_log = yield from self._search_exact(start_zone, current_evs, target_evs, farm_evs, valid,
+                                                                lambda_penalty, started, deadline, table, greedy_cost)
+            if planned:
+                exact_events = list(self._walk_plan(*walk, planned=planned))
+                exact_result = exact_events[-1][1]
+                exact_rank = self._plan_rank(exact_result, target_evs, lambda_penalty)
+                if exact_rank < greedy_rank:
+                    yield "replace", {"cost": exact_rank[1], "greedy_cost": greedy_rank[1]}
+                    for event, payload in exact_events[:-1]:
+                        yield event, payload
+                    result = exact_result
+                else:
+                    search_log.append("Exact search: its plan is not cheaper once executed, keeping the greedy plan.")
+            for entry in search_log:
+                yield "log", entry
+            result["decision_log"] = search_log + result["decision_log"]
+
+        self.plan_cache.put(cache_key, result)
+        yield "result", result
+
+    def _walk_plan(self, start_zone: str, current_evs: Dict[str, int], target_evs: Dict[str, int], effective: np.ndarray, valid: np.ndarray, table: ZoneDistanceTable, lambda_penalty: float, held_item: str, has_pokerus: bool, pokemon_level: int, encounter_store: EncounterStore, planned: List[Tuple[str, str]]) -> Iterator[Tuple[str, Any]]:
+        """
+        Builds the plan step by step: follows planned (zone, stat) assignments while they
+        still apply, then picks greedily. Yields ("log", ...) and ("step", ...) events and
+        finally ("result", result).
+        """
         path = []
         total_distance = 0
         total_encounters = 0
         
         current_location = start_zone
         current_stats = current_evs.copy()
-        
-        # Power Items Map
-        power_items = {
-            "Power Weight": "HP",
-            "Power Bracer": "Attack",
-            "Power Belt": "Defense",
-            "Power Lens": "Special Attack",
-            "Power Band": "Special Defense",
-            "Power Anklet": "Speed"
-        }
-        
-        # Load yields once
-        all_yields = get_all_zone_yields(pokemon_level)
-        print(f"DEBUG: Loaded yields for {len(all_yields)} zones.")
+        zones = table.zones
+        planned = list(planned)
         
         # Safety loop limit
         decision_log = []
         
-        for i in range(10):
+        for i in range(MAX_STEPS):
             # 1. Calculate Needs
             needs = {}
             has_needs = False
@@ -164,164 +645,103 @@ class EVOptimizer:
             
             if not has_needs:
                 decision_log.append("All targets reached.")
+                yield "log", decision_log[-1]
                 break
                 
             # 2. Calculate Distances from current location
-            distances = self._calculate_distances(current_location)
+            distances = table.row(current_location)
             
             # 3. Score Zones
             best_zone = None
             best_score = float('inf')
             best_stat_to_farm = None
             best_details = {}
-            
-            for zone_name in self.graph.adjacency_data.keys():
-                # Filter accessible zones if provided
-                if accessible_zones and zone_name not in accessible_zones:
-                    continue
 
-                dist = distances.get(zone_name, float('inf'))
-                if dist == float('inf'):
-                    continue
-                
-                zone_yield_data = self._match_yield(zone_name, all_yields)
-                if not zone_yield_data:
-                    continue
-                
-                # Check if this zone provides any needed stat
-                for stat, amount_needed in needs.items():
-                    avg_yield = zone_yield_data.get(stat, 0)
-                    
-                    # Apply Item Bonus
-                    if held_item == "Macho Brace":
-                        avg_yield *= 2
-                    elif power_items.get(held_item) == stat:
-                        avg_yield += 8
-                        
-                    # Apply Pokerus
-                    if has_pokerus:
-                        avg_yield *= 2
-                        
-                    if avg_yield > 0.1: # Threshold to consider useful
-                        # Estimate encounters needed
-                        encounters_needed = amount_needed / avg_yield
-                        
+            # Planned (exact) assignments whose stat was already covered are skipped
+            while planned and (planned[0][1] not in needs or not np.isfinite(distances[table.index[planned[0][0]]])):
+                planned.pop(0)
+
+            if planned:
+                best_zone, best_stat_to_farm = planned.pop(0)
+                zone_idx = table.index[best_zone]
+                avg_yield = float(effective[zone_idx, STATS.index(best_stat_to_farm)])
+                encounters_needed = needs[best_stat_to_farm] / avg_yield if avg_yield > 0 else 0.0
+                best_score = (lambda_penalty * distances[zone_idx]) + ((1 - lambda_penalty) * encounters_needed * 10)
+                best_details = {
+                    "dist": int(distances[zone_idx]),
+                    "encounters": encounters_needed,
+                    "yield": avg_yield
+                }
+            else:
+                # Columns in needs order so ties resolve like a zone-major, needs-order scan
+                need_stats = [stat for stat in needs if stat in STATS]
+                if need_stats:
+                    columns = [STATS.index(stat) for stat in need_stats]
+                    amounts = np.array([needs[stat] for stat in need_stats], dtype=float)
+                    yields = effective[:, columns]
+                    # Threshold to consider useful
+                    usable = valid[:, None] & np.isfinite(distances)[:, None] & (yields > 0.1)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        encounters_needed = amounts / yields
                         # Score
-                        score = (lambda_penalty * dist) + ((1 - lambda_penalty) * encounters_needed * 10)
-                        
-                        if score < best_score:
-                            best_score = score
-                            best_zone = zone_name
-                            best_stat_to_farm = stat
-                            best_details = {
-                                "dist": dist,
-                                "encounters": encounters_needed,
-                                "yield": avg_yield
-                            }
+                        scores = (lambda_penalty * distances[:, None]) + ((1 - lambda_penalty) * encounters_needed * 10)
+                    scores = np.where(usable, scores, np.inf)
+
+                    flat_idx = int(np.argmin(scores))
+                    zone_idx, col = divmod(flat_idx, len(columns))
+                    if np.isfinite(scores[zone_idx, col]):
+                        best_score = float(scores[zone_idx, col])
+                        best_zone = zones[zone_idx]
+                        best_stat_to_farm = need_stats[col]
+                        best_details = {
+                            "dist": int(distances[zone_idx]),
+                            "encounters": float(encounters_needed[zone_idx, col]),
+                            "yield": float(yields[zone_idx, col])
+                        }
             
             if not best_zone:
                 decision_log.append(f"Could not find any zone to farm remaining needs: {needs}")
+                yield "log", decision_log[-1]
                 break
             
             decision_log.append(f"Step {i+1}: Chose {best_zone} to farm {best_stat_to_farm}. "
                                 f"Dist: {best_details['dist']}, Est. Encounters: {int(best_details['encounters'])}. "
                                 f"Score: {best_score:.2f}")
+            yield "log", decision_log[-1]
             
             # 4. Add Travel Step
-            dist_to_zone = distances[best_zone]
+            dist_to_zone = best_details['dist']
             if dist_to_zone > 0:
                 path.append({
                     "type": "travel",
                     "to": best_zone,
                     "distance": dist_to_zone
                 })
+                yield "step", path[-1]
                 total_distance += dist_to_zone
                 current_location = best_zone
             
             # 5. Add Farm Step
-            db_code = self._get_db_code(best_zone)
-            encounters = get_zone_encounters(db_code, pokemon_level)
-            
-            # Map stat name to DB key
-            stat_map = {
-                "HP": "ev_hp",
-                "Attack": "ev_attack",
-                "Defense": "ev_defense",
-                "Special Attack": "ev_sp_attack",
-                "Special Defense": "ev_sp_defense",
-                "Speed": "ev_speed"
-            }
-            stat_key = stat_map.get(best_stat_to_farm)
+            farm_step = self._farm_step(best_zone, best_stat_to_farm, needs[best_stat_to_farm], current_stats, held_item, has_pokerus, pokemon_level, encounter_store)
             
-            # Filter for pokemon that give the target stat
-            useful_encounters = [e for e in encounters if e[stat_key] > 0]
-            
-            if not useful_encounters:
+            if not farm_step:
                 break
-                
-            # Let's pick the most common one that gives the stat
-            target_pokemon = sorted(useful_encounters, key=lambda x: x['probability_percent'], reverse=True)[0]
-            
-            # Calculate effective yield for the target stat
-            base_yield = target_pokemon[stat_key]
-            effective_yield = base_yield
-            
-            if held_item == "Macho Brace":
-                effective_yield *= 2
-            elif power_items.get(held_item) == best_stat_to_farm:
-                effective_yield += 8
-                
-            if has_pokerus:
-                effective_yield *= 2
-            
-            yield_per_kill = effective_yield
-            needed = needs[best_stat_to_farm]
-            
-            kills = math.ceil(needed / yield_per_kill)
-            
-            # Update stats
-            gained_evs = {}
-            for k in ['ev_hp', 'ev_attack', 'ev_defense', 'ev_sp_attack', 'ev_sp_defense', 'ev_speed']:
-                stat_name = k.replace('ev_', '').replace('_', ' ').title()
-                if stat_name == 'Hp': stat_name = 'HP'
-                if stat_name == 'Sp Attack': stat_name = 'Special Attack'
-                if stat_name == 'Sp Defense': stat_name = 'Special Defense'
-                
-                base_val = target_pokemon[k]
-                val = base_val
-                
-                if held_item == "Macho Brace":
-                    val *= 2
-                elif power_items.get(held_item) == stat_name:
-                    val += 8
-                    
-                if has_pokerus:
-                    val *= 2
-                
-                gain = kills * val
-                current_stats[stat_name] = current_stats.get(stat_name, 0) + gain
-                gained_evs[stat_name] = gain
-
-            path.append({
-                "type": "farm",
-                "zone": best_zone,
-                "target_pokemon": target_pokemon['name'],
-                "count": kills,
-                "stat_focus": best_stat_to_farm,
-                "gained_evs": gained_evs
-            })
+
+            path.append(farm_step)
+            yield "step", farm_step
             
-            total_encounters += kills
+            total_encounters += farm_step["count"]
             
             # Check if we overshot caps (252)
             for s in current_stats:
-                if current_stats[s] > 252:
-                    current_stats[s] = 252 # Cap it
+                if current_stats[s] > STAT_CAP:
+                    current_stats[s] = STAT_CAP # Cap it
                     
-        return {
+        result = {
             "path": path,
             "total_distance": total_distance,
             "total_encounters": total_encounters,
             "final_stats": current_stats,
             "decision_log": decision_log
         }
+        yield "result", result
@@ -0,0 +1,92 @@
+import asyncio
+import gzip
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Catalog data only changes on reload: clients must revalidate, but a 304 is enough
+CACHE_CONTROL = "no-cache"
+GZIP_LEVEL = 6
+
+class PrerenderedResponse:
+    """
+    A JSON payload serialized once (same bytes FastAPI's JSONResponse would send),
+    plus its gzip encoding and strong ETags for both representations.
+    """
+    def __init__(self, payload: Any, version: int):
+        self.version = version
+        self.body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                               indent=None, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """
+        Weak comparison (RFC 9110): a W/ prefix is ignored and either encoding matches.
+        """
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags or self.gzip_etag in tags
+
+    def respond(self, request: Request) -> Response:
+        use_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+        headers = {
+            "ETag": self.gzip_etag if use_gzip else self.etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+        if self.not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+class PrerenderedCache:
+    """
+    Pre-rendered responses by name, valid for one data version. An entry is rebuilt
+    (once, even under concurrent requests) the first time it is asked for with a
+    newer version; a failed build leaves nothing cached.
+    """
+    def __init__(self):
+        self._entries: Dict[str, PrerenderedResponse] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.builds = 0
+        self.hits = 0
+        self.not_modified = 0
+
+    async def get(self, name: str, version: int, build: Callable[[], Awaitable[Any]]) -> PrerenderedResponse:
+        entry = self._entries.get(name)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            return entry
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.version != version:
+                entry = PrerenderedResponse(await build(), version)
+                self._entries[name] = entry
+                self.builds += 1
+            else:
+                self.hits += 1
+        return entry
+
+    async def respond(self, request: Request, name: str, version: int, build: Callable[[], Awaitable[Any]]) -> Response:
+        response = (await self.get(name, version, build)).respond(request)
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": {name: {"version": entry.version, "bytes": len(entry.body), "gzip_bytes": len(entry.gzip_body)}
+                        for name, entry in self._entries.items()},
+            "builds": self.builds,
+            "hits": self.hits,
+            "not_modified": self.not_modified
+        }
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from distance_table import ZoneDistanceTable
+
+# Name of the implicit profile with nothing blocked
+FULL_PROFILE = "full"
+# Custom zone masks whose tables are kept in memory
+MAX_CUSTOM_MASKS = 64
+
+class ProgressionProfile:
+    """
+    A point of the game's progression as masks over the compiled graph: the zones
+    that can be entered and the zone crossings that are still closed (Snorlax, guards,
+    water without Surf...). Its restricted graph and all-pairs distance table are
+    built once (or taken precomputed, e.g. from a binary snapshot), so a request
+    using it pays nothing for the restriction.
+    """
+    def __init__(self, name: str, description: str, compiled, allowed: np.ndarray,
+                 blocked_crossings: List[Tuple[int, int]], distance_table: Optional[ZoneDistanceTable] = None):
+        self.name = name
+        self.description = description
+        self.allowed = allowed # bool per zone id
+        self.blocked_crossings = blocked_crossings
+        self.mask = zone_mask_of(allowed)
+        self.compiled = compiled.restricted(allowed.tolist(), blocked_crossings) if (not allowed.all() or blocked_crossings) else compiled
+        self.distance_table = distance_table if distance_table is not None else ZoneDistanceTable.from_compiled(self.compiled)
+
+    @property
+    def key(self) -> str:
+        """
+        Identifies the profile in plan cache keys.
+        """
+        return self.name if self.name else hex(self.mask)
+
+    def reachable_from(self, zone: str) -> List[str]:
+        table = self.distance_table
+        return [z for z, d in zip(table.zones, table.row(zone)) if np.isfinite(d)]
+
+    def describe(self) -> Dict[str, Any]:
+        zones = self.compiled.zones
+        return {
+            "name": self.name,
+            "description": self.description,
+            "zone_mask": hex(self.mask),
+            "allowed_zones": int(self.allowed.sum()),
+            "blocked_zones": [zones[z] for z in np.flatnonzero(~self.allowed)],
+            "blocked_crossings": [[zones[a], zones[b]] for a, b in self.blocked_crossings]
+        }
+
+def zone_mask_of(allowed: np.ndarray) -> int:
+    """
+    Bit z set when zone id z is allowed (zone ids follow the graph's zone order).
+    """
+    mask = 0
+    for z in np.flatnonzero(allowed):
+        mask |= 1 << int(z)
+    return mask
+
+class ProgressionIndex:
+    """
+    Named progression profiles (progression.json next to adjacency.json) plus an LRU
+    of profiles for custom zone bitmasks. Named profiles are built eagerly, reusing
+    any distance table passed in by profile name.
+    """
+    def __init__(self, compiled, spec: Optional[Dict[str, Any]] = None,
+                 distance_tables: Optional[Dict[str, ZoneDistanceTable]] = None):
+        self.compiled = compiled
+        tables = distance_tables or {}
+        self.profiles = OrderedDict()
+        self.profiles[FULL_PROFILE] = ProgressionProfile(
+            FULL_PROFILE, "Every zone and crossing open", compiled,
+            np.ones(compiled.num_zones, dtype=bool), [], tables.get(FULL_PROFILE))
+        for name, entry in (spec or {}).get("profiles", {}).items():
+            if name == FULL_PROFILE:
+                continue
+            allowed, crossings = self._resolve(spec["profiles"], name, ())
+            self.profiles[name] = ProgressionProfile(name, entry.get("description", ""), compiled,
+                                                     allowed, crossings, tables.get(name))
+        self._custom = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _resolve(self, profiles: Dict[str, Any], name: str, seen: Tuple[str, ...]) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        """
+        Allowed zones and blocked crossings of a profile, merged with the ones it extends.
+        """
+        compiled = self.compiled
+        allowed = np.ones(compiled.num_zones, dtype=bool)
+        crossings = []
+        entry = profiles.get(name)
+        if entry is None:
+            print(f"Warning: Unknown progression profile '{name}' (extended by {' -> '.join(seen)})")
+            return allowed, crossings
+        if name in seen:
+            print(f"Warning: Progression profiles extend each other in a cycle: {' -> '.join(seen + (name,))}")
+            return allowed, crossings
+
+        for parent in entry.get("extends", []):
+            parent_allowed, parent_crossings = self._resolve(profiles, parent, seen + (name,))
+            allowed &= parent_allowed
+            crossings.extend(c for c in parent_crossings if c not in crossings)
+        for zone in entry.get("blocked_zones", []):
+            zone_id = compiled.zone_index.get(zone)
+            if zone_id is None:
+                print(f"Warning: Progression profile '{name}' blocks unknown zone '{zone}'")
+            else:
+                allowed[zone_id] = False
+        for a, b in entry.get("blocked_crossings", []):
+            pair = (compiled.zone_index.get(a), compiled.zone_index.get(b))
+            if None in pair:
+                print(f"Warning: Progression profile '{name}' blocks unknown crossing {a} <-> {b}")
+            elif pair not in crossings:
+                crossings.append(pair)
+        return allowed, crossings
+
+    def get(self, name: str) -> Optional[ProgressionProfile]:
+        return self.profiles.get(name)
+
+    def mask_of(self, zones: List[str]) -> int:
+        allowed = np.zeros(self.compiled.num_zones, dtype=bool)
+        for zone in zones:
+            zone_id = self.compiled.zone_index.get(zone)
+            if zone_id is not None:
+                allowed[zone_id] = True
+        return zone_mask_of(allowed)
+
+    def for_mask(self, mask: int) -> ProgressionProfile:
+        """
+        Profile allowing exactly the zones whose bit is set; cached per mask.
+        """
+        num_zones = self.compiled.num_zones
+        if mask < 0 or mask >> num_zones:
+            raise ValueError(f"Zone mask {hex(mask)} has bits beyond the {num_zones} graph zones")
+        with self._lock:
+            profile = self._custom.get(mask)
+            if profile is not None:
+                self._custom.move_to_end(mask)
+                return profile
+        allowed = np.array([(mask >> z) & 1 == 1 for z in range(num_zones)], dtype=bool)
+        profile = ProgressionProfile(None, "Custom zone mask", self.compiled, allowed, [])
+        with self._lock:
+            self._custom[mask] = profile
+            while len(self._custom) > MAX_CUSTOM_MASKS:
+                self._custom.popitem(last=False)
+        return profile
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "zones": self.compiled.zones,
+            "profiles": [profile.describe() for profile in self.profiles.values()],
+            "cached_custom_masks": len(self._custom)
+        }
+
+def progression_path_for(adjacency_file: str) -> str:
+    """
+    adjacency.json -> progression.json (same directory).
+    """
+    return os.path.join(os.path.dirname(adjacency_file), "progression.json")
+
+def load_progression_spec(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable progression file {path}: {e}")
+        return None
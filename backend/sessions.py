@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+class TrainingSession:
+    """
+    Server-side state of one training run: the original request, where the player
+    is, their EVs and the plan for what is left. Only the latest plan and a bounded
+    history of progress reports are kept, so a session's size does not grow with use.
+    """
+    HISTORY_SIZE = 50
+
+    def __init__(self, request: Any, current_zone: str, current_evs: Dict[str, int]):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.current_zone = current_zone
+        self.current_evs = dict(current_evs)
+        self.total_battles = 0
+        self.plan = None
+        self.replans = 0
+        self.history = deque(maxlen=self.HISTORY_SIZE)
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        # Progress reports for one session are applied one at a time
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "pokemon_name": self.request.pokemon_name,
+            "target_evs": self.request.target_evs,
+            "current_zone": self.current_zone,
+            "current_evs": self.current_evs,
+            "total_battles": self.total_battles,
+            "replans": self.replans,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "plan": self.plan,
+            "history": list(self.history)
+        }
+
+class SessionStore:
+    """
+    Bounded LRU of training sessions with idle eviction, same shape as PlanCache.
+    """
+    def __init__(self, max_sessions: int = 1000, idle_ttl_seconds: float = 1800):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._sessions = OrderedDict() # id -> (last_access, session)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+
+    def _evict_idle(self, now: float):
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if now - last_access <= self.idle_ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def add(self, session: TrainingSession) -> TrainingSession:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            self._sessions[session.id] = (now, session)
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[TrainingSession]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            return {
+                "active": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "created": self.created,
+                "evictions": self.evictions
+            }
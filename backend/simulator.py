@@ -0,0 +1,179 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+# EVs are capped per stat, exactly as the optimizer does
+STAT_CAP = 252
+
+DEFAULT_TRIALS = 100000
+MAX_TRIALS = 1000000
+PERCENTILES = (50, 90, 95, 99)
+
+# Trials are simulated in chunks to bound the size of the (trials x battles) draw matrices
+TRIAL_CHUNK = 65536
+# Trials with at least this many "safe" battles left are fast-forwarded with one multinomial draw
+MIN_BULK_BATTLES = 4
+MAX_BULK_ROUNDS = 64
+
+def _merge_rows(yields: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Collapses species with identical EV rows into one category (summing their weights).
+    """
+    if not len(yields):
+        return yields, weights
+    unique, inverse = np.unique(yields, axis=0, return_inverse=True)
+    merged = np.zeros(len(unique))
+    np.add.at(merged, inverse.ravel(), weights)
+    return unique, merged
+
+class SimulationStep:
+    """
+    One farm step as the simulator sees it: the zone's encounter distribution
+    (already filtered to the level band) and the stat being farmed.
+    Species are split into "useful" (give the focus stat) and the rest: a step always
+    ends on a useful battle, so the other battles are a negative binomial on top.
+    """
+    def __init__(self, zone: str, stat_index: int, yields: np.ndarray, probabilities: np.ndarray):
+        self.zone = zone
+        self.stat_index = stat_index
+        total = probabilities.sum()
+        if total > 0:
+            weights = probabilities / total
+        else:
+            weights = np.full(len(probabilities), 1.0 / max(1, len(probabilities)))
+
+        useful = yields[:, stat_index] > 0 if len(yields) else np.zeros(0, dtype=bool)
+        self.p_useful = float(weights[useful].sum())
+        self.useful_yields, self.useful_weights = _merge_rows(yields[useful], weights[useful])
+        self.other_yields, self.other_weights = _merge_rows(yields[~useful], weights[~useful])
+        if self.p_useful > 0:
+            self.useful_weights = self.useful_weights / self.useful_weights.sum()
+            self.useful_cdf = np.cumsum(self.useful_weights)
+            focus_yields = self.useful_yields[:, stat_index]
+            self.mean_focus_yield = float(self.useful_weights @ focus_yields)
+            self.max_focus_yield = float(focus_yields.max())
+        if self.p_useful < 1 and self.other_yields.any():
+            self.other_weights = self.other_weights / self.other_weights.sum()
+        else:
+            # Non-useful battles give nothing at all; only their count matters
+            self.other_yields = None
+
+def _draw_useful(step: SimulationStep, rng: np.random.Generator, shape: Tuple[int, int]) -> np.ndarray:
+    category = np.searchsorted(step.useful_cdf, rng.random(shape), side='right')
+    return np.minimum(category, len(step.useful_cdf) - 1)
+
+def _bulk_battles(step: SimulationStep, stats: np.ndarray, targets: np.ndarray, battles: np.ndarray, active: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Fast-forwards every active trial by the useful battles that cannot possibly reach
+    the target yet (need // best focus yield), drawing their category counts as one
+    multinomial instead of battle by battle. Returns the trials still short.
+    """
+    focus = step.stat_index
+    for _ in range(MAX_BULK_ROUNDS):
+        if not len(active):
+            break
+        need = targets[focus] - stats[active, focus]
+        safe = np.floor(need / step.max_focus_yield).astype(np.int64)
+        bulk = safe >= MIN_BULK_BATTLES
+        if not bulk.any():
+            break
+        rows = active[bulk]
+        if len(step.useful_weights) == 1:
+            gains = safe[bulk][:, None] * step.useful_yields[0]
+        else:
+            gains = rng.multinomial(safe[bulk], step.useful_weights) @ step.useful_yields
+        stats[rows] = np.minimum(stats[rows] + gains, STAT_CAP)
+        battles[rows] += safe[bulk]
+        active = active[stats[active, focus] < targets[focus]]
+    return active
+
+def _run_step(step: SimulationStep, stats: np.ndarray, targets: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Battles in step.zone until the focus stat reaches its target, for every trial row
+    of stats (mutated in place). Returns the battles per trial.
+    """
+    focus = step.stat_index
+    trials = len(stats)
+    reached = stats[:, focus] >= targets[focus]
+    if reached.all() or step.p_useful <= 0:
+        return np.zeros(trials, dtype=np.int64)
+
+    useful_battles = np.zeros(trials, dtype=np.int64)
+    active = _bulk_battles(step, stats, targets, useful_battles, np.flatnonzero(~reached), rng)
+
+    # The last few useful battles are drawn one by one to find the exact stopping point.
+    # Every useful battle gives at least one focus EV, so this always terminates.
+    if len(active):
+        expected = float(np.max(targets[focus] - stats[active, focus])) / step.mean_focus_yield
+        block = int(min(256, max(4, np.ceil(expected * 1.25))))
+        side_stats = [s for s in range(stats.shape[1]) if s != focus and step.useful_yields[:, s].any()]
+    while len(active):
+        draws = _draw_useful(step, rng, (len(active), block))
+        focus_gain = np.cumsum(step.useful_yields[draws, focus], axis=1)
+        need = (targets[focus] - stats[active, focus])[:, None]
+        hit = focus_gain >= need
+        done = hit.any(axis=1)
+        # Battles taken this round: up to and including the first one that reaches the target
+        taken = np.where(done, hit.argmax(axis=1) + 1, block)
+
+        stats[active, focus] += focus_gain[np.arange(len(active)), taken - 1]
+        if side_stats:
+            counted = np.arange(block)[None, :] < taken[:, None]
+            for s in side_stats:
+                stats[active, s] += (step.useful_yields[draws, s] * counted).sum(axis=1)
+        stats[active] = np.minimum(stats[active], STAT_CAP)
+        useful_battles[active] += taken
+
+        active = active[~done]
+        block = max(4, block // 2)
+
+    # Battles against species that do not give the focus stat, interleaved before the last useful one
+    other_battles = np.zeros(trials, dtype=np.int64)
+    fought = useful_battles > 0
+    if step.p_useful < 1 and fought.any():
+        other_battles[fought] = rng.negative_binomial(useful_battles[fought], step.p_useful)
+        if step.other_yields is not None:
+            rows = np.flatnonzero(other_battles > 0)
+            gains = rng.multinomial(other_battles[rows], step.other_weights) @ step.other_yields
+            stats[rows] = np.minimum(stats[rows] + gains, STAT_CAP)
+    return useful_battles + other_battles
+
+def simulate_battles(steps: List[SimulationStep], start_stats: np.ndarray, targets: np.ndarray, trials: int = DEFAULT_TRIALS, seed: Optional[int] = None, battle_budget: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Monte Carlo over a plan's farm steps: each battle draws a species from the zone's
+    encounter distribution, and each step lasts until its focus stat hits the target.
+    Returns the battle-count distribution, the probability that the stats after the last
+    step meet every target and the probability of doing so within battle_budget.
+    """
+    rng = np.random.default_rng(seed)
+    totals = np.empty(trials, dtype=np.int64)
+    all_reached = np.empty(trials, dtype=bool)
+    step_battles = np.zeros(len(steps))
+
+    for start in range(0, trials, TRIAL_CHUNK):
+        n = min(TRIAL_CHUNK, trials - start)
+        stats = np.tile(start_stats.astype(np.float64), (n, 1))
+        chunk_battles = np.zeros(n, dtype=np.int64)
+        for i, step in enumerate(steps):
+            battles = _run_step(step, stats, targets, rng)
+            chunk_battles += battles
+            step_battles[i] += battles.sum()
+        totals[start:start + n] = chunk_battles
+        # The whole requested spread, not only each step's focus stat
+        all_reached[start:start + n] = np.all(stats >= targets, axis=1)
+
+    summary = {
+        "trials": trials,
+        "seed": seed,
+        "expected_battles": float(totals.mean()),
+        "std_battles": float(totals.std()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(totals, PERCENTILES))},
+        "prob_targets_reached": float(all_reached.mean()),
+        "steps": [
+            {"zone": step.zone, "expected_battles": float(total / trials)}
+            for step, total in zip(steps, step_battles)
+        ]
+    }
+    if battle_budget is not None:
+        summary["battle_budget"] = battle_budget
+        summary["prob_within_budget"] = float((all_reached & (totals <= battle_budget)).mean())
+    return summary
@@ -0,0 +1,116 @@
+import csv
+import json
+import os
+import time
+from typing import Any, Dict, List
+from encounter_store import EncounterStore
+from zone_aliases import ZoneAliasIndex
+
+# CSV column -> pokemon column, as db/init/05_load_centralized_data.py loads them
+POKEMON_EV_FIELDS = {
+    "ev_hp": "E_HP", "ev_attack": "E_Attack", "ev_defense": "E_Defense",
+    "ev_sp_attack": "E_SP_Attack", "ev_sp_defense": "E_SP_Defense", "ev_speed": "E_Speed"
+}
+
+class SnapshotDatabase:
+    """
+    Read-only, in-process copy of the pokemon, zones and encounters tables built
+    straight from db/data_sources (pokedex.csv, pokemon_locations.csv, adjacency.json,
+    name_mapping.json) with the same rules as the 05 loader. Answers the async_database
+    get_* queries from memory; level-banded lookups go through an EncounterStore.
+    """
+    def __init__(self, pokemon: List[Dict[str, Any]], zones: List[Dict[str, Any]],
+                 encounters: List[Dict[str, Any]], unresolved: Dict[str, int]):
+        self.pokemon = sorted(pokemon, key=lambda p: p['name'])
+        self.zones = sorted(zones, key=lambda z: z['name'])
+        self.encounters = encounters # get_all_encounters() rows, in load order
+        self.unresolved = unresolved # location -> skipped rows
+        self.encounter_store = EncounterStore.from_rows(encounters)
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_sources(cls, data_dir: str) -> 'SnapshotDatabase':
+        pokemon, by_dex = [], set()
+        with open(os.path.join(data_dir, 'pokedex.csv'), 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                try:
+                    number = int(row['No'])
+                    entry = {
+                        "pokedex_number": number, "name": row['Name'],
+                        "type1": row['Type1'], "type2": row['Type2'] or None,
+                        **{col: int(row[field] or 0) for col, field in POKEMON_EV_FIELDS.items()}
+                    }
+                except ValueError as e:
+                    print(f"Warning: Skipping pokedex row {row.get('Name', 'Unknown')}: {e}")
+                    continue
+                # ON CONFLICT (pokedex_number) DO NOTHING; ids follow insertion order like SERIAL
+                if number not in by_dex:
+                    by_dex.add(number)
+                    pokemon.append({"id": len(pokemon) + 1, **entry})
+
+        with open(os.path.join(data_dir, 'adjacency.json'), 'r', encoding='utf-8') as f:
+            adjacency = json.load(f)
+        zone_codes = set(adjacency)
+        for neighbors in adjacency.values():
+            zone_codes.update(neighbors)
+            for connections in neighbors.values():
+                zone_codes.update(c['to'] for c in connections)
+        zones = [{"id": i + 1, "code": code, "name": code, "region": "Kanto", "zone_type": None}
+                 for i, code in enumerate(sorted(zone_codes))]
+
+        mapping_path = os.path.join(data_dir, 'name_mapping.json')
+        name_mapping = {}
+        if os.path.exists(mapping_path):
+            with open(mapping_path, 'r', encoding='utf-8') as f:
+                name_mapping = json.load(f)
+        aliases = ZoneAliasIndex([z['code'] for z in zones])
+        aliases.add_name_mapping(name_mapping)
+
+        by_name = {p['name'].lower(): p for p in pokemon}
+        encounters, unresolved = [], {}
+        with open(os.path.join(data_dir, 'pokemon_locations.csv'), 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                p = by_name.get(row['Pokemon'].strip().lower())
+                location = row['Ubicacion'].strip()
+                codes = aliases.resolve_all(location)
+                if not codes:
+                    unresolved[location] = unresolved.get(location, 0) + 1
+                if p is None or not codes:
+                    continue
+                try:
+                    rate = float(row['Tasa_Aparicion'])
+                except ValueError:
+                    rate = 0.0
+                for code in codes:
+                    # The CSV has no levels: min/max/avg_level stay NULL as in Postgres
+                    encounters.append({
+                        "code": code, "name": p['name'], "encounter_method": row['Metodo'],
+                        "min_level": None, "max_level": None, "avg_level": None,
+                        "probability_percent": rate,
+                        **{col: p[col] for col in POKEMON_EV_FIELDS}
+                    })
+        if unresolved:
+            print(f"Warning: {len(unresolved)} locations did not resolve to a zone "
+                  f"({sum(unresolved.values())} rows skipped)")
+        return cls(pokemon, zones, encounters, unresolved)
+
+    def get_all_pokemon(self) -> List[Dict[str, Any]]:
+        return self.pokemon
+
+    def get_all_zones(self) -> List[Dict[str, Any]]:
+        return self.zones
+
+    def get_all_encounters(self) -> List[Dict[str, Any]]:
+        return self.encounters
+
+    def get_zone_encounters(self, zone_code: str, pokemon_level: int = 50) -> List[Dict[str, Any]]:
+        return self.encounter_store.encounters(zone_code, pokemon_level)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pokemon": len(self.pokemon),
+            "zones": len(self.zones),
+            "encounters": len(self.encounters),
+            "unresolved_locations": len(self.unresolved),
+            "loaded_at": self.loaded_at
+        }
@@ -0,0 +1,118 @@
+import math
+from typing import Any, Dict, List, Sequence
+import numpy as np
+
+# EVs are capped per stat, exactly as the optimizer does
+STAT_CAP = 252
+# Same iteration limit as the greedy loop in EVOptimizer.iter_plan
+MAX_STEPS = 10
+# Zones whose average focus yield is at or below this are not considered (same as the greedy)
+MIN_USEFUL_YIELD = 0.1
+
+def expand_range(start: float, stop: float, step: float) -> List[float]:
+    """
+    Inclusive arithmetic range; values are rounded so 0.1 steps do not drift.
+    """
+    if step <= 0:
+        raise ValueError(f"Range step must be positive (got {step})")
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [round(start + i * step, 10) for i in range(max(0, count))]
+
+def pareto_front(distances: Sequence[float], battles: Sequence[float]) -> List[int]:
+    """
+    Indices of the points not dominated on (distance, battles), both minimized,
+    sorted by distance. Of several identical points only the first is kept.
+    """
+    order = sorted(range(len(distances)), key=lambda i: (distances[i], battles[i]))
+    front = []
+    best_battles = math.inf
+    for i in order:
+        if battles[i] < best_battles:
+            front.append(i)
+            best_battles = battles[i]
+    return front
+
+def run_greedy_sweep(distance_matrix: np.ndarray, start: int, lambdas: np.ndarray,
+                     multipliers: np.ndarray, bonuses: np.ndarray, level_group: np.ndarray,
+                     group_yields: np.ndarray, group_valid: np.ndarray, group_targets: np.ndarray,
+                     start_stats: np.ndarray, targets: np.ndarray, stat_order: List[int]) -> Dict[str, Any]:
+    """
+    Runs the greedy planner for S scenarios in lockstep, one vectorized scoring pass
+    per step for all of them.
+
+    distance_matrix: (Z, Z) zone distances shared by every scenario.
+    lambdas, multipliers/bonuses (S, 6) and level_group (S,) describe each scenario.
+    group_yields (G, Z, 6) and group_valid (G, Z) are the average yields per level group;
+    group_targets (G, Z, 6 focus, 6) the per-kill EVs of the Pokemon farmed in each zone
+    for each focus stat (NaN where no encounter gives that stat).
+    stat_order lists the targeted stat columns in request order (ties resolve like the greedy).
+    stopped marks scenarios the greedy gave up on: no zone left, or nothing to battle there.
+    """
+    scenarios = len(lambdas)
+    order = np.array(stat_order, dtype=np.int64)
+    lam = lambdas[:, None, None]
+    effective = (group_yields[level_group] * multipliers[:, None, :] + bonuses[:, None, :])[:, :, order]
+    zone_ok = group_valid[level_group]
+
+    location = np.full(scenarios, start, dtype=np.int64)
+    stats = np.tile(start_stats.astype(np.float64), (scenarios, 1))
+    total_distance = np.zeros(scenarios, dtype=np.int64)
+    total_battles = np.zeros(scenarios, dtype=np.int64)
+    active = np.ones(scenarios, dtype=bool)
+    stopped = np.zeros(scenarios, dtype=bool)
+    steps = [[] for _ in range(scenarios)]
+    rows = np.arange(scenarios)
+
+    for _ in range(MAX_STEPS):
+        needs = (targets[order] - stats[:, order])
+        needed = needs > 0
+        active &= needed.any(axis=1)
+        if not active.any():
+            break
+
+        distances = distance_matrix[location]
+        usable = (zone_ok & np.isfinite(distances))[:, :, None] & (effective > MIN_USEFUL_YIELD) & needed[:, None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = lam * distances[:, :, None] + (1 - lam) * (needs[:, None, :] / effective) * 10
+        scores = np.where(usable & active[:, None, None], scores, np.inf)
+
+        flat = scores.reshape(scenarios, -1)
+        best = np.argmin(flat, axis=1)
+        found = np.isfinite(flat[rows, best])
+        # No zone left to farm the remaining needs
+        stopped |= active & ~found
+        active &= found
+        if not active.any():
+            break
+
+        zone, column = np.divmod(best, len(order))
+        stat = order[column]
+        travel = np.where(active, distances[rows, zone], 0).astype(np.int64)
+        moved = active & (travel > 0)
+        total_distance += travel
+        location = np.where(moved, zone, location)
+
+        per_kill = group_targets[level_group, zone, stat] * multipliers + bonuses
+        farmable = active & ~np.isnan(per_kill[:, 0])
+        focus_yield = per_kill[rows, stat]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            kills = np.where(farmable, np.ceil(needs[rows, column] / focus_yield), 0).astype(np.int64)
+        stats = np.where(farmable[:, None], np.minimum(stats + kills[:, None] * per_kill, STAT_CAP), stats)
+        total_battles += kills
+
+        for s in np.flatnonzero(farmable):
+            steps[s].append((int(zone[s]), int(stat[s]), int(travel[s]), int(kills[s])))
+        # The greedy stops when the chosen zone has nothing to battle for the stat: plan()
+        # still travels there but emits no farm step, so only total_distance counts it
+        stopped |= active & ~farmable
+        active &= farmable
+
+    reached = np.all(stats[:, order] >= targets[order], axis=1)
+    return {
+        "total_distance": total_distance,
+        "total_battles": total_battles,
+        "final_stats": stats,
+        "reached": reached,
+        "stopped": stopped,
+        "steps": steps
+    }
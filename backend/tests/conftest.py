@@ -0,0 +1,87 @@
+import csv
+import os
+import sys
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INIT_DIR = os.path.join(BACKEND_DIR, "..", "db", "init")
+sys.path.insert(0, BACKEND_DIR)
+
+from encounter_store import EV_COLUMNS, EncounterStore
+from graph import PokemonGraph
+from optimizer import EVOptimizer
+
+# Same tiers as db/init/02_load_data.py
+RARITY_PERCENT = {"Common": 40.0, "Uncommon": 20.0, "Rare": 10.0, "Very Rare": 5.0}
+POKEDEX_EV_FIELDS = dict(zip(EV_COLUMNS, ("E_HP", "E_Attack", "E_Defense", "E_SP_Attack", "E_SP_Defense", "E_Speed")))
+
+def _level_range(text):
+    text = text.strip()
+    try:
+        if "-" in text:
+            low, high = (int(part) for part in text.split("-"))
+        else:
+            low = high = int(text)
+    except ValueError:
+        return None
+    return low, high
+
+def load_encounter_rows():
+    """
+    get_all_encounters()-shaped rows from the per-location CSVs that 02_load_data.py
+    loads (the ones with levels), so the optimizer runs without Postgres.
+    """
+    pokemon = {}
+    with open(os.path.join(INIT_DIR, "Pokedex_Limpiado.csv"), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            pokemon[row["Name"]] = {col: int(row[field]) for col, field in POKEDEX_EV_FIELDS.items()}
+
+    rows = []
+    locations_dir = os.path.join(INIT_DIR, "locations", "csv")
+    for filename in sorted(os.listdir(locations_dir)):
+        with open(os.path.join(locations_dir, filename), encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                evs = pokemon.get(row["Pokémon"].strip())
+                levels = _level_range(row["Nivel"])
+                if evs is None or levels is None:
+                    continue
+                rows.append({
+                    "code": filename[:-len(".csv")], "name": row["Pokémon"].strip(),
+                    "encounter_method": row["Método"].strip(),
+                    "min_level": levels[0], "max_level": levels[1], "avg_level": sum(levels) / 2,
+                    "probability_percent": RARITY_PERCENT.get(row["Rareza"].strip(), 10.0),
+                    **evs
+                })
+    return rows
+
+@pytest.fixture(scope="session")
+def graph():
+    return PokemonGraph(os.path.join(BACKEND_DIR, "adjacency.json"))
+
+@pytest.fixture(scope="session")
+def encounter_rows():
+    return load_encounter_rows()
+
+@pytest.fixture(scope="session")
+def encounter_store(encounter_rows):
+    return EncounterStore.from_rows(encounter_rows)
+
+@pytest.fixture
+def optimizer(graph, encounter_store):
+    return EVOptimizer(graph, encounter_store=encounter_store)
+
+@pytest.fixture(scope="session")
+def api(encounter_store):
+    """
+    The FastAPI app (main) with the encounter store loaded from the CSVs; main reads its
+    data files relative to the backend directory, as in the container.
+    """
+    from fastapi.testclient import TestClient
+    cwd = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    main.optimizer.reload(encounter_store=encounter_store)
+    return main, TestClient(main.app)
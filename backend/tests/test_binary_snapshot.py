@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pytest
+from binary_snapshot import ENCOUNTER_ARRAYS, GRAPH_ARRAYS, BinarySnapshot, SnapshotFormatError, build_snapshot, write_snapshot
+from conftest import BACKEND_DIR
+from encounter_store import EV_COLUMNS
+from graph import PokemonGraph
+from optimizer import EVOptimizer
+from snapshot_database import SnapshotDatabase
+from zone_aliases import ZoneAliasIndex
+
+DATA_SOURCES_DIR = os.path.join(BACKEND_DIR, "..", "db", "data_sources")
+
+@pytest.fixture(scope="module")
+def sources(graph):
+    catalog = SnapshotDatabase.from_sources(DATA_SOURCES_DIR)
+    zones = catalog.get_all_zones()
+    aliases = ZoneAliasIndex.build(graph.distance_table.zones, os.path.join(DATA_SOURCES_DIR, "name_mapping.json"), zones)
+    return aliases, catalog.get_all_pokemon(), zones
+
+@pytest.fixture(scope="module")
+def snapshot(tmp_path_factory, graph, encounter_store, sources):
+    aliases, pokemon, zones = sources
+    path = str(tmp_path_factory.mktemp("snapshot") / "data.snapshot")
+    write_snapshot(path, *build_snapshot(graph, aliases, pokemon, zones, encounter_store, "test"))
+    return BinarySnapshot(path)
+
+def test_graph_round_trip(graph, snapshot):
+    restored = PokemonGraph.from_snapshot(snapshot)
+    for name in GRAPH_ARRAYS:
+        assert list(getattr(restored.compiled, name)) == list(getattr(graph.compiled, name)), name
+    assert restored.distance_table.zones == graph.distance_table.zones
+    np.testing.assert_array_equal(restored.distance_table.matrix, graph.distance_table.matrix)
+    assert restored.progression.profiles.keys() == graph.progression.profiles.keys()
+    for name, profile in graph.progression.profiles.items():
+        np.testing.assert_array_equal(restored.progression.profiles[name].distance_table.matrix,
+                                      profile.distance_table.matrix)
+
+def test_data_round_trip(encounter_store, sources, snapshot):
+    aliases, pokemon, zones = sources
+    assert snapshot.zone_aliases().to_dict() == aliases.to_dict()
+    assert snapshot.zone_rows() == zones
+    assert snapshot.pokemon_rows() == [
+        {key: p[key] for key in ("id", "pokedex_number", "name", "type1", "type2", *EV_COLUMNS)}
+        for p in sorted(pokemon, key=lambda p: p["name"])
+    ]
+    store = snapshot.encounter_store()
+    for name in ENCOUNTER_ARRAYS:
+        np.testing.assert_array_equal(getattr(store, name), getattr(encounter_store, name), err_msg=name)
+    for level in (5, 20, 50, 100):
+        assert store.zone_yields(level) == encounter_store.zone_yields(level)
+
+def test_plans_from_snapshot_match(graph, encounter_store, sources, snapshot):
+    aliases, _, _ = sources
+    original = EVOptimizer(graph, aliases=aliases, encounter_store=encounter_store)
+    restored = EVOptimizer(PokemonGraph.from_snapshot(snapshot), aliases=snapshot.zone_aliases(),
+                           encounter_store=snapshot.encounter_store())
+    request = {
+        "start_zone": "Ruta 1", "current_evs": {}, "target_evs": {"Speed": 252, "Attack": 100},
+        "accessible_zones": [], "held_item": "Power Anklet", "has_pokerus": False,
+        "lambda_penalty": 0.5, "pokemon_level": 20
+    }
+    assert restored.plan(**request) == original.plan(**request)
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.snapshot"
+    path.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(SnapshotFormatError):
+        BinarySnapshot(str(path))
@@ -0,0 +1,73 @@
+import csv
+import io
+import sys
+from conftest import INIT_DIR
+
+sys.path.insert(0, INIT_DIR)
+from bulk_load import CsvRowStream, copy_rows, diff_rows
+
+ROWS = [(1, "Bulbasaur", None, ""), (2, 'Mr. "Mime", Jr', 1.5, "a\nb")] * 2000
+
+class FakeCursor:
+    """
+    Just enough of a psycopg2 cursor for bulk_load: load_row_hashes lives in a dict
+    and COPY reads the stream in small chunks, as copy_expert does.
+    """
+    def __init__(self):
+        self.row_hashes = {} # source -> {row_key: row_hash}
+        self.copied = {}     # table -> CSV text
+        self._result = []
+
+    def execute(self, sql, params=None):
+        self._result = []
+        if sql.startswith("SELECT row_key, row_hash FROM load_row_hashes"):
+            self._result = list(self.row_hashes.get(params[0], {}).items())
+        elif sql.startswith("DELETE FROM load_row_hashes"):
+            for key in params[1]:
+                del self.row_hashes[params[0]][key]
+        elif "INSERT INTO load_row_hashes" in sql:
+            staged = csv.reader(io.StringIO(self.copied["row_hashes_staging"]))
+            self.row_hashes.setdefault(params[0], {}).update(dict(staged))
+
+    def copy_expert(self, sql, stream):
+        chunks = iter(lambda: stream.read(1000), "")
+        self.copied[sql.split()[1]] = "".join(chunks)
+
+    def fetchall(self):
+        return self._result
+
+def test_stream_renders_csv_with_nulls():
+    stream = CsvRowStream(iter(ROWS))
+    text = "".join(iter(lambda: stream.read(333), ""))
+    assert stream.row_count == len(ROWS)
+    assert list(csv.reader(io.StringIO(text))) == [
+        [str(number), name, "\\N" if value is None else str(value), empty] for number, name, value, empty in ROWS
+    ]
+    assert CsvRowStream(iter(ROWS)).read() == text
+
+def test_copy_rows_counts_streamed_rows():
+    cur = FakeCursor()
+    assert copy_rows(cur, "pokemon_staging", ("id", "name"), ((i, f"p{i}") for i in range(10))) == 10
+    assert cur.copied["pokemon_staging"].splitlines()[-1] == "9,p9"
+    assert copy_rows(cur, "pokemon_staging", ("id", "name"), []) == 0
+
+def test_diff_rows_between_loads():
+    cur = FakeCursor()
+    rows = {f"zone{i}": (f"zone{i}", i) for i in range(5)}
+    first = diff_rows(cur, "test.zones", rows)
+    assert first.initial and first.changed == rows and first.deleted == []
+    first.record(cur)
+
+    same = diff_rows(cur, "test.zones", rows)
+    assert not same and not same.initial
+    assert same.summary() == "0 new/changed, 0 removed, 5 unchanged"
+
+    rows = dict(rows, zone1=("zone1", 10), zone5=("zone5", 5))
+    del rows["zone2"]
+    diff = diff_rows(cur, "test.zones", rows)
+    assert diff.changed == {"zone1": ("zone1", 10), "zone5": ("zone5", 5)}
+    assert diff.deleted == ["zone2"]
+    diff.record(cur)
+    assert not diff_rows(cur, "test.zones", rows)
+    # Sources are tracked separately
+    assert diff_rows(cur, "test.other", rows).initial
@@ -0,0 +1,53 @@
+import heapq
+import math
+
+def dijkstra_zone_distances(adjacency, start):
+    """
+    Reference distances: plain Dijkstra over (zone, label) states read straight from
+    adjacency.json, crossing to the zone a label is named after at no cost.
+    """
+    zone_distances = {}
+    settled = set()
+    queue = [(0, start, label) for label in adjacency[start]]
+    heapq.heapify(queue)
+    while queue:
+        distance, zone, label = heapq.heappop(queue)
+        if (zone, label) in settled:
+            continue
+        settled.add((zone, label))
+        zone_distances.setdefault(zone, distance)
+        for edge in adjacency[zone].get(label, []):
+            if edge['dist'] is not None:
+                heapq.heappush(queue, (distance + edge['dist'], zone, edge['to']))
+        if label in adjacency:
+            heapq.heappush(queue, (distance, label, zone))
+    zone_distances[start] = 0
+    return zone_distances
+
+def test_distance_table_matches_dijkstra(graph):
+    table = graph.distance_table
+    for start in table.zones:
+        expected = dijkstra_zone_distances(graph.adjacency_data, start)
+        for zone in table.zones:
+            assert table.distance(start, zone) == expected.get(zone, math.inf), (start, zone)
+
+def test_route_distances_match_table(graph):
+    table = graph.distance_table
+    for start in table.zones:
+        for end in table.zones:
+            route = graph.route(start, end)
+            expected = table.distance(start, end)
+            if math.isinf(expected):
+                assert route is None, (start, end)
+                continue
+            assert route["distance"] == expected, (start, end)
+            assert route["steps"][-1]["cumulative"] == expected
+            assert route["zones"][0] == start and route["zones"][-1] == end
+
+def test_area_overlay_distances_match_table(graph):
+    table = graph.distance_table
+    for start in table.zones:
+        for end in table.zones:
+            expected = table.distance(start, end)
+            answer = graph.area_distance(start, end)
+            assert answer["distance"] == (None if math.isinf(expected) else expected), (start, end)
@@ -0,0 +1,122 @@
+import math
+import random
+import pytest
+from optimizer import STATS
+from sweep import MAX_STEPS, STAT_CAP
+
+HELD_ITEMS = [None, "Macho Brace", "Power Anklet", "Power Lens"]
+LEVELS = [10, 20, 30, 40]
+
+def random_requests(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        targets = {stat: rng.choice([20, 100, 252]) for stat in rng.sample(STATS, rng.randint(1, 3))}
+        current = {stat: rng.choice([0, 0, 10, 50]) for stat in STATS}
+        yield {
+            "current_evs": current, "target_evs": targets,
+            "held_item": rng.choice(HELD_ITEMS), "has_pokerus": rng.random() < 0.5,
+            "lambda_penalty": rng.choice([0.1, 0.5, 0.9]), "pokemon_level": rng.choice(LEVELS),
+            "start_index": rng.randrange(1 << 16)
+        }
+
+def plan_request(optimizer, request):
+    zones = optimizer.graph.distance_table.zones
+    kwargs = {key: value for key, value in request.items() if key != "start_index"}
+    return dict(kwargs, start_zone=zones[request["start_index"] % len(zones)], accessible_zones=[])
+
+def scalar_greedy(optimizer, start_zone, current_evs, target_evs, held_item, has_pokerus, lambda_penalty, pokemon_level):
+    """
+    Reference greedy: scores every (zone, stat) pair one at a time, in zone then
+    request order, with the first strictly lower score winning.
+    """
+    table = optimizer.graph.distance_table
+    store = optimizer.encounter_store
+    zone_yields = dict(zip(table.zones, optimizer.aliases.match_sources(store.zone_yields(pokemon_level))))
+    stats = dict(current_evs)
+    location = start_zone
+    decisions, total_distance, total_encounters = [], 0, 0
+    for _ in range(MAX_STEPS):
+        needs = {stat: target - stats.get(stat, 0) for stat, target in target_evs.items() if stats.get(stat, 0) < target}
+        if not needs:
+            break
+        best, best_score = None, math.inf
+        for zone in table.zones:
+            distance = table.distance(location, zone)
+            if zone_yields[zone] is None or math.isinf(distance):
+                continue
+            for stat, need in needs.items():
+                effective = optimizer._effective_yield(zone_yields[zone].get(stat, 0), stat, held_item, has_pokerus)
+                if effective <= 0.1:
+                    continue
+                score = lambda_penalty * distance + (1 - lambda_penalty) * (need / effective) * 10
+                if score < best_score:
+                    best, best_score = (zone, stat), score
+        if best is None:
+            break
+        zone, stat = best
+        # As in the original loop, a zero-distance move does not change the location
+        distance = table.distance(location, zone)
+        if distance > 0:
+            total_distance += distance
+            location = zone
+        step = optimizer._farm_step(zone, stat, needs[stat], stats, held_item, has_pokerus, pokemon_level, store)
+        if step is None:
+            break
+        decisions.append((zone, stat, step["count"]))
+        total_encounters += step["count"]
+        stats = {name: min(value, STAT_CAP) for name, value in stats.items()}
+    return decisions, total_distance, total_encounters
+
+def farm_steps(result):
+    return [(step["zone"], step["stat_focus"], step["count"]) for step in result["path"] if step["type"] == "farm"]
+
+@pytest.mark.parametrize("request_index", range(40))
+def test_vectorized_greedy_matches_scalar(optimizer, request_index):
+    request = plan_request(optimizer, list(random_requests(40, seed=1))[request_index])
+    result = optimizer.plan(**request)
+    expected = scalar_greedy(optimizer, request["start_zone"], request["current_evs"], request["target_evs"],
+                             request["held_item"], request["has_pokerus"], request["lambda_penalty"],
+                             request["pokemon_level"])
+    assert (farm_steps(result), result["total_distance"], result["total_encounters"]) == expected
+
+def test_exact_never_worse_than_greedy(optimizer):
+    improved = 0
+    for request in random_requests(30, seed=2):
+        request = plan_request(optimizer, request)
+        greedy = optimizer.plan(**request, strategy="greedy")
+        exact = optimizer.plan(**request, strategy="exact", time_budget_ms=50)
+        greedy_rank = optimizer._plan_rank(greedy, request["target_evs"], request["lambda_penalty"])
+        exact_rank = optimizer._plan_rank(exact, request["target_evs"], request["lambda_penalty"])
+        assert exact_rank <= greedy_rank, request
+        improved += exact_rank < greedy_rank
+    # The search should find something better than the greedy at least sometimes
+    assert improved > 0
+
+def test_sweep_matches_plan(optimizer):
+    lambdas, pokerus_options = [0.0, 0.5, 1.0], [False, True]
+    for request in random_requests(8, seed=3):
+        request = plan_request(optimizer, request)
+        base = {key: request[key] for key in ("start_zone", "current_evs", "target_evs", "accessible_zones")}
+        sweep = optimizer.sweep(**base, lambda_penalties=lambdas, held_items=HELD_ITEMS,
+                                pokerus_options=pokerus_options, pokemon_levels=LEVELS)
+        assert sweep["scenario_count"] == len(lambdas) * len(HELD_ITEMS) * len(pokerus_options) * len(LEVELS)
+        for lam, item, pokerus, level, distance, encounters, reached, plan_id in sweep["rows"]:
+            result = optimizer.plan(**base, held_item=item, has_pokerus=pokerus, lambda_penalty=lam, pokemon_level=level)
+            swept = sweep["plans"][plan_id]
+            assert (distance, encounters) == (result["total_distance"], result["total_encounters"])
+            assert [(step["zone"], step["stat_focus"], step["count"]) for step in swept["path"]] == farm_steps(result)
+            assert reached == all(result["final_stats"].get(stat, 0) >= target
+                                  for stat, target in request["target_evs"].items())
+
+def test_exact_stream_replays_the_plan(optimizer):
+    for request in random_requests(10, seed=2):
+        request = plan_request(optimizer, request)
+        events = list(optimizer.iter_plan(**request, strategy="exact", time_budget_ms=50))
+        names = [event for event, _ in events]
+        result = events[-1][1]
+        assert names[-1] == "result" and names.count("result") == 1
+        # The greedy steps come before the search; a "replace" starts the exact plan's steps over
+        start = names.index("replace") + 1 if "replace" in names else 0
+        if "progress" in names:
+            assert "step" in names[:names.index("progress")]
+        assert [payload for event, payload in events[start:] if event == "step"] == result["path"]
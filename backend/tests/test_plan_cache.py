@@ -0,0 +1,73 @@
+import plan_cache
+from plan_cache import PlanCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(plan_cache.time, "monotonic", clock)
+    cache = PlanCache(max_entries=4, ttl_seconds=10)
+    cache.put("key", {"total_distance": 3})
+    clock.now += 10
+    assert cache.get("key") == {"total_distance": 3}
+    clock.now += 0.5
+    assert cache.get("key") is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 1)
+
+def test_least_recently_used_is_evicted():
+    cache = PlanCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+def test_values_are_copied():
+    cache = PlanCache()
+    value = {"path": [{"zone": "Route1"}]}
+    cache.put("key", value)
+    value["path"].append({"zone": "Route2"})
+    cached = cache.get("key")
+    cached["path"].clear()
+    assert cache.get("key") == {"path": [{"zone": "Route1"}]}
+
+def test_disabled_cache_stores_nothing():
+    cache = PlanCache(max_entries=0)
+    cache.put("key", 1)
+    assert cache.get("key") is None
+
+def test_equivalent_requests_share_a_key(optimizer):
+    base = {
+        "start_zone": "Route1", "current_evs": {"Speed": 10}, "target_evs": {"Speed": 252},
+        "accessible_zones": ["Route2", "Route1"], "held_item": None, "has_pokerus": False,
+        "lambda_penalty": 0.5, "pokemon_level": 20, "strategy": "greedy", "time_budget_ms": None
+    }
+    key = optimizer._plan_cache_key(**base)
+    assert optimizer._plan_cache_key(**dict(base, current_evs={"Speed": 10, "Attack": 0},
+                                            target_evs={"Speed": 252, "HP": 0})) == key
+    assert optimizer._plan_cache_key(**dict(base, accessible_zones=["Route1", "Route2", "Route1"])) == key
+    # The budget only matters to the exact strategy
+    assert optimizer._plan_cache_key(**dict(base, time_budget_ms=500)) == key
+    exact = dict(base, strategy="exact", time_budget_ms=100)
+    assert optimizer._plan_cache_key(**exact) != optimizer._plan_cache_key(**dict(exact, time_budget_ms=500))
+    assert optimizer._plan_cache_key(**dict(base, lambda_penalty=0.6)) != key
+
+def test_cached_plan_matches_fresh_plan(optimizer):
+    request = {
+        "start_zone": "Route1", "current_evs": {"Speed": 10, "Attack": 0}, "target_evs": {"Speed": 100},
+        "accessible_zones": [], "held_item": "Power Anklet", "has_pokerus": True,
+        "lambda_penalty": 0.5, "pokemon_level": 20
+    }
+    fresh = optimizer.plan(**request)
+    assert optimizer.plan_cache.hits == 0
+    cached = optimizer.plan(**dict(request, current_evs={"Speed": 10, "HP": 0}))
+    assert optimizer.plan_cache.hits == 1
+    assert cached["path"] == fresh["path"]
+    assert cached["final_stats"]["HP"] == 0
@@ -0,0 +1,86 @@
+import asyncio
+import gzip
+import json
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+from prerendered import PrerenderedCache, PrerenderedResponse
+
+PAYLOAD = {"zones": [{"code": "Route1", "name": "Ruta 1", "ev_speed": 1.5}], "count": 1}
+
+def request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/",
+                    "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]})
+
+def test_body_matches_json_response():
+    rendered = PrerenderedResponse(PAYLOAD, 1)
+    assert rendered.body == JSONResponse(PAYLOAD).body
+    assert gzip.decompress(rendered.gzip_body) == rendered.body
+    assert rendered.etag != rendered.gzip_etag
+
+def test_etag_per_encoding():
+    rendered = PrerenderedResponse(PAYLOAD, 1)
+    plain = rendered.respond(request())
+    assert (plain.status_code, plain.body, plain.headers["etag"]) == (200, rendered.body, rendered.etag)
+    assert "content-encoding" not in plain.headers
+    compressed = rendered.respond(request(accept_encoding="br, GZIP"))
+    assert (compressed.body, compressed.headers["etag"]) == (rendered.gzip_body, rendered.gzip_etag)
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+
+def test_if_none_match():
+    rendered = PrerenderedResponse(PAYLOAD, 1)
+    for tag in (rendered.etag, rendered.gzip_etag, f"W/{rendered.etag}", f'"other", {rendered.gzip_etag}', "*"):
+        response = rendered.respond(request(if_none_match=tag))
+        assert (response.status_code, response.body) == (304, b""), tag
+        assert response.headers["etag"] == rendered.etag
+    assert rendered.respond(request(if_none_match='"other"')).status_code == 200
+    assert PrerenderedResponse(dict(PAYLOAD, count=2), 1).etag != rendered.etag
+
+def test_cache_rebuilds_once_per_version():
+    cache = PrerenderedCache()
+    builds = []
+
+    async def build():
+        builds.append(len(builds))
+        await asyncio.sleep(0)
+        return {"build": len(builds)}
+
+    async def run():
+        first = await asyncio.gather(*(cache.get("zones", 1, build) for _ in range(5)))
+        second = await cache.get("zones", 2, build)
+        return first, second, await cache.get("zones", 2, build)
+
+    first, second, again = asyncio.run(run())
+    assert len(builds) == 2
+    assert all(entry is first[0] for entry in first)
+    assert json.loads(second.body) == {"build": 2}
+    assert again is second
+    assert (cache.builds, cache.hits) == (2, 5)
+
+def test_failed_build_caches_nothing():
+    cache = PrerenderedCache()
+
+    async def fail():
+        raise RuntimeError("database unavailable")
+
+    async def build():
+        return PAYLOAD
+
+    async def run():
+        try:
+            await cache.get("pokemon", 1, fail)
+        except RuntimeError:
+            pass
+        return await cache.get("pokemon", 1, build)
+
+    assert json.loads(asyncio.run(run()).body) == PAYLOAD
+
+def test_graph_endpoint_revalidates(api):
+    main, client = api
+    response = client.get("/api/graph")
+    assert response.status_code == 200
+    assert response.json() == main.graph.adjacency_data
+    etag = response.headers["etag"]
+    cached = client.get("/api/graph", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
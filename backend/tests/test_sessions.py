@@ -0,0 +1,83 @@
+import pytest
+import sessions
+from sessions import SessionStore, TrainingSession
+
+REQUEST = {
+    "pokemon_name": "Pikachu", "start_zone": "Ruta 1", "target_evs": {"Speed": 100},
+    "lambda_penalty": 0.5, "pokemon_level": 20
+}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def farm_zones(plan):
+    return [step["zone"] for step in plan["path"] if step["type"] == "farm"]
+
+@pytest.fixture
+def session(api):
+    _, client = api
+    response = client.post("/api/sessions", json=REQUEST)
+    assert response.status_code == 200
+    return response.json()
+
+def test_create_plans_from_the_start(api, session):
+    _, client = api
+    assert session["current_zone"] == "Route1"
+    assert session["replans"] == 1
+    plan = client.post("/api/optimize", json=REQUEST).json()
+    assert farm_zones(session["plan"]) == farm_zones(plan)
+    assert client.get(f"/api/sessions/{session['session_id']}").json() == session
+
+def test_progress_replans_what_is_left(api, session):
+    main, client = api
+    url = f"/api/sessions/{session['session_id']}/progress"
+    updated = client.post(url, json={"current_zone": "Ruta 22", "gained_evs": {"Speed": 40}, "battles": 20}).json()
+    assert (updated["current_zone"], updated["current_evs"]["Speed"]) == ("Route22", 40)
+    assert (updated["total_battles"], updated["replans"], len(updated["history"])) == (20, 2, 1)
+    expected = main.optimizer.plan(start_zone="Route22", current_evs=updated["current_evs"], target_evs={"Speed": 100},
+                                   accessible_zones=[], held_item=None, has_pokerus=False, lambda_penalty=0.5,
+                                   pokemon_level=20)
+    assert farm_zones(updated["plan"]) == farm_zones(expected)
+    # Absolute EVs replace the current ones and are capped per stat
+    updated = client.post(url, json={"current_evs": {"Speed": 300}}).json()
+    assert updated["current_evs"]["Speed"] == 252
+    assert farm_zones(updated["plan"]) == []
+
+def test_failed_replan_leaves_the_session_as_it_was(api, session, monkeypatch):
+    main, client = api
+    url = f"/api/sessions/{session['session_id']}/progress"
+    assert client.post(url, json={"current_zone": "Nowhere"}).status_code == 400
+
+    def fail(**kwargs):
+        raise ValueError("no plan")
+    monkeypatch.setattr(main.optimizer, "plan", fail)
+    response = client.post(url, json={"current_zone": "Ruta 22", "gained_evs": {"Speed": 40}, "battles": 20})
+    assert response.status_code == 400
+    assert client.get(f"/api/sessions/{session['session_id']}").json() == session
+
+def test_delete_and_unknown_sessions(api, session):
+    _, client = api
+    url = f"/api/sessions/{session['session_id']}"
+    assert client.delete(url).status_code == 200
+    assert client.get(url).status_code == 404
+    assert client.delete(url).status_code == 404
+    assert client.post(f"{url}/progress", json={}).status_code == 404
+
+def test_store_evicts_idle_and_least_recent(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(sessions.time, "monotonic", clock)
+    store = SessionStore(max_sessions=2, idle_ttl_seconds=60)
+    first, second, third = (store.add(TrainingSession(None, "Route1", {})) for _ in range(3))
+    assert store.get(first.id) is None
+    assert store.get(second.id) is second
+    clock.now += 30
+    assert store.get(third.id) is third
+    clock.now += 31
+    # second has been idle for 61 seconds, third for 31
+    assert store.get(second.id) is None
+    assert store.get(third.id) is third
+    assert store.stats()["evictions"] == 2
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import simulator
+from simulator import STAT_CAP, SimulationStep, simulate_battles
+
+SPEED = 5
+
+def step(yields, probabilities, stat_index=SPEED, zone="Route1"):
+    return SimulationStep(zone, stat_index, np.asarray(yields, dtype=np.float64), np.asarray(probabilities, dtype=np.float64))
+
+def targets(**values):
+    result = np.zeros(6)
+    for index, value in values.items():
+        result[int(index[1:])] = value
+    return result
+
+def battle_by_battle(steps, start_stats, targets, trials, seed):
+    """
+    Reference simulation over (stat_index, yields, probabilities) steps: one species draw
+    per battle, each step stopping as soon as its focus stat reaches the target.
+    """
+    rng = np.random.default_rng(seed)
+    totals = []
+    for _ in range(trials):
+        stats = start_stats.astype(np.float64).copy()
+        battles = 0
+        for stat_index, yields, probabilities in steps:
+            weights = probabilities / probabilities.sum()
+            while stats[stat_index] < targets[stat_index]:
+                stats = np.minimum(stats + yields[rng.choice(len(weights), p=weights)], STAT_CAP)
+                battles += 1
+        totals.append(battles)
+    return np.array(totals)
+
+def test_single_species_is_deterministic():
+    result = simulate_battles([step([[0, 0, 0, 0, 0, 2]], [40])], np.zeros(6), targets(s5=252), trials=500, seed=1)
+    assert result["expected_battles"] == 126
+    assert result["std_battles"] == 0
+    assert result["prob_targets_reached"] == 1.0
+    assert result["steps"] == [{"zone": "Route1", "expected_battles": 126.0}]
+
+def test_reached_needs_every_target():
+    # Speed is farmed to its target but nothing gives Attack
+    result = simulate_battles([step([[0, 0, 0, 0, 0, 1]], [10])], np.zeros(6), targets(s1=10, s5=20),
+                              trials=100, seed=1, battle_budget=1000)
+    assert result["expected_battles"] == 20
+    assert result["prob_targets_reached"] == 0.0
+    assert result["prob_within_budget"] == 0.0
+
+def test_zone_without_the_focus_stat_takes_no_battles():
+    result = simulate_battles([step([[1, 0, 0, 0, 0, 0]], [10])], np.zeros(6), targets(s5=20), trials=100, seed=1)
+    assert result["expected_battles"] == 0
+    assert result["prob_targets_reached"] == 0.0
+
+def test_same_seed_same_result():
+    steps = [step([[0, 0, 0, 0, 0, 1], [0, 0, 0, 0, 0, 2], [2, 0, 0, 0, 0, 0]], [40, 20, 40])]
+    first = simulate_battles(steps, np.zeros(6), targets(s5=100), trials=2000, seed=7)
+    assert simulate_battles(steps, np.zeros(6), targets(s5=100), trials=2000, seed=7) == first
+
+@pytest.mark.parametrize("chunk", [simulator.TRIAL_CHUNK, 300])
+def test_matches_battle_by_battle(monkeypatch, chunk):
+    monkeypatch.setattr(simulator, "TRIAL_CHUNK", chunk)
+    yields = np.array([[0, 0, 0, 0, 0, 1], [0, 0, 0, 0, 0, 2], [0, 1, 0, 0, 0, 1], [2, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]],
+                      dtype=np.float64)
+    probabilities = np.array([40, 20, 10, 20, 10], dtype=np.float64)
+    start, goal = targets(s0=4, s5=10), targets(s0=30, s5=120)
+    result = simulate_battles([step(yields, probabilities), step(yields, probabilities, stat_index=0, zone="Route2")],
+                              start, goal, trials=4000, seed=3)
+    expected = battle_by_battle([(SPEED, yields, probabilities), (0, yields, probabilities)], start, goal, trials=2000, seed=4)
+    # Both are estimates of the same mean: compare within a few standard errors
+    tolerance = 4 * np.sqrt(result["std_battles"] ** 2 / 4000 + expected.var() / 2000)
+    assert abs(result["expected_battles"] - expected.mean()) < tolerance
+    assert abs(result["std_battles"] - expected.std()) < 0.15 * expected.std()
+    assert result["prob_targets_reached"] == 1.0
+
+def test_simulate_plan(optimizer):
+    request = {"current_evs": {}, "target_evs": {"Speed": 100}, "held_item": None, "has_pokerus": False}
+    result = optimizer.plan(start_zone="Route1", accessible_zones=[], lambda_penalty=0.5, pokemon_level=20, **request)
+    summary = optimizer.simulate(result, pokemon_level=20, trials=2000, seed=1, **request)
+    farms = [s["zone"] for s in result["path"] if s["type"] == "farm"]
+    assert [s["zone"] for s in summary["steps"]] == farms
+    assert summary["prob_targets_reached"] == 1.0
+    assert summary["expected_battles"] > 0
@@ -0,0 +1,34 @@
+import json
+import os
+import pytest
+from conftest import BACKEND_DIR
+from zone_aliases import ZoneAliasIndex
+
+NAME_MAPPING = os.path.join(BACKEND_DIR, "..", "db", "data_sources", "name_mapping.json")
+
+@pytest.fixture(scope="module")
+def aliases(graph):
+    index = ZoneAliasIndex(graph.distance_table.zones)
+    with open(NAME_MAPPING, encoding="utf-8") as f:
+        index.add_name_mapping(json.load(f))
+    return index
+
+@pytest.mark.parametrize("name", ["Route16_East", "kanto-route16-east", "route 16 east"])
+def test_resolve_sub_zone(aliases, name):
+    assert aliases.resolve(name) == "Route16_East"
+    assert aliases.resolve_all(name) == ["Route16_East"]
+
+@pytest.mark.parametrize("name", ["Route16", "Ruta 16", "Ruta 16 (Zona 1)", "kanto-route-16"])
+def test_split_route_covers_every_sub_zone(aliases, name):
+    assert aliases.resolve(name) == "Route16_East"
+    assert aliases.resolve_all(name) == ["Route16_East", "Route16_West"]
+
+def test_name_mapping_and_db_codes(aliases):
+    assert aliases.resolve("Ciudad Celeste") == "CeruleanCity"
+    assert aliases.resolve("kanto-cerulean-city") == "CeruleanCity"
+    assert aliases.resolve_all("Ciudad Celeste (Zona Norte)") == ["CeruleanCity"]
+
+def test_unknown_names(aliases):
+    assert aliases.resolve("Nowhere") is None
+    assert aliases.resolve_all("Nowhere") == []
+    assert aliases.resolve_all(None) == []
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+INF = float('inf')
+INDEX_NAME = "index.json"
+FORMAT_VERSION = 1
+
+# Neighbour order used when walking down a field; fixed so paths are deterministic
+STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+class TileDistanceFields:
+    """
+    Per-zone BFS distance fields from every passable tile to each exit label, as
+    written by map/build_distance_fields.py. Each zone is one (labels, rows, cols)
+    uint16 array, memory-mapped on first use. A tile query combines the field values
+    at the tile with the graph distance from each exit state, so no grid search
+    happens at request time.
+    """
+    def __init__(self, directory: str, index: Dict[str, Any]):
+        self.directory = directory
+        self.unreachable = int(index["unreachable"])
+        self.zones = index["zones"] # zone -> {file, labels, shape}
+        self._fields = {}
+        self._exit_distances = {} # state id -> distance to every zone id
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['TileDistanceFields']:
+        path = os.path.join(directory, INDEX_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("version") != FORMAT_VERSION:
+            print(f"Warning: Unsupported distance field version in {path}: {index.get('version')}")
+            return None
+        return cls(directory, index)
+
+    def field(self, zone: str) -> Optional[np.ndarray]:
+        entry = self.zones.get(zone)
+        if entry is None:
+            return None
+        fields = self._fields.get(zone)
+        if fields is None:
+            fields = np.load(os.path.join(self.directory, entry["file"]), mmap_mode='r')
+            self._fields[zone] = fields
+        return fields
+
+    def labels(self, zone: str) -> List[str]:
+        entry = self.zones.get(zone)
+        return entry["labels"] if entry else []
+
+    def label_distances(self, zone: str, row: int, col: int) -> Dict[str, int]:
+        """
+        Steps from the tile to the nearest tile of each reachable exit label.
+        Raises ValueError for unknown zones and out-of-range or blocked tiles.
+        """
+        fields = self.field(zone)
+        if fields is None:
+            raise ValueError(f"No distance field for zone '{zone}'")
+        rows, cols = fields.shape[1], fields.shape[2]
+        if not (0 <= row < rows and 0 <= col < cols):
+            raise ValueError(f"Tile ({row}, {col}) is outside zone '{zone}' ({rows}x{cols})")
+        values = fields[:, row, col].tolist()
+        distances = {label: v for label, v in zip(self.labels(zone), values) if v != self.unreachable}
+        if not distances:
+            raise ValueError(f"Tile ({row}, {col}) of zone '{zone}' is blocked or reaches no exit")
+        return distances
+
+    def tile_path(self, zone: str, label: str, row: int, col: int) -> List[Tuple[int, int]]:
+        """
+        Tiles from (row, col) to the nearest tile of label, following the field downhill.
+        """
+        fields = self.field(zone)
+        field = fields[self.labels(zone).index(label)]
+        rows, cols = field.shape
+        path = [(row, col)]
+        d = int(field[row, col])
+        while d > 0:
+            for dr, dc in STEPS:
+                nr, nc = row + dr, col + dc
+                if 0 <= nr < rows and 0 <= nc < cols and field[nr, nc] == d - 1:
+                    row, col, d = nr, nc, d - 1
+                    break
+            else:
+                raise RuntimeError(f"Distance field for '{zone}'/{label} is inconsistent at ({row}, {col})")
+            path.append((row, col))
+        return path
+
+    def _exit_distances_from(self, compiled, state: int):
+        distances = self._exit_distances.get(state)
+        if distances is None:
+            distances = compiled.zone_distances_from_states([state])
+            with self._lock:
+                self._exit_distances[state] = distances
+        return distances
+
+    def route(self, graph, zone: str, row: int, col: int, to_zone: str, include_path: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Shortest route from a tile to any label of to_zone: walk to the best exit label
+        of the tile's zone, then follow the state graph. None if to_zone cannot be reached.
+        """
+        compiled = graph.compiled
+        to_id = compiled.zone_index.get(to_zone)
+        if to_id is None:
+            raise ValueError(f"Unknown zone '{to_zone}'")
+        exits = self.label_distances(zone, row, col)
+
+        if zone == to_zone:
+            result = {"zone": zone, "row": row, "col": col, "to": to_zone, "distance": 0,
+                      "exit_label": None, "exit_distance": 0}
+            if include_path:
+                result["tile_path"] = [[row, col]]
+                result["route"] = []
+            return result
+
+        best = None
+        for label, steps in exits.items():
+            state = compiled.state(zone, label)
+            if state is None:
+                # Label drawn on the map but not connected in the adjacency graph
+                continue
+            total = steps + self._exit_distances_from(compiled, state)[to_id]
+            if best is None or total < best[0]:
+                best = (total, label, steps)
+        if best is None or best[0] == INF:
+            return None
+
+        distance, label, steps = best
+        result = {"zone": zone, "row": row, "col": col, "to": to_zone, "distance": int(distance),
+                  "exit_label": label, "exit_distance": steps}
+        if include_path:
+            route = graph.route(zone, to_zone, start_label=label)
+            result["tile_path"] = [list(tile) for tile in self.tile_path(zone, label, row, col)]
+            for step in route["steps"]:
+                step["cumulative"] += steps
+            result["route"] = route["steps"]
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "zones": len(self.zones),
+            "mapped": len(self._fields),
+            "cached_exit_states": len(self._exit_distances)
+        }
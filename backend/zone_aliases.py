@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Graph zones split by a compass suffix share the parent's encounter data (Route16_East -> Route16)
+COMPASS_SUFFIXES = ("North", "South", "East", "West")
+
+REGION_PREFIX = "kanto-"
+
+def alias_key(name: str) -> str:
+    """
+    Normalized lookup key shared by every naming scheme:
+    'Route 16', 'route16', 'kanto-route-16', 'Ruta 16 (Zona 1)' -> 'route16'.
+    """
+    name = re.sub(r'\s*\(.*\)', '', name).strip().lower()
+    if name.startswith(REGION_PREFIX):
+        name = name[len(REGION_PREFIX):]
+    if name.startswith("ruta"):
+        name = "route" + name[len("ruta"):]
+    return "".join(ch for ch in name if ch.isalnum())
+
+def legacy_db_code(graph_zone: str) -> str:
+    """
+    CamelCase graph name -> 'kanto-...' code, as the optimizer originally derived it.
+    """
+    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1-\2', graph_zone)
+    s2 = re.sub('([a-z0-9])([A-Z])', r'\1-\2', s1).lower()
+    return f"{REGION_PREFIX}{s2.replace('_', '-')}"
+
+def parent_zone(graph_zone: str) -> Optional[str]:
+    """
+    'Route16_East' -> 'Route16'; None for zones without a compass suffix.
+    """
+    base, _, suffix = graph_zone.rpartition("_")
+    if base and suffix in COMPASS_SUFFIXES:
+        return base
+    return None
+
+class ZoneAliasIndex:
+    """
+    Maps every known zone name (graph names, DB zones.code / zones.name, readable
+    names and the Spanish names in name_mapping.json) to one canonical graph zone.
+    Built once at startup; lookups are dict hits. Names that cannot be resolved
+    are collected in `unresolved` instead of being dropped silently.
+
+    Lookups run on worker threads: the alias tables are only written while building,
+    and the db codes learnt by match_sources are guarded by a lock.
+
+    The db/init loaders ship this module too (see db/init/Dockerfile) and map
+    source locations to zones with resolve_all().
+    """
+    def __init__(self, zones: List[str]):
+        self.zones = list(zones)
+        self.zone_ids = {zone: i for i, zone in enumerate(self.zones)}
+        self._exact = {} # alias as written -> zone id
+        self._keys = {} # alias_key(alias) -> zone id
+        self._groups = {} # alias_key(split parent or its aliases) -> ids of its compass sub-zones
+        # Keys under which each zone's encounter data may be filed, in priority order
+        self.source_keys = {}
+        self._db_codes = {} # alias_key(zones.code) -> zones.code
+        self._lock = threading.Lock() # guards _db_codes after build
+        self.unresolved = [] # (source, name)
+
+        for zone_id, zone in enumerate(self.zones):
+            self._register(zone, zone_id)
+            self._register(legacy_db_code(zone), zone_id)
+            keys = [alias_key(zone)]
+            parent = parent_zone(zone)
+            if parent:
+                keys.append(alias_key(parent))
+                self._groups.setdefault(alias_key(parent), []).append(zone_id)
+            self.source_keys[zone_id] = keys
+
+        # Parent names ('Route16') resolve to their first compass sub-zone
+        for zone_id, zone in enumerate(self.zones):
+            parent = parent_zone(zone)
+            if parent and alias_key(parent) not in self._keys:
+                self._register(parent, zone_id)
+
+    def _register(self, alias: str, zone_id: int):
+        self._exact.setdefault(alias, zone_id)
+        self._keys.setdefault(alias_key(alias), zone_id)
+
+    def resolve_id(self, name: Optional[str]) -> Optional[int]:
+        if not name:
+            return None
+        zone_id = self._exact.get(name)
+        if zone_id is None:
+            zone_id = self._keys.get(alias_key(name))
+        return zone_id
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        """
+        Returns the canonical graph zone for any alias, or None.
+        """
+        zone_id = self.resolve_id(name)
+        return None if zone_id is None else self.zones[zone_id]
+
+    def resolve_all(self, name: Optional[str]) -> List[str]:
+        """
+        Every zone a source location covers: a split route's parent name
+        ('Ruta 16', 'Route16') covers all of its compass sub-zones, any other
+        alias its one zone. Empty if the name is unknown.
+        """
+        if not name:
+            return []
+        group = self._groups.get(alias_key(name))
+        if group is not None:
+            return [self.zones[zone_id] for zone_id in group]
+        zone_id = self.resolve_id(name)
+        return [] if zone_id is None else [self.zones[zone_id]]
+
+    def add_aliases(self, aliases: Iterable[Tuple[str, str]], source: str):
+        """
+        Registers (alias, target_name) pairs; target_name may itself be any known alias.
+        """
+        for alias, target in aliases:
+            zone_id = self.resolve_id(target)
+            if zone_id is None:
+                zone_id = self.resolve_id(alias)
+            if zone_id is None:
+                self.unresolved.append((source, alias))
+                continue
+            group = self._groups.get(alias_key(target))
+            if group is not None and alias_key(alias) not in self._keys:
+                self._groups[alias_key(alias)] = group
+            self._register(alias, zone_id)
+
+    def add_name_mapping(self, mapping: Dict[str, str]):
+        """
+        Spanish display name -> graph name (db/data_sources/name_mapping.json).
+        """
+        self.add_aliases(mapping.items(), "name_mapping")
+
+    def add_db_zones(self, db_zones: Iterable[Dict]):
+        """
+        Rows of the zones table ({code, name, ...}).
+        """
+        source_keys = {key for keys in self.source_keys.values() for key in keys}
+        for row in db_zones:
+            code, name = row["code"], row["name"]
+            key = alias_key(code)
+            with self._lock:
+                self._db_codes.setdefault(key, code)
+            zone_id = self.resolve_id(code)
+            if zone_id is None:
+                zone_id = self.resolve_id(name)
+            if zone_id is not None:
+                self._register(code, zone_id)
+                self._register(name, zone_id)
+            elif key not in source_keys:
+                self.unresolved.append(("zones", code))
+
+    def match_sources(self, by_code: Dict[str, Dict]) -> List[Optional[Dict]]:
+        """
+        Aligns a {zones.code: data} map (e.g. zone yields) with self.zones.
+        Each code is normalized once; each zone then costs a couple of dict hits.
+        Codes seen here are also remembered for db_code (covers a startup without DB).
+        """
+        by_key = {}
+        for code, data in by_code.items():
+            by_key.setdefault(alias_key(code), data)
+        with self._lock:
+            for code in by_code:
+                self._db_codes.setdefault(alias_key(code), code)
+        matched = []
+        for zone_id in range(len(self.zones)):
+            data = None
+            for key in self.source_keys[zone_id]:
+                data = by_key.get(key)
+                if data is not None:
+                    break
+            matched.append(data)
+        return matched
+
+    def db_code(self, zone: str) -> str:
+        """
+        zones.code holding the encounters of a graph zone (falls back to the legacy derived code).
+        """
+        zone_id = self.resolve_id(zone)
+        if zone_id is not None:
+            with self._lock:
+                for key in self.source_keys[zone_id]:
+                    code = self._db_codes.get(key)
+                    if code is not None:
+                        return code
+        return legacy_db_code(zone)
+
+    def to_dict(self) -> Dict:
+        """
+        Built lookup tables as plain JSON-able data (for the binary snapshot).
+        """
+        with self._lock:
+            db_codes = dict(self._db_codes)
+        return {
+            "zones": self.zones,
+            "exact": self._exact,
+            "keys": self._keys,
+            "groups": self._groups,
+            "source_keys": [self.source_keys[zone_id] for zone_id in range(len(self.zones))],
+            "db_codes": db_codes,
+            "unresolved": [list(entry) for entry in self.unresolved]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ZoneAliasIndex':
+        """
+        Restores an index saved with to_dict() without rebuilding it.
+        """
+        index = cls.__new__(cls)
+        index.zones = list(data["zones"])
+        index.zone_ids = {zone: i for i, zone in enumerate(index.zones)}
+        index._exact = dict(data["exact"])
+        index._keys = dict(data["keys"])
+        index._groups = dict(data["groups"])
+        index.source_keys = dict(enumerate(data["source_keys"]))
+        index._db_codes = dict(data["db_codes"])
+        index._lock = threading.Lock()
+        index.unresolved = [tuple(entry) for entry in data["unresolved"]]
+        return index
+
+    @classmethod
+    def build(cls, zones: List[str], name_mapping_path: Optional[str] = None, db_zones: Optional[Iterable[Dict]] = None) -> 'ZoneAliasIndex':
+        index = cls(zones)
+        if name_mapping_path and os.path.exists(name_mapping_path):
+            with open(name_mapping_path, 'r', encoding='utf-8') as f:
+                index.add_name_mapping(json.load(f))
+        if db_zones is not None:
+            index.add_db_zones(db_zones)
+        if index.unresolved:
+            print(f"Warning: {len(index.unresolved)} zone names could not be resolved to graph zones: "
+                  f"{', '.join(name for _, name in index.unresolved[:20])}"
+                  f"{' ...' if len(index.unresolved) > 20 else ''}")
+        return index
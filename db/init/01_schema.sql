@@ -51,7 +51,13 @@ CREATE TABLE pokemon (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_pokemon_name ON pokemon(name);
+-- Índices de cobertura: get_all_pokemon (ORDER BY name) y los joins desde encounters
+-- se resuelven con index-only scans sin leer la tabla
+CREATE INDEX idx_pokemon_name ON pokemon(name)
+    INCLUDE (id, pokedex_number, type1, type2,
+             ev_hp, ev_attack, ev_defense, ev_sp_attack, ev_sp_defense, ev_speed);
+CREATE INDEX idx_pokemon_id_evs ON pokemon(id)
+    INCLUDE (name, ev_hp, ev_attack, ev_defense, ev_sp_attack, ev_sp_defense, ev_speed);
 CREATE INDEX idx_pokemon_pokedex ON pokemon(pokedex_number);
 
 -- Tabla de zonas
@@ -65,7 +71,7 @@ CREATE TABLE zones (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_zones_code ON zones(code);
+CREATE INDEX idx_zones_code ON zones(code) INCLUDE (id);
 
 -- Tabla de encuentros
 CREATE TABLE encounters (
@@ -79,12 +85,18 @@ CREATE TABLE encounters (
     avg_level DECIMAL(4,1),
     probability_percent DECIMAL(5,2),
     generation VARCHAR(50),
+    -- Fila lógica del fichero fuente que generó el encuentro (ver load_row_hashes)
+    source_key TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_encounters_zone ON encounters(zone_id);
+CREATE INDEX idx_encounters_source_key ON encounters(source_key) WHERE source_key IS NOT NULL;
 CREATE INDEX idx_encounters_pokemon ON encounters(pokemon_id);
 CREATE INDEX idx_encounters_method ON encounters(encounter_method);
+-- Filtro por zona y banda de nivel (avg_level BETWEEN) de get_zone_encounters
+CREATE INDEX idx_encounters_zone_level ON encounters(zone_id, avg_level)
+    INCLUDE (pokemon_id, probability_percent);
 
 -- Tabla de distancias entre zonas (matriz de adyacencia)
 CREATE TABLE zone_distances (
@@ -99,6 +111,21 @@ CREATE TABLE zone_distances (
 CREATE INDEX idx_distances_from ON zone_distances(from_zone_id);
 CREATE INDEX idx_distances_to ON zone_distances(to_zone_id);
 
+-- Estado de las cargas incrementales de db/init: hash del contenido de cada fichero
+-- fuente y de cada fila lógica cargada, para aplicar solo lo que cambió
+CREATE TABLE load_manifest (
+    source VARCHAR(100) PRIMARY KEY,
+    content_hash CHAR(64) NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE load_row_hashes (
+    source VARCHAR(100) NOT NULL,
+    row_key TEXT NOT NULL,
+    row_hash CHAR(32) NOT NULL,
+    PRIMARY KEY (source, row_key)
+);
+
 -- Vista para calcular EVs promedio por zona y estadística
 CREATE OR REPLACE VIEW zone_ev_rates AS
 SELECT 
@@ -124,4 +151,6 @@ COMMENT ON TABLE pokemon IS 'Catálogo de Pokémon con estadísticas base y EVs
 COMMENT ON TABLE zones IS 'Zonas de entrenamiento del mapa (nodos del grafo)';
 COMMENT ON TABLE encounters IS 'Encuentros de Pokémon en cada zona con probabilidades';
 COMMENT ON TABLE zone_distances IS 'Distancias entre zonas en tiles (aristas del grafo)';
+COMMENT ON TABLE load_manifest IS 'Hash del contenido de cada fichero fuente en su última carga';
+COMMENT ON TABLE load_row_hashes IS 'Hash de cada fila lógica cargada, por fuente, para cargas incrementales';
 COMMENT ON VIEW zone_ev_rates IS 'Tasa promedio de EVs por encuentro en cada zona';
@@ -7,8 +7,8 @@ Ejecutar después de: docker-compose up -d
 import os
 import csv
 import psycopg2
-from psycopg2.extras import execute_batch
 import time
+from bulk_load import stage_rows, vacuum_analyze
 
 DB_CONFIG = {
     'host': os.getenv('POSTGRES_HOST', 'postgres'),
@@ -18,6 +18,15 @@ DB_CONFIG = {
     'port': int(os.getenv('POSTGRES_PORT', 5432))
 }
 
+POKEMON_COLUMNS = (
+    "pokedex_number", "name", "generation", "height", "weight",
+    "type1", "type2", "ability1", "ability2", "ability_hidden",
+    "gender_male", "gender_female", "gender_unknown",
+    "capture_rate", "base_experience", "experience_type", "category",
+    "base_hp", "base_attack", "base_defense", "base_sp_attack", "base_sp_defense", "base_speed", "base_total",
+    "ev_hp", "ev_attack", "ev_defense", "ev_sp_attack", "ev_sp_defense", "ev_speed"
+)
+
 def wait_for_db(max_retries=30):
     """Espera a que la base de datos esté lista"""
     for i in range(max_retries):
@@ -83,22 +92,14 @@ def load_pokemon_data(conn):
                 int(row['E_Speed'])
             ))
     
-    insert_query = """
-        INSERT INTO pokemon (
-            pokedex_number, name, generation, height, weight,
-            type1, type2, ability1, ability2, ability_hidden,
-            gender_male, gender_female, gender_unknown,
-            capture_rate, base_experience, experience_type, category,
-            base_hp, base_attack, base_defense, base_sp_attack, base_sp_defense, base_speed, base_total,
-            ev_hp, ev_attack, ev_defense, ev_sp_attack, ev_sp_defense, ev_speed
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-        ) ON CONFLICT (pokedex_number) DO NOTHING
-    """
-    
-    execute_batch(cursor, insert_query, pokemon_data)
+    # COPY a una tabla temporal y un único INSERT ... SELECT en lugar de un INSERT por fila
+    stage_rows(cursor, "pokemon_staging", POKEMON_COLUMNS, pokemon_data, like="pokemon")
+    cursor.execute(f"""
+        INSERT INTO pokemon ({', '.join(POKEMON_COLUMNS)})
+        SELECT {', '.join(POKEMON_COLUMNS)} FROM pokemon_staging
+        ORDER BY pokedex_number
+        ON CONFLICT (pokedex_number) DO NOTHING
+    """)
     conn.commit()
     print(f"✓ {len(pokemon_data)} Pokémon cargados")
 
@@ -113,6 +114,7 @@ def load_zones_and_encounters(conn):
     
     cursor = conn.cursor()
     zone_id_map = {}
+    encounters = []
     
     for filename in os.listdir(locations_dir):
         if not filename.endswith('.csv'):
@@ -134,18 +136,11 @@ def load_zones_and_encounters(conn):
         filepath = os.path.join(locations_dir, filename)
         with open(filepath, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
-            encounters = []
             
             for row in reader:
+                # El id del Pokémon se resuelve en el INSERT ... SELECT (JOIN por nombre)
                 pokemon_name = row['Pokémon'].strip()
                 
-                cursor.execute("SELECT id FROM pokemon WHERE name = %s", (pokemon_name,))
-                result = cursor.fetchone()
-                if not result:
-                    continue
-                
-                pokemon_id = result[0]
-                
                 # Parsear nivel - manejar casos especiales
                 nivel_str = row['Nivel'].strip()
                 
@@ -177,8 +172,9 @@ def load_zones_and_encounters(conn):
                 probability = rarity_map.get(rarity, 10.0)
                 
                 encounters.append((
+                    len(encounters),
                     zone_id,
-                    pokemon_id,
+                    pokemon_name,
                     row['Método'].strip(),
                     rarity,
                     min_level,
@@ -187,16 +183,25 @@ def load_zones_and_encounters(conn):
                     probability,
                     row.get('Generación', 'Generation 3')
                 ))
-            
-            if encounters:
-                insert_query = """
-                    INSERT INTO encounters (
-                        zone_id, pokemon_id, encounter_method, rarity_tier,
-                        min_level, max_level, avg_level, probability_percent, generation
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                execute_batch(cursor, insert_query, encounters)
     
+    # Todos los encuentros en un solo COPY; los Pokémon que no existen se descartan en el JOIN
+    stage_rows(cursor, "encounters_staging", (
+        ("seq", "integer"), ("zone_id", "integer"), ("pokemon_name", "text"),
+        ("encounter_method", "text"), ("rarity_tier", "text"),
+        ("min_level", "integer"), ("max_level", "integer"), ("avg_level", "numeric"),
+        ("probability_percent", "numeric"), ("generation", "text")
+    ), encounters)
+    cursor.execute("""
+        INSERT INTO encounters (
+            zone_id, pokemon_id, encounter_method, rarity_tier,
+            min_level, max_level, avg_level, probability_percent, generation
+        )
+        SELECT s.zone_id, p.id, s.encounter_method, s.rarity_tier,
+               s.min_level, s.max_level, s.avg_level, s.probability_percent, s.generation
+        FROM encounters_staging s
+        JOIN pokemon p ON p.name = s.pokemon_name
+        ORDER BY s.seq
+    """)
     conn.commit()
     print(f"✓ {len(zone_id_map)} zonas y sus encuentros cargados")
     return zone_id_map
@@ -215,13 +220,14 @@ def calculate_zone_distances(conn, zone_id_map):
                 distance = abs(i - j) * 50
                 distances.append((id1, id2, distance))
     
-    insert_query = """
+    stage_rows(cursor, "distances_staging",
+               (("from_zone_id", "integer"), ("to_zone_id", "integer"), ("distance_tiles", "integer")),
+               distances)
+    cursor.execute("""
         INSERT INTO zone_distances (from_zone_id, to_zone_id, distance_tiles)
-        VALUES (%s, %s, %s)
+        SELECT from_zone_id, to_zone_id, distance_tiles FROM distances_staging
         ON CONFLICT (from_zone_id, to_zone_id) DO NOTHING
-    """
-    
-    execute_batch(cursor, insert_query, distances)
+    """)
     conn.commit()
     print(f"✓ {len(distances)} distancias calculadas")
 
@@ -241,6 +247,7 @@ def main():
         if zone_id_map:
             calculate_zone_distances(conn, zone_id_map)
         
+        vacuum_analyze(conn)
         conn.close()
         print("\n✅ Carga de datos completada exitosamente")
         
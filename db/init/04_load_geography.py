@@ -7,9 +7,9 @@ Lee desde db/scrapingNew/geography_graph.json
 import os
 import json
 import psycopg2
-from psycopg2.extras import execute_batch
 import time
 import re
+from bulk_load import stage_rows, file_hash, source_unchanged, record_source, diff_rows
 
 # Configuración de DB (misma que 02_load_data.py)
 DB_CONFIG = {
@@ -97,9 +97,11 @@ def load_geography(conn):
 
     cursor = conn.cursor()
     
-    # 0. Limpiar distancias antiguas (generadas por 02_load_data.py)
-    print("  - Limpiando distancias antiguas...")
-    cursor.execute("TRUNCATE TABLE zone_distances RESTART IDENTITY CASCADE")
+    # 0. Si el grafo y el mapeo no cambiaron desde la última carga no hay nada que hacer
+    content_hash = file_hash(GRAPH_FILE, MAPPING_FILE)
+    if source_unchanged(cursor, "geography", content_hash):
+        print("✓ Geografía sin cambios, nada que cargar.")
+        return
     
     # 1. Recolectar todas las zonas únicas y mapearlas a IDs existentes
     cursor.execute("SELECT id, code, name FROM zones")
@@ -149,19 +151,20 @@ def load_geography(conn):
     # 2. Insertar Zonas Nuevas
     if zones_to_create:
         print(f"  - Creando {len(zones_to_create)} zonas nuevas...")
-        execute_batch(cursor, """
+        stage_rows(cursor, "zones_staging", ("code", "name"), zones_to_create, like="zones")
+        cursor.execute("""
             INSERT INTO zones (code, name, region)
-            VALUES (%s, %s, 'Kanto')
+            SELECT code, name, 'Kanto' FROM zones_staging
             ON CONFLICT (code) DO NOTHING
-        """, zones_to_create)
+        """)
         conn.commit()
         
         # Actualizar mapa
         cursor.execute("SELECT id, code FROM zones")
         code_to_id = {row[1]: row[0] for row in cursor.fetchall()}
     
-    # 4. Insertar Conexiones
-    connections = []
+    # 4. Insertar Conexiones (origen>destino -> fila; si un par se repite gana el último)
+    connections = {}
     default_distance = 10 # Valor por defecto si es 0
     
     for src_raw, neighbors in graph_data.items():
@@ -188,18 +191,48 @@ def load_geography(conn):
             if dist == 0:
                 dist = default_distance
                 
-            connections.append((src_id, dst_id, dist))
-            
-    print(f"  - Insertando {len(connections)} conexiones...")
-    
-    insert_dist_query = """
-        INSERT INTO zone_distances (from_zone_id, to_zone_id, distance_tiles)
-        VALUES (%s, %s, %s)
-        ON CONFLICT (from_zone_id, to_zone_id) 
-        DO UPDATE SET distance_tiles = EXCLUDED.distance_tiles
-    """
-    
-    execute_batch(cursor, insert_dist_query, connections)
+            connections[f"{src_code}>{dst_code}"] = (src_id, dst_id, dist)
+    
+    # 5. Comparar con los hashes de la carga anterior y aplicar solo las diferencias
+    diff = diff_rows(cursor, "geography.zone_distances", connections)
+    print(f"  - Conexiones: {diff.summary()}")
+    
+    if diff.changed:
+        # COPY a staging y un único upsert; numeric porque el JSON puede traer distancias decimales
+        stage_rows(cursor, "distances_staging",
+                   (("from_zone_id", "integer"), ("to_zone_id", "integer"), ("distance_tiles", "numeric")),
+                   diff.changed.values())
+        cursor.execute("""
+            INSERT INTO zone_distances (from_zone_id, to_zone_id, distance_tiles)
+            SELECT from_zone_id, to_zone_id, distance_tiles FROM distances_staging
+            ON CONFLICT (from_zone_id, to_zone_id) 
+            DO UPDATE SET distance_tiles = EXCLUDED.distance_tiles
+        """)
+    
+    if diff.initial:
+        # Primera carga: el grafo sustituye a las distancias que hubiera (p. ej. las
+        # estimadas por 02_load_data.py); staging tiene todas las conexiones
+        print("  - Eliminando distancias que no vienen del grafo...")
+        if diff.changed:
+            cursor.execute("""
+                DELETE FROM zone_distances d
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM distances_staging s
+                    WHERE s.from_zone_id = d.from_zone_id AND s.to_zone_id = d.to_zone_id
+                )
+            """)
+        else:
+            cursor.execute("DELETE FROM zone_distances")
+    elif diff.deleted:
+        cursor.execute("""
+            DELETE FROM zone_distances d
+            USING zones f, zones t
+            WHERE f.id = d.from_zone_id AND t.id = d.to_zone_id
+              AND f.code || '>' || t.code = ANY(%s)
+        """, (list(diff.deleted),))
+    
+    diff.record(cursor)
+    record_source(cursor, "geography", content_hash)
     conn.commit()
     print("✓ Geografía cargada exitosamente.")
 
@@ -3,8 +3,12 @@ import os
 import json
 import csv
 import psycopg2
-from psycopg2.extras import execute_batch
 import time
+from bulk_load import (
+    stage_rows, run_parallel, file_hash, source_unchanged, record_source, diff_rows,
+    vacuum_analyze
+)
+from zone_aliases import ZoneAliasIndex
 
 DB_CONFIG = {
     'host': os.getenv('POSTGRES_HOST', 'postgres'),
@@ -16,22 +20,39 @@ DB_CONFIG = {
 
 DATA_DIR = '/app/data_sources'
 
+POKEMON_COLUMNS = (
+    "pokedex_number", "name", "generation", "height", "weight", "type1", "type2",
+    "ability1", "ability2", "ability_hidden", "gender_male", "gender_female", "gender_unknown",
+    "capture_rate", "base_experience", "experience_type", "category",
+    "base_hp", "base_attack", "base_defense", "base_sp_attack", "base_sp_defense", "base_speed", "base_total",
+    "ev_hp", "ev_attack", "ev_defense", "ev_sp_attack", "ev_sp_defense", "ev_speed"
+)
+
 def get_db_connection():
     return psycopg2.connect(**DB_CONFIG)
 
 def load_pokemon(conn):
+    """
+    Loads pokedex.csv; returns how many of its rows were added, changed or removed.
+    """
     print("Loading Pokemon...")
     path = os.path.join(DATA_DIR, 'pokedex.csv')
     if not os.path.exists(path):
         print(f"Skipping Pokemon: {path} not found")
-        return
+        return 0
+
+    content_hash = file_hash(path)
+    with conn.cursor() as cur:
+        if source_unchanged(cur, "centralized.pokemon", content_hash):
+            print("Pokemon unchanged, skipping.")
+            return 0
 
     with open(path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-        data = []
+        rows = {}
         for row in reader:
             try:
-                data.append((
+                entry = (
                     int(row['No']), row['Name'], int(row['Generation']),
                     float(row['Height'] or 0), float(row['Weight'] or 0),
                     row['Type1'], row['Type2'] or None,
@@ -44,35 +65,50 @@ def load_pokemon(conn):
                     int(row['Total']),
                     int(row['E_HP'] or 0), int(row['E_Attack'] or 0), int(row['E_Defense'] or 0),
                     int(row['E_SP_Attack'] or 0), int(row['E_SP_Defense'] or 0), int(row['E_Speed'] or 0)
-                ))
+                )
             except ValueError as e:
                 print(f"Error parsing row {row.get('Name', 'Unknown')}: {e}")
+                continue
+            # First row wins for a repeated pokedex number
+            rows.setdefault(str(entry[0]), entry)
 
     with conn.cursor() as cur:
-        execute_batch(cur, """
-            INSERT INTO pokemon (
-                pokedex_number, name, generation, height, weight, type1, type2,
-                ability1, ability2, ability_hidden, gender_male, gender_female, gender_unknown,
-                capture_rate, base_experience, experience_type, category,
-                base_hp, base_attack, base_defense, base_sp_attack, base_sp_defense, base_speed, base_total,
-                ev_hp, ev_attack, ev_defense, ev_sp_attack, ev_sp_defense, ev_speed
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s
-            ) ON CONFLICT (pokedex_number) DO NOTHING;
-        """, data)
+        diff = diff_rows(cur, "centralized.pokemon", rows)
+        if diff.changed:
+            stage_rows(cur, "pokemon_staging", POKEMON_COLUMNS, diff.changed.values(), like="pokemon")
+            # ORDER BY so SERIAL ids follow pokedex order, as with row-by-row inserts.
+            # DO NOTHING: pokemon already in the table (e.g. loaded by 02) keep their values
+            cur.execute(f"""
+                INSERT INTO pokemon ({', '.join(POKEMON_COLUMNS)})
+                SELECT {', '.join(POKEMON_COLUMNS)}
+                FROM pokemon_staging
+                ORDER BY pokedex_number
+                ON CONFLICT (pokedex_number) DO NOTHING;
+            """)
+        # Rows dropped from the CSV are only forgotten: other loaders' encounters may
+        # still reference those pokemon
+        diff.record(cur)
+        record_source(cur, "centralized.pokemon", content_hash)
     conn.commit()
-    print(f"Loaded {len(data)} pokemon.")
+    print(f"Pokemon: {diff.summary()}.")
+    return len(diff.changed) + len(diff.deleted)
 
 def load_zones_and_distances(conn):
+    """
+    Loads zones and zone_distances from adjacency.json; returns how many rows were
+    written or removed. Zones are only ever added.
+    """
     print("Loading Zones and Distances...")
     path = os.path.join(DATA_DIR, 'adjacency.json')
     if not os.path.exists(path):
         print(f"Skipping Adjacency: {path} not found")
-        return
+        return 0
+
+    content_hash = file_hash(path)
+    with conn.cursor() as cur:
+        if source_unchanged(cur, "centralized.adjacency", content_hash):
+            print("Zones and distances unchanged, skipping.")
+            return 0
 
     with open(path, 'r', encoding='utf-8') as f:
         adj = json.load(f)
@@ -85,49 +121,89 @@ def load_zones_and_distances(conn):
                 zone_names.add(conn_info['to'])
 
     with conn.cursor() as cur:
-        zones_data = [(name, name) for name in zone_names]
-        execute_batch(cur, """
-            INSERT INTO zones (code, name) VALUES (%s, %s)
-            ON CONFLICT (code) DO NOTHING;
-        """, zones_data)
-    conn.commit()
+        zone_diff = diff_rows(cur, "centralized.zones", {name: (name, name) for name in zone_names})
+        if zone_diff.changed:
+            stage_rows(cur, "zones_staging", ("code", "name"), sorted(zone_diff.changed.values()), like="zones")
+            cur.execute("""
+                INSERT INTO zones (code, name)
+                SELECT code, name FROM zones_staging
+                ORDER BY code
+                ON CONFLICT (code) DO NOTHING;
+            """)
+        # Zones that left adjacency.json are kept: deleting them would cascade to
+        # encounters and distances loaded by 02 and 04. Only their distances from this
+        # file go away (they are in distance_diff.deleted below).
+        zone_diff.record(cur)
 
-    with conn.cursor() as cur:
         cur.execute("SELECT code, id FROM zones")
         zone_map = {row[0]: row[1] for row in cur.fetchall()}
 
-    distances = []
-    for transit_zone, neighbors in adj.items():
-        for entry_zone, connections in neighbors.items():
-            for conn_info in connections:
-                exit_zone = conn_info['to']
-                dist = conn_info.get('dist')
-                
-                if dist is None:
-                    print(f"Warning: Missing distance for {entry_zone} -> {exit_zone}. Skipping.")
-                    continue
+        # entry>exit -> (from id, to id, distance); a pair reached through several
+        # transit zones keeps the last distance, as the row-by-row upserts did
+        distances = {}
+        for transit_zone, neighbors in adj.items():
+            for entry_zone, connections in neighbors.items():
+                for conn_info in connections:
+                    exit_zone = conn_info['to']
+                    dist = conn_info.get('dist')
 
-                if entry_zone in zone_map and exit_zone in zone_map:
-                    distances.append((zone_map[entry_zone], zone_map[exit_zone], dist))
+                    if dist is None:
+                        print(f"Warning: Missing distance for {entry_zone} -> {exit_zone}. Skipping.")
+                        continue
 
-    with conn.cursor() as cur:
-        execute_batch(cur, """
-            INSERT INTO zone_distances (from_zone_id, to_zone_id, distance_tiles)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (from_zone_id, to_zone_id) DO UPDATE 
-            SET distance_tiles = EXCLUDED.distance_tiles;
-        """, distances)
+                    if entry_zone in zone_map and exit_zone in zone_map:
+                        distances[f"{entry_zone}>{exit_zone}"] = (zone_map[entry_zone], zone_map[exit_zone], dist)
+
+        distance_diff = diff_rows(cur, "centralized.zone_distances", distances)
+        if distance_diff.changed:
+            stage_rows(cur, "distances_staging",
+                       (("from_zone_id", "integer"), ("to_zone_id", "integer"), ("distance_tiles", "integer")),
+                       distance_diff.changed.values())
+            cur.execute("""
+                INSERT INTO zone_distances (from_zone_id, to_zone_id, distance_tiles)
+                SELECT from_zone_id, to_zone_id, distance_tiles FROM distances_staging
+                ON CONFLICT (from_zone_id, to_zone_id) DO UPDATE
+                SET distance_tiles = EXCLUDED.distance_tiles;
+            """)
+        if distance_diff.deleted:
+            cur.execute("""
+                DELETE FROM zone_distances d
+                USING zones f, zones t
+                WHERE f.id = d.from_zone_id AND t.id = d.to_zone_id
+                  AND f.code || '>' || t.code = ANY(%s);
+            """, (list(distance_diff.deleted),))
+        distance_diff.record(cur)
+        record_source(cur, "centralized.adjacency", content_hash)
     conn.commit()
-    print(f"Loaded {len(distances)} distances.")
+    print(f"Zones: {len(zone_diff.changed)} new, {len(zone_diff.deleted)} no longer in the file (kept). "
+          f"Distances: {distance_diff.summary()}.")
+    return len(zone_diff.changed) + len(distance_diff.changed) + len(distance_diff.deleted)
 
-def load_encounters(conn):
+def load_encounters(conn, force=False):
+    """
+    Loads pokemon_locations.csv; returns how many source rows were written or removed.
+    Each CSV row is one logical row (its encounters carry its key in source_key), so
+    a changed row replaces exactly the encounters it produced. force re-resolves rows
+    even if the files are unchanged (pokemon or zones changed under them). Untagged
+    rows from before incremental loads trigger a full reload instead of duplicates.
+    """
     print("Loading Encounters...")
     path = os.path.join(DATA_DIR, 'pokemon_locations.csv')
     if not os.path.exists(path):
         print(f"Skipping Encounters: {path} not found")
-        return
+        return 0
 
     mapping_path = os.path.join(DATA_DIR, 'name_mapping.json')
+    content_hash = file_hash(path, mapping_path)
+    with conn.cursor() as cur:
+        # Rows loaded before source_key existed can't be matched to CSV rows; this is the
+        # only loader that leaves levels NULL, so those are ours: reload everything
+        cur.execute("SELECT EXISTS (SELECT 1 FROM encounters WHERE source_key IS NULL AND avg_level IS NULL)")
+        legacy = cur.fetchone()[0]
+        if not force and not legacy and source_unchanged(cur, "centralized.encounters", content_hash):
+            print("Encounters unchanged, skipping.")
+            return 0
+
     name_mapping = {}
     if os.path.exists(mapping_path):
         with open(mapping_path, 'r', encoding='utf-8') as f:
@@ -137,49 +213,78 @@ def load_encounters(conn):
         cur.execute("SELECT name, id FROM pokemon")
         pokemon_map = {row[0].lower(): row[1] for row in cur.fetchall()}
         cur.execute("SELECT code, id FROM zones")
-        zone_map = {row[0].lower(): row[1] for row in cur.fetchall()}
+        zone_map = {row[0]: row[1] for row in cur.fetchall()}
+
+    # Same alias rules as the backend; a split route ('Ruta 16') covers all its sub-zones
+    aliases = ZoneAliasIndex(list(zone_map))
+    aliases.add_name_mapping(name_mapping)
+    unresolved = {}
 
-    encounters = []
+    # source key -> (pokemon id, zone ids, method, rate, game): the resolved ids are part
+    # of the hash, so a mapping or zone change rewrites the rows it affects
+    rows = {}
     with open(path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
             p_name = row['Pokemon'].strip().lower()
             z_name = row['Ubicacion'].strip()
             
-            if z_name in name_mapping:
-                z_code = name_mapping[z_name]
-            else:
-                z_code = z_name.replace(" ", "")
-                if "Ruta" in z_name:
-                    z_code = z_code.replace("Ruta", "Route")
-            
             p_id = pokemon_map.get(p_name)
-            z_id = zone_map.get(z_code.lower())
+            z_ids = [zone_map[code] for code in aliases.resolve_all(z_name)]
+            if not z_ids:
+                unresolved[z_name] = unresolved.get(z_name, 0) + 1
             
-            if p_id and z_id:
+            if p_id and z_ids:
                 try:
                     rate = float(row['Tasa_Aparicion'])
                 except:
                     rate = 0
-                encounters.append((
-                    z_id, p_id, row['Metodo'], rate, row['Juego']
-                ))
+                base_key = f"{z_name}|{p_name}|{row['Metodo']}|{row['Juego']}"
+                # Identical rows can repeat (e.g. the same spawn listed twice): number them
+                key, n = base_key, 1
+                while key in rows:
+                    n += 1
+                    key = f"{base_key}#{n}"
+                rows[key] = (p_id, tuple(z_ids), row['Metodo'], rate, row['Juego'])
 
+    columns = ("zone_id", "pokemon_id", "encounter_method", "probability_percent", "generation", "source_key")
     with conn.cursor() as cur:
-        execute_batch(cur, """
-            INSERT INTO encounters (zone_id, pokemon_id, encounter_method, probability_percent, generation)
-            VALUES (%s, %s, %s, %s, %s);
-        """, encounters)
+        if legacy:
+            print("Encounters without source_key found, replacing them with a full load.")
+            cur.execute("DELETE FROM encounters WHERE source_key IS NULL AND avg_level IS NULL")
+            cur.execute("DELETE FROM load_row_hashes WHERE source = %s", ("centralized.encounters",))
+        diff = diff_rows(cur, "centralized.encounters", rows)
+        stale = list(diff.changed) + diff.deleted
+        if stale:
+            cur.execute("DELETE FROM encounters WHERE source_key = ANY(%s)", (stale,))
+        if diff.changed:
+            encounters = (
+                (z_id, p_id, method, rate, game, key)
+                for key, (p_id, z_ids, method, rate, game) in diff.changed.items()
+                for z_id in z_ids
+            )
+            stage_rows(cur, "encounters_staging", columns, encounters, like="encounters")
+            cur.execute(f"INSERT INTO encounters ({', '.join(columns)}) SELECT {', '.join(columns)} FROM encounters_staging")
+        diff.record(cur)
+        record_source(cur, "centralized.encounters", content_hash)
     conn.commit()
-    print(f"Loaded {len(encounters)} encounters.")
+    print(f"Encounters: {diff.summary()}.")
+    if unresolved:
+        print(f"Warning: {len(unresolved)} locations did not resolve to a zone "
+              f"({sum(unresolved.values())} rows skipped): {', '.join(sorted(unresolved))}")
+    return len(diff.changed) + len(diff.deleted)
 
 if __name__ == "__main__":
     print("Starting centralized data load...")
     try:
+        # pokemon and zones are independent; encounters need both
+        upstream_changes = sum(run_parallel(get_db_connection, load_pokemon, load_zones_and_distances))
         conn = get_db_connection()
-        load_pokemon(conn)
-        load_zones_and_distances(conn)
-        load_encounters(conn)
+        encounter_changes = load_encounters(conn, force=upstream_changes > 0)
+        if upstream_changes or encounter_changes:
+            vacuum_analyze(conn)
+        else:
+            print("No data changes; tables left as they are.")
         conn.close()
         print("Done.")
     except Exception as e:
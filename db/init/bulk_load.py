@@ -0,0 +1,189 @@
+"""
+Bulk loading helpers shared by the db/init loaders: rows are streamed through
+COPY FROM STDIN into temporary staging tables and merged into the real tables
+with one set-based statement, instead of one INSERT per row.
+
+Loads are incremental: load_manifest keeps a content hash per source file (so an
+unchanged file is skipped) and load_row_hashes one per logical row, so a rerun only
+writes the rows that were added, changed or removed (see 01_schema.sql).
+
+Also home to the post-load VACUUM ANALYZE. Locations are resolved to zones with
+backend/zone_aliases.py, which the image copies in (see Dockerfile).
+"""
+import csv
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+NULL = "\\N"
+
+class CsvRowStream:
+    """
+    File-like object that renders an iterable of rows as CSV on demand, so COPY
+    can stream any number of rows without building the whole payload in memory.
+    None is written as \\N (COPY ... NULL '\\N'), so '' stays an empty string.
+    """
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.row_count = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            # Render rows in batches: one StringIO round trip per ~64KB
+            for row in self._rows:
+                self._writer.writerow([NULL if value is None else value for value in row])
+                self.row_count += 1
+                if self._buffer.tell() >= 65536:
+                    break
+            chunk = self._buffer.getvalue()
+            if not chunk:
+                break
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._pending += chunk
+        if size < 0:
+            data, self._pending = self._pending, ""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+def create_staging(cur, name, columns, like=None):
+    """
+    Temporary table dropped at commit. With like, columns are names whose types are
+    taken from that table (no defaults or constraints); otherwise (column, type) pairs.
+    """
+    cur.execute(f"DROP TABLE IF EXISTS {name}")
+    if like:
+        cur.execute(f"CREATE TEMP TABLE {name} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {like} WITH NO DATA")
+    else:
+        definition = ", ".join(f"{column} {sql_type}" for column, sql_type in columns)
+        cur.execute(f"CREATE TEMP TABLE {name} ({definition}) ON COMMIT DROP")
+
+def copy_rows(cur, table, columns, rows):
+    """
+    Streams rows (tuples in column order) into table with COPY; returns the row count.
+    """
+    stream = CsvRowStream(rows)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')", stream)
+    return stream.row_count
+
+def stage_rows(cur, name, columns, rows, like=None):
+    """
+    create_staging + copy_rows + ANALYZE so the merge query gets sensible plans.
+    """
+    create_staging(cur, name, columns, like)
+    count = copy_rows(cur, name, columns if like else [column for column, _ in columns], rows)
+    cur.execute(f"ANALYZE {name}")
+    return count
+
+def run_parallel(connect, *loaders):
+    """
+    Runs each loader(conn) on its own connection at the same time. Every loader
+    commits its own work; the first failure is re-raised once all have finished.
+    """
+    def run(loader):
+        conn = connect()
+        try:
+            return loader(conn)
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+        futures = [executor.submit(run, loader) for loader in loaders]
+        return [future.result() for future in futures]
+
+def file_hash(*paths):
+    """
+    sha256 over the names and contents of paths (missing files hash as absent).
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8") + b"\0")
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def source_unchanged(cur, source, content_hash):
+    cur.execute("SELECT content_hash FROM load_manifest WHERE source = %s", (source,))
+    row = cur.fetchone()
+    return row is not None and row[0] == content_hash
+
+def record_source(cur, source, content_hash):
+    cur.execute("""
+        INSERT INTO load_manifest (source, content_hash) VALUES (%s, %s)
+        ON CONFLICT (source) DO UPDATE
+        SET content_hash = EXCLUDED.content_hash, loaded_at = CURRENT_TIMESTAMP
+    """, (source, content_hash))
+
+def row_hash(values):
+    return hashlib.md5(repr(tuple(values)).encode("utf-8")).hexdigest()
+
+class RowDiff:
+    """
+    Result of diff_rows: which logical rows of a source are new or changed (with
+    their values) and which were loaded before but are gone from the source.
+    """
+    def __init__(self, source, hashes, changed, deleted, initial):
+        self.source = source
+        self.hashes = hashes    # row_key -> hash, every current row
+        self.changed = changed  # row_key -> values, inserted or updated rows
+        self.deleted = deleted  # row_keys to remove
+        self.initial = initial  # nothing recorded yet: every row counts as changed
+
+    def __bool__(self):
+        return bool(self.changed or self.deleted)
+
+    def summary(self):
+        return f"{len(self.changed)} new/changed, {len(self.deleted)} removed, " \
+               f"{len(self.hashes) - len(self.changed)} unchanged"
+
+    def record(self, cur):
+        """
+        Stores the new row hashes; call in the same transaction that applied the diff.
+        """
+        if self.deleted:
+            cur.execute("DELETE FROM load_row_hashes WHERE source = %s AND row_key = ANY(%s)",
+                        (self.source, list(self.deleted)))
+        if self.changed:
+            stage_rows(cur, "row_hashes_staging", (("row_key", "text"), ("row_hash", "text")),
+                       ((key, self.hashes[key]) for key in self.changed))
+            cur.execute("""
+                INSERT INTO load_row_hashes (source, row_key, row_hash)
+                SELECT %s, row_key, row_hash FROM row_hashes_staging
+                ON CONFLICT (source, row_key) DO UPDATE SET row_hash = EXCLUDED.row_hash
+            """, (self.source,))
+
+def diff_rows(cur, source, rows):
+    """
+    rows: row_key -> tuple of values for every logical row the source has now.
+    Compares their hashes with the ones recorded by the previous load.
+    """
+    cur.execute("SELECT row_key, row_hash FROM load_row_hashes WHERE source = %s", (source,))
+    previous = dict(cur.fetchall())
+    hashes = {key: row_hash(values) for key, values in rows.items()}
+    changed = {key: rows[key] for key, digest in hashes.items() if previous.get(key) != digest}
+    deleted = [key for key in previous if key not in hashes]
+    return RowDiff(source, hashes, changed, deleted, not previous)
+
+def vacuum_analyze(conn, tables=("pokemon", "zones", "encounters", "zone_distances")):
+    """
+    VACUUM ANALYZE the loaded tables: fresh planner statistics, and a visibility map
+    that lets the covering indexes in 01_schema.sql answer the backend's queries
+    with index-only scans.
+    """
+    print("Vacuuming loaded tables...")
+    conn.commit()
+    # VACUUM cannot run inside a transaction block
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for table in tables:
+            cur.execute(f"VACUUM ANALYZE {table}")
+    conn.autocommit = False
+    print("Tables vacuumed.")
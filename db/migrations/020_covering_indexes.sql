@@ -0,0 +1,26 @@
+-- Migración para bases de datos creadas antes de los índices de cobertura.
+-- 01_schema.sql solo se ejecuta al crear el volumen de Postgres; en una base existente:
+--   docker exec -i pokemon_ev_db psql -U trainer -d pokemon_ev < db/migrations/020_covering_indexes.sql
+-- Es idempotente: se puede ejecutar más de una vez.
+
+BEGIN;
+
+-- Índices de cobertura (mismas definiciones que 01_schema.sql)
+DROP INDEX IF EXISTS idx_pokemon_name;
+CREATE INDEX idx_pokemon_name ON pokemon(name)
+    INCLUDE (id, pokedex_number, type1, type2,
+             ev_hp, ev_attack, ev_defense, ev_sp_attack, ev_sp_defense, ev_speed);
+CREATE INDEX IF NOT EXISTS idx_pokemon_id_evs ON pokemon(id)
+    INCLUDE (name, ev_hp, ev_attack, ev_defense, ev_sp_attack, ev_sp_defense, ev_speed);
+
+DROP INDEX IF EXISTS idx_zones_code;
+CREATE INDEX idx_zones_code ON zones(code) INCLUDE (id);
+
+CREATE INDEX IF NOT EXISTS idx_encounters_zone_level ON encounters(zone_id, avg_level)
+    INCLUDE (pokemon_id, probability_percent);
+
+COMMIT;
+
+ANALYZE pokemon;
+ANALYZE zones;
+ANALYZE encounters;
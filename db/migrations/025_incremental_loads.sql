@@ -0,0 +1,30 @@
+-- Migración para bases de datos creadas antes de las cargas incrementales de db/init.
+-- 01_schema.sql solo se ejecuta al crear el volumen de Postgres; en una base existente:
+--   docker exec -i pokemon_ev_db psql -U trainer -d pokemon_ev < db/migrations/025_incremental_loads.sql
+-- Es idempotente: se puede ejecutar más de una vez. Los encuentros ya cargados quedan
+-- con source_key NULL; la siguiente ejecución de 05_load_centralized_data.py los
+-- sustituye con una carga completa en lugar de duplicarlos.
+
+BEGIN;
+
+-- Fila lógica del fichero fuente que generó el encuentro (ver load_row_hashes)
+ALTER TABLE encounters ADD COLUMN IF NOT EXISTS source_key TEXT;
+CREATE INDEX IF NOT EXISTS idx_encounters_source_key ON encounters(source_key) WHERE source_key IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS load_manifest (
+    source VARCHAR(100) PRIMARY KEY,
+    content_hash CHAR(64) NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS load_row_hashes (
+    source VARCHAR(100) NOT NULL,
+    row_key TEXT NOT NULL,
+    row_hash CHAR(32) NOT NULL,
+    PRIMARY KEY (source, row_key)
+);
+
+COMMENT ON TABLE load_manifest IS 'Hash del contenido de cada fichero fuente en su última carga';
+COMMENT ON TABLE load_row_hashes IS 'Hash de cada fila lógica cargada, por fuente, para cargas incrementales';
+
+COMMIT;
@@ -0,0 +1,89 @@
+import os
+import json
+import argparse
+from collections import deque
+
+import numpy as np
+
+from build_adjacency import MATRICES_DIR, read_csv_grid, build_passable_and_labels
+
+# Por defecto se escribe junto al backend (igual que su copia de adjacency.json)
+OUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "distance_fields")
+INDEX_NAME = "index.json"
+FORMAT_VERSION = 1
+
+# Valor para casillas bloqueadas o inalcanzables (los campos se guardan como uint16)
+UNREACHABLE = np.iinfo(np.uint16).max
+
+
+def bfs_field(passable, sources):
+    """BFS multi-source: distancia en pasos desde cada casilla a la casilla más cercana de sources."""
+    R = len(passable)
+    C = len(passable[0]) if R > 0 else 0
+    field = np.full((R, C), UNREACHABLE, dtype=np.uint16)
+    q = deque()
+    for (r, c) in sources:
+        if passable[r][c] and field[r, c] == UNREACHABLE:
+            field[r, c] = 0
+            q.append((r, c))
+    while q:
+        r, c = q.popleft()
+        d = int(field[r, c]) + 1
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < R and 0 <= nc < C and passable[nr][nc] and field[nr, nc] == UNREACHABLE:
+                field[nr, nc] = d
+                q.append((nr, nc))
+    return field
+
+
+def build_zone_fields(grid):
+    """Devuelve (etiquetas ordenadas, array (etiquetas, R, C) con un campo de distancias por etiqueta)."""
+    passable, labels = build_passable_and_labels(grid)
+    label_names = sorted(labels.keys())
+    R = len(passable)
+    C = len(passable[0]) if R > 0 else 0
+    fields = np.full((len(label_names), R, C), UNREACHABLE, dtype=np.uint16)
+    for i, label in enumerate(label_names):
+        fields[i] = bfs_field(passable, labels[label])
+    return label_names, fields
+
+
+def build_all(out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    index = {"version": FORMAT_VERSION, "unreachable": int(UNREACHABLE), "zones": {}}
+
+    for fname in sorted(os.listdir(MATRICES_DIR)):
+        if not fname.lower().endswith(".csv"):
+            continue
+        zone_key = os.path.splitext(fname)[0]
+        grid = read_csv_grid(os.path.join(MATRICES_DIR, fname))
+        label_names, fields = build_zone_fields(grid)
+        if not label_names:
+            print(f"No hay etiquetas en {fname}; se omite.")
+            continue
+
+        field_file = f"{zone_key}.npy"
+        # Escritura atómica: el backend puede estar mapeando el archivo anterior
+        tmp_path = os.path.join(out_dir, field_file + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, fields)
+        os.replace(tmp_path, os.path.join(out_dir, field_file))
+
+        index["zones"][zone_key] = {
+            "file": field_file,
+            "labels": label_names,
+            "shape": [int(fields.shape[1]), int(fields.shape[2])]
+        }
+        print(f"Procesado {fname}: etiquetas={len(label_names)} tamaño={fields.shape[1]}x{fields.shape[2]}")
+
+    with open(os.path.join(out_dir, INDEX_NAME), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    print("Terminado. Campos de distancia guardados en:", out_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera campos de distancia (BFS) por etiqueta de salida de cada zona")
+    parser.add_argument("--out", default=OUT_DIR, help="directorio de salida (por defecto backend/distance_fields)")
+    args = parser.parse_args()
+    build_all(args.out)